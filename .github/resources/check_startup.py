@@ -0,0 +1,67 @@
+"""
+Startup budget check for the `kfp-scripts` entry point.
+
+Runs `kfp-scripts --help` under `python -X importtime` and fails if any of the heavy dependencies are imported, or if the total import time exceeds the budget.
+"""
+import os
+import sys
+import argparse
+import subprocess
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+HEAVY_MODULES = ('kfp', 'kfp_server_api', 'kubernetes', 'graphviz')
+BUDGET_MS = float(os.environ.get('KFP_SCRIPTS_STARTUP_BUDGET_MS', 150))
+
+def parse_importtime(stderr: str) -> list:
+    """
+    Returns:
+        list: Tuples of (module name, nesting depth, cumulative import time in microseconds).
+    """
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+
+        _, cumulative_us, name = line[len('import time:'):].split('|')
+        # Nested imports are indented by two spaces per level
+        depth = (len(name) - len(name.lstrip(' ')) - 1) // 2
+        imports.append((name.strip(), depth, int(cumulative_us)))
+
+    return imports
+
+def check_startup(args=('--help',)):
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', os.path.join(REPO_ROOT, 'kfp-scripts'), *args],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        check=True
+    )
+    imports = parse_importtime(result.stderr)
+
+    heavy = [
+        name for name, _, _ in imports
+        if name.split('.')[0] in HEAVY_MODULES
+    ]
+    assert len(heavy) == 0, "Heavy modules imported at startup: %s" % heavy
+
+    total_ms = sum(cumulative_us for _, depth, cumulative_us in imports if depth == 0) / 1000
+    print(f"Imported {len(imports)} modules in {total_ms:.1f}ms (budget {BUDGET_MS:.0f}ms)")
+    assert total_ms <= BUDGET_MS, "Startup import time %.1fms exceeds budget of %.0fms" % (total_ms, BUDGET_MS)
+
+def subcommands() -> list:
+    """
+    Returns:
+        list: Names of the subcommands registered with the `kfp-scripts` parser, except pass-through ones (no `--help` of their own) which hand over to other scripts.
+    """
+    sys.path.insert(0, REPO_ROOT)
+    from utils.cli import build_parser
+
+    action = next(a for a in build_parser()._actions if isinstance(a, argparse._SubParsersAction))
+    return [name for name, parser in action.choices.items() if parser.add_help]
+
+if __name__ == '__main__':
+    check_startup()
+    for command in subcommands():
+        check_startup((command, '--help'))
@@ -0,0 +1,373 @@
+"""
+Object store throughput benchmark for the SeaweedFS host path deployment.
+
+Measures PUT / GET throughput and latency percentiles while sweeping object size, concurrency, multipart chunk size and Parquet row group size. Results are written as a JSON report which can be compared against other reports with `--compare`.
+
+Against the port forwarded SeaweedFS S3 service (see README):
+
+```bash
+python scripts/bench.py --sizes 64KB,16MB,1GB --concurrency 1,4,16 --output swfs.json
+```
+
+Locally against a moto S3 stand-in (requires `pip install "moto[server]"`):
+
+```bash
+python scripts/bench.py --moto --sizes 64KB,16MB --output moto.json
+```
+"""
+import os
+import json
+import time
+import socket
+import argparse
+import platform
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import s3fs
+
+STORAGE_OPTIONS = {
+    'endpoint_url': os.environ.get('S3_ENDPOINT_URL', 'http://localhost:8333'),
+    'key': os.environ.get('S3_ACCESS_KEY'),
+    'secret': os.environ.get('S3_SECRET_KEY'),
+}
+
+# NOTE: S3 (and s3fs) will not accept multipart parts smaller than 5MiB
+MIN_CHUNK_SIZE = 5 * 2**20
+
+SIZE_UNITS = {
+    'B': 1,
+    'KB': 2**10,
+    'MB': 2**20,
+    'GB': 2**30,
+}
+
+def parse_size(size: str) -> int:
+    size = size.strip().upper()
+    for unit in sorted(SIZE_UNITS, key=len, reverse=True):
+        if size.endswith(unit):
+            return int(float(size[:-len(unit)]) * SIZE_UNITS[unit])
+
+    return int(size)
+
+def format_size(size: int) -> str:
+    for unit in ('GB', 'MB', 'KB'):
+        if size >= SIZE_UNITS[unit] and size % SIZE_UNITS[unit] == 0:
+            return f"{size // SIZE_UNITS[unit]}{unit}"
+
+    return f"{size}B"
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """
+    Linearly interpolated percentile, `q` in [0, 100].
+    """
+    if len(values) == 0:
+        return None
+
+    values = sorted(values)
+    position = (len(values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+def summarize(latencies: List[float], total_bytes: int, wall_time: float) -> dict:
+    return {
+        'ops': len(latencies),
+        'bytes': total_bytes,
+        'wall_seconds': wall_time,
+        'throughput_mb_s': (total_bytes / 2**20) / wall_time if wall_time > 0 else None,
+        'latency_p50': percentile(latencies, 50),
+        'latency_p90': percentile(latencies, 90),
+        'latency_p99': percentile(latencies, 99),
+        'latency_max': max(latencies) if latencies else None,
+    }
+
+def start_moto_server() -> dict:
+    """
+    Start an in process moto S3 server and return storage options pointing at it.
+    """
+    from moto.server import ThreadedMotoServer
+
+    # Find a free port, moto will not tell us which one it picked
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+
+    server = ThreadedMotoServer(ip_address='127.0.0.1', port=port)
+    server.start()
+
+    return {
+        'endpoint_url': f'http://127.0.0.1:{port}',
+        'key': 'testing',
+        'secret': 'testing',
+    }
+
+def make_filesystem(storage_options: dict, bucket: str) -> s3fs.S3FileSystem:
+    fs = s3fs.S3FileSystem(**storage_options)
+    if not fs.exists(bucket):
+        fs.mkdir(bucket)
+
+    return fs
+
+class ObjectBenchmark:
+    def __init__(
+        self,
+        fs: s3fs.S3FileSystem,
+        bucket: str,
+        prefix: str = 'kfp-scripts-bench'
+    ):
+        self.fs = fs
+        self.bucket = bucket
+        self.prefix = prefix
+
+    def _path(self, name: str) -> str:
+        return f"{self.bucket}/{self.prefix}/{name}"
+
+    def _put(self, path: str, payload: memoryview, chunk_size: int) -> float:
+        start = time.perf_counter()
+        # NOTE: s3fs switches to a multipart upload once more than `block_size` is buffered
+        with self.fs.open(path, 'wb', block_size=chunk_size) as f:
+            for offset in range(0, len(payload), chunk_size):
+                f.write(payload[offset:offset + chunk_size])
+
+        return time.perf_counter() - start
+
+    def _get(self, path: str, chunk_size: int) -> float:
+        start = time.perf_counter()
+        with self.fs.open(path, 'rb', block_size=chunk_size, cache_type='none') as f:
+            while f.read(chunk_size):
+                pass
+
+        return time.perf_counter() - start
+
+    def run_objects(
+        self,
+        size: int,
+        concurrency: int,
+        chunk_size: int,
+        repeats: int = 3
+    ) -> List[dict]:
+        assert chunk_size >= MIN_CHUNK_SIZE, "Chunk size must be at least %s" % format_size(MIN_CHUNK_SIZE)
+
+        # One shared buffer, GB sized objects times the concurrency will not fit in memory otherwise
+        payload = memoryview(os.urandom(size))
+        paths = [
+            self._path(f"object-{format_size(size)}-{i}")
+            for i in range(concurrency)
+        ]
+
+        records = []
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for operation in ('put', 'get'):
+                latencies = []
+                wall_time = 0.0
+                for _ in range(repeats):
+                    start = time.perf_counter()
+                    if operation == 'put':
+                        results = pool.map(lambda p: self._put(p, payload, chunk_size), paths)
+                    else:
+                        results = pool.map(lambda p: self._get(p, chunk_size), paths)
+                    latencies.extend(results)
+                    wall_time += time.perf_counter() - start
+
+                record = {
+                    'kind': 'object',
+                    'operation': operation,
+                    'size': size,
+                    'concurrency': concurrency,
+                    'chunk_size': chunk_size,
+                    'row_group_size': None,
+                }
+                record.update(summarize(latencies, size * concurrency * repeats, wall_time))
+                records.append(record)
+
+        self.fs.rm(paths)
+        return records
+
+    def run_parquet(
+        self,
+        rows: int,
+        row_group_size: int,
+        chunk_size: int,
+        repeats: int = 3
+    ) -> List[dict]:
+        import numpy as np
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        rng = np.random.default_rng(0)
+        table = pa.table({
+            'a': rng.integers(0, 2**31, rows),
+            'b': rng.random(rows),
+            'c': rng.random(rows),
+            'd': rng.integers(0, 100, rows),
+        })
+        path = self._path(f"table-{rows}-{row_group_size}.parquet")
+
+        write_latencies = []
+        read_latencies = []
+        size = 0
+        for _ in range(repeats):
+            start = time.perf_counter()
+            with self.fs.open(path, 'wb', block_size=chunk_size) as f:
+                pq.write_table(table, f, row_group_size=row_group_size)
+            write_latencies.append(time.perf_counter() - start)
+
+            size = self.fs.size(path)
+
+            # Stream row groups back the same way a downstream component would
+            start = time.perf_counter()
+            with self.fs.open(path, 'rb', block_size=chunk_size) as f:
+                reader = pq.ParquetFile(f)
+                for i in range(reader.num_row_groups):
+                    reader.read_row_group(i)
+            read_latencies.append(time.perf_counter() - start)
+
+        self.fs.rm(path)
+
+        records = []
+        for operation, latencies in (('parquet_write', write_latencies), ('parquet_read', read_latencies)):
+            record = {
+                'kind': 'parquet',
+                'operation': operation,
+                'size': size,
+                'concurrency': 1,
+                'chunk_size': chunk_size,
+                'row_group_size': row_group_size,
+                'rows': rows,
+            }
+            record.update(summarize(latencies, size * repeats, sum(latencies)))
+            records.append(record)
+
+        return records
+
+def record_key(record: dict) -> tuple:
+    return (
+        record['kind'],
+        record['operation'],
+        record['size'] if record['kind'] == 'object' else record.get('rows'),
+        record['concurrency'],
+        record['chunk_size'],
+        record['row_group_size'],
+    )
+
+def print_report(report: dict):
+    print(f"{'operation':<14} {'size/rows':>10} {'conc':>5} {'chunk':>7} {'rg':>8} {'MB/s':>9} {'p50':>8} {'p90':>8} {'p99':>8}")
+    for r in report['results']:
+        size = format_size(r['size']) if r['kind'] == 'object' else str(r.get('rows'))
+        print(
+            f"{r['operation']:<14} {size:>10} {r['concurrency']:>5} {format_size(r['chunk_size']):>7} "
+            f"{str(r['row_group_size'] or '-'):>8} {r['throughput_mb_s'] or 0:>9.1f} "
+            f"{r['latency_p50'] or 0:>8.3f} {r['latency_p90'] or 0:>8.3f} {r['latency_p99'] or 0:>8.3f}"
+        )
+
+def compare_reports(baseline: dict, candidate: dict):
+    """
+    Print throughput / p50 latency side by side for records present in both reports.
+    """
+    candidate_records = {record_key(r): r for r in candidate['results']}
+
+    print(f"{'operation':<14} {'size/rows':>10} {'conc':>5} {'chunk':>7} {'rg':>8} {'MB/s a':>9} {'MB/s b':>9} {'p50 a':>8} {'p50 b':>8}")
+    for a in baseline['results']:
+        b = candidate_records.get(record_key(a))
+        if b is None:
+            continue
+
+        size = format_size(a['size']) if a['kind'] == 'object' else str(a.get('rows'))
+        print(
+            f"{a['operation']:<14} {size:>10} {a['concurrency']:>5} {format_size(a['chunk_size']):>7} "
+            f"{str(a['row_group_size'] or '-'):>8} "
+            f"{a['throughput_mb_s'] or 0:>9.1f} {b['throughput_mb_s'] or 0:>9.1f} "
+            f"{a['latency_p50'] or 0:>8.3f} {b['latency_p50'] or 0:>8.3f}"
+        )
+
+def run_benchmark(
+    storage_options: dict,
+    bucket: str,
+    sizes: List[int],
+    concurrencies: List[int],
+    chunk_sizes: List[int],
+    rows: List[int],
+    row_group_sizes: List[int],
+    repeats: int = 3,
+    label: Optional[str] = None
+) -> Dict:
+    fs = make_filesystem(storage_options, bucket)
+    bench = ObjectBenchmark(fs, bucket)
+
+    results = []
+    for size in sizes:
+        for concurrency in concurrencies:
+            for chunk_size in chunk_sizes:
+                print(f">>> object size={format_size(size)} concurrency={concurrency} chunk={format_size(chunk_size)}")
+                results.extend(bench.run_objects(size, concurrency, chunk_size, repeats=repeats))
+
+    for n in rows:
+        for row_group_size in row_group_sizes:
+            print(f">>> parquet rows={n} row_group_size={row_group_size}")
+            results.extend(bench.run_parquet(n, row_group_size, chunk_sizes[0], repeats=repeats))
+
+    return {
+        'label': label,
+        'endpoint_url': storage_options['endpoint_url'],
+        'bucket': bucket,
+        'created_at': datetime.now(tz=timezone.utc).isoformat(),
+        'host': platform.node(),
+        'repeats': repeats,
+        'results': results,
+    }
+
+def size_list(value: str) -> List[int]:
+    return [parse_size(v) for v in value.split(',') if v]
+
+def int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(',') if v]
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--bucket', default='my-bucket')
+    parser.add_argument('--sizes', type=size_list, default=size_list('64KB,1MB,16MB,128MB'))
+    parser.add_argument('--concurrency', type=int_list, default=int_list('1,4,16'))
+    parser.add_argument('--chunk-sizes', type=size_list, default=size_list('5MB,16MB,64MB'))
+    parser.add_argument('--rows', type=int_list, default=int_list('1000000'))
+    parser.add_argument('--row-group-sizes', type=int_list, default=int_list('10000,100000,1000000'))
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--label', default=None)
+    parser.add_argument('--moto', action='store_true', help='Run against a local moto S3 server instead of SeaweedFS')
+    parser.add_argument('--output', default=None, help='Path to write the JSON report to')
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CANDIDATE'), help='Compare two existing reports and exit')
+    args = parser.parse_args(argv)
+
+    if args.compare is not None:
+        reports = []
+        for path in args.compare:
+            with open(path, 'r') as f:
+                reports.append(json.load(f))
+        compare_reports(*reports)
+        return
+
+    storage_options = start_moto_server() if args.moto else STORAGE_OPTIONS
+
+    report = run_benchmark(
+        storage_options=storage_options,
+        bucket=args.bucket,
+        sizes=args.sizes,
+        concurrencies=args.concurrency,
+        chunk_sizes=args.chunk_sizes,
+        rows=args.rows,
+        row_group_sizes=args.row_group_sizes,
+        repeats=args.repeats,
+        label=args.label or ('moto' if args.moto else 'seaweedfs')
+    )
+
+    print_report(report)
+
+    if args.output is not None:
+        print(f">>> Writing report to {args.output}")
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == '__main__':
+    main()
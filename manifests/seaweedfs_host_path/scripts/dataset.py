@@ -0,0 +1,161 @@
+"""
+Helpers for moving large Parquet datasets through the SeaweedFS S3 endpoint without holding them in memory.
+
+Writes go through `pyarrow.dataset.write_dataset` which splits the data into files / row groups and uploads each file as a multipart upload with parts written in the background. Reads scan the dataset fragment by fragment, coalescing the needed column chunks into concurrent ranged GETs (`pre_buffer`) and yielding record batches as they arrive. Column projection and filters are pushed down so only the required row groups and columns are fetched.
+"""
+import os
+from typing import Iterable, Iterator, List, Optional, Union
+from urllib.parse import urlparse
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from pyarrow import fs as pafs
+
+STORAGE_OPTIONS = {
+    'endpoint_url': os.environ.get('S3_ENDPOINT_URL', 'http://localhost:8333'),
+    'key': os.environ.get('S3_ACCESS_KEY'),
+    'secret': os.environ.get('S3_SECRET_KEY'),
+}
+
+# Defaults which keep individual GETs large enough to saturate the endpoint while bounding memory per file
+MAX_ROWS_PER_GROUP = 1_000_000
+MAX_ROWS_PER_FILE = 10_000_000
+
+def make_filesystem(storage_options: dict, io_threads: Optional[int] = None) -> pafs.S3FileSystem:
+    """
+    Create a pyarrow S3 filesystem from the same `STORAGE_OPTIONS` dictionary used with pandas / s3fs.
+
+    Args:
+        storage_options (dict): Dictionary with `endpoint_url`, `key` and `secret`.
+        io_threads (Optional[int]): Size of the pyarrow IO thread pool, this bounds the number of concurrent part uploads and ranged GETs.
+
+    Returns:
+        pafs.S3FileSystem: Filesystem to pass to the read / write helpers.
+    """
+    if io_threads is not None:
+        pa.set_io_thread_count(io_threads)
+
+    endpoint = urlparse(storage_options['endpoint_url'])
+    return pafs.S3FileSystem(
+        endpoint_override=endpoint.netloc,
+        scheme=endpoint.scheme or 'http',
+        access_key=storage_options['key'],
+        secret_key=storage_options['secret'],
+        background_writes=True,
+    )
+
+def _strip_scheme(path: str) -> str:
+    return path[len('s3://'):] if path.startswith('s3://') else path
+
+def _to_expression(filters) -> Optional[ds.Expression]:
+    if filters is None or isinstance(filters, ds.Expression):
+        return filters
+
+    # Same DNF list of tuples accepted by `pd.read_parquet(filters=...)`
+    return pq.filters_to_expression(filters)
+
+def write_dataset(
+    data: Union[pa.Table, Iterable[pa.RecordBatch], 'pandas.DataFrame'],
+    path: str,
+    filesystem: pafs.S3FileSystem,
+    schema: Optional[pa.Schema] = None,
+    partition_cols: Optional[List[str]] = None,
+    max_rows_per_file: int = MAX_ROWS_PER_FILE,
+    max_rows_per_group: int = MAX_ROWS_PER_GROUP,
+    compression: str = 'snappy'
+):
+    """
+    Write a (possibly partitioned) Parquet dataset under `path`.
+
+    Passing an iterable of record batches (with `schema`) keeps memory bounded to roughly one row group per open file, the full table never needs to be materialized.
+    """
+    if hasattr(data, 'to_parquet'):
+        data = pa.Table.from_pandas(data, preserve_index=False)
+    elif not isinstance(data, pa.Table):
+        assert schema is not None, "A schema is required when writing an iterable of record batches."
+        data = pa.RecordBatchReader.from_batches(schema, data)
+
+    ds.write_dataset(
+        data,
+        _strip_scheme(path),
+        filesystem=filesystem,
+        format='parquet',
+        partitioning=partition_cols,
+        partitioning_flavor='hive' if partition_cols else None,
+        max_rows_per_file=max_rows_per_file,
+        max_rows_per_group=max_rows_per_group,
+        # NOTE: Needs to be no larger than `max_rows_per_group`
+        min_rows_per_group=min(max_rows_per_group, MAX_ROWS_PER_GROUP // 4),
+        file_options=ds.ParquetFileFormat().make_write_options(compression=compression),
+        existing_data_behavior='delete_matching',
+        use_threads=True,
+    )
+
+def open_dataset(path: str, filesystem: pafs.S3FileSystem) -> ds.Dataset:
+    return ds.dataset(
+        _strip_scheme(path),
+        filesystem=filesystem,
+        format=ds.ParquetFileFormat(
+            default_fragment_scan_options=ds.ParquetFragmentScanOptions(pre_buffer=True)
+        ),
+        partitioning='hive',
+    )
+
+def iter_batches(
+    path: str,
+    filesystem: pafs.S3FileSystem,
+    columns: Optional[List[str]] = None,
+    filters=None,
+    batch_size: int = 128_000,
+    fragment_readahead: int = 4
+) -> Iterator[pa.RecordBatch]:
+    """
+    Stream record batches from a Parquet dataset.
+
+    Args:
+        columns (Optional[List[str]]): Columns to read, everything else is never fetched.
+        filters: A `pyarrow.dataset.Expression` or a pandas style DNF filter list, used to skip partitions and row groups using their statistics.
+        fragment_readahead (int): Number of files fetched concurrently ahead of the consumer.
+    """
+    dataset = open_dataset(path, filesystem)
+    yield from dataset.to_batches(
+        columns=columns,
+        filter=_to_expression(filters),
+        batch_size=batch_size,
+        fragment_readahead=fragment_readahead,
+        use_threads=True,
+    )
+
+def read_dataset(
+    path: str,
+    filesystem: pafs.S3FileSystem,
+    columns: Optional[List[str]] = None,
+    filters=None
+) -> pa.Table:
+    return open_dataset(path, filesystem).to_table(
+        columns=columns,
+        filter=_to_expression(filters),
+    )
+
+if __name__ == '__main__':
+    import numpy as np
+
+    filesystem = make_filesystem(STORAGE_OPTIONS, io_threads=16)
+    schema = pa.schema([('part', pa.int64()), ('a', pa.int64()), ('b', pa.float64())])
+
+    def generate(batches: int = 20, rows: int = 500_000):
+        rng = np.random.default_rng(0)
+        for i in range(batches):
+            yield pa.record_batch([
+                pa.array(np.full(rows, i % 4)),
+                pa.array(rng.integers(0, 100, rows)),
+                pa.array(rng.random(rows)),
+            ], schema=schema)
+
+    write_dataset(generate(), 's3://my-bucket/dummy_dataset', filesystem, schema=schema, partition_cols=['part'])
+
+    total = 0
+    for batch in iter_batches('s3://my-bucket/dummy_dataset', filesystem, columns=['b'], filters=[('part', '=', 1), ('a', '<', 10)]):
+        total += batch.num_rows
+    print("Rows matched:", total)
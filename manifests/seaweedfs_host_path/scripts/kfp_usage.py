@@ -2,9 +2,6 @@ from kfp import dsl
 from kfp import kubernetes
 
 
-import os
-
-
 @dsl.component(packages_to_install=["pandas", "pyarrow", "fsspec", "s3fs"])
 def push():
     import os
@@ -39,6 +36,106 @@ def pull():
     )
     print(df)
 
+@dsl.component(packages_to_install=["pyarrow", "numpy"])
+def push_dataset(path: str, num_batches: int = 100, batch_rows: int = 1_000_000):
+    """
+    Generate and write a partitioned Parquet dataset without materializing it, see `scripts/dataset.py`.
+    """
+    import os
+    import numpy as np
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    from pyarrow import fs as pafs
+
+    # Bounds the number of concurrent multipart part uploads
+    pa.set_io_thread_count(16)
+    filesystem = pafs.S3FileSystem(
+        endpoint_override='seaweedfs.kubeflow.svc.cluster.local:8333',
+        scheme='http',
+        access_key=os.environ["S3_ACCESS_KEY"],
+        secret_key=os.environ["S3_SECRET_KEY"],
+        background_writes=True,
+    )
+
+    schema = pa.schema([('part', pa.int64()), ('a', pa.int64()), ('b', pa.float64())])
+
+    def generate():
+        rng = np.random.default_rng(0)
+        for i in range(num_batches):
+            yield pa.record_batch([
+                pa.array(np.full(batch_rows, i % 8)),
+                pa.array(rng.integers(0, 100, batch_rows)),
+                pa.array(rng.random(batch_rows)),
+            ], schema=schema)
+
+    ds.write_dataset(
+        pa.RecordBatchReader.from_batches(schema, generate()),
+        path[len('s3://'):] if path.startswith('s3://') else path,
+        filesystem=filesystem,
+        format='parquet',
+        partitioning=['part'],
+        partitioning_flavor='hive',
+        max_rows_per_file=10_000_000,
+        max_rows_per_group=1_000_000,
+        existing_data_behavior='delete_matching',
+    )
+
+@dsl.component(packages_to_install=["pyarrow"])
+def pull_dataset(path: str, column: str = 'b', max_a: int = 10) -> float:
+    """
+    Stream a filtered projection of the dataset written by `push_dataset` one record batch at a time.
+    """
+    import os
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    from pyarrow import fs as pafs
+
+    # Bounds the number of concurrent ranged GETs
+    pa.set_io_thread_count(16)
+    filesystem = pafs.S3FileSystem(
+        endpoint_override='seaweedfs.kubeflow.svc.cluster.local:8333',
+        scheme='http',
+        access_key=os.environ["S3_ACCESS_KEY"],
+        secret_key=os.environ["S3_SECRET_KEY"],
+    )
+
+    dataset = ds.dataset(
+        path[len('s3://'):] if path.startswith('s3://') else path,
+        filesystem=filesystem,
+        format=ds.ParquetFileFormat(
+            default_fragment_scan_options=ds.ParquetFragmentScanOptions(pre_buffer=True)
+        ),
+        partitioning='hive',
+    )
+
+    total = 0.0
+    for batch in dataset.to_batches(columns=[column], filter=ds.field('a') < max_a, fragment_readahead=4):
+        total += pc.sum(batch.column(0)).as_py() or 0.0
+
+    print("Sum:", total)
+    return total
+
+def use_s3_secret(task):
+    return kubernetes.use_secret_as_env(
+        task,
+        secret_name="mlpipeline-minio-artifact",
+        secret_key_to_env={
+            "accesskey": "S3_ACCESS_KEY",
+            "secretkey": "S3_SECRET_KEY",
+        }
+    )
+
+@dsl.pipeline
+def test_dataset(path: str = 's3://my-bucket/dummy_kfp_dataset'):
+    task_push = push_dataset(path=path)
+    use_s3_secret(task_push)
+
+    task_pull = pull_dataset(path=path)
+    use_s3_secret(task_pull)
+
+    task_pull.after(task_push)
+
 @dsl.pipeline
 def test_bucket():
     task_push = push()
@@ -0,0 +1,38 @@
+"""
+Producer / consumer pairs passing a payload of a given size, once per way of passing outputs between components:
+
+- `str`: a string return value consumed as a parameter (passed on the consumer's command line),
+- `json`: a dict return value consumed as a parameter,
+- `file`: a file output consumed as a file input (an artifact in the object store),
+- `arrow`: see `arrow_io.py`, `make_wide_table` / `sum_table` sized to roughly the same number of bytes.
+
+Payloads are hex encoded random bytes so they compress about as well as real data (2:1), rather than all the way like repeated characters. `os.urandom` rather than `random.randbytes`, the default component image is Python 3.7.
+"""
+from kfp.components import InputPath, OutputPath
+
+def make_str_payload(size_bytes: int) -> str:
+    import os
+
+    return os.urandom(size_bytes // 2).hex()
+
+def read_str_payload(payload: str) -> int:
+    return len(payload)
+
+def make_json_payload(size_bytes: int) -> dict:
+    import os
+
+    # NOTE: About 70 bytes per item once serialized
+    return {'items': [os.urandom(32).hex() for _ in range(max(size_bytes // 70, 1))]}
+
+def read_json_payload(payload: dict) -> int:
+    return len(payload['items'])
+
+def write_file_payload(size_bytes: int, payload_path: OutputPath('Bytes')):
+    import os
+
+    with open(payload_path, 'w') as f:
+        f.write(os.urandom(size_bytes // 2).hex())
+
+def read_file_payload(payload_path: InputPath('Bytes')) -> int:
+    with open(payload_path, 'rb') as f:
+        return len(f.read())
@@ -2,4 +2,8 @@ from .single_no_op import single_no_op
 from .simple_returns import simple_returns
 from .complex_timed import complex_timed
 from .simple_timed import simple_timed
-from .errors import errors
\ No newline at end of file
+from .errors import errors
+from .arrow_chain import arrow_chain
+from .profiled_timed import profiled_timed
+from .synthetic import make_synthetic, synthetic_pod_count
+from .payload_sweep import make_payload_pipeline, PAYLOAD_KINDS
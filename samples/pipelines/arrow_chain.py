@@ -0,0 +1,33 @@
+from kfp import dsl
+from kfp.components import func_to_container_op
+
+from samples.components.arrow_io import (
+    arrow_io_source,
+    make_wide_table,
+    scale_table,
+    sum_table
+)
+
+def transformer_disable_caching(op):
+    op.execution_options.caching_strategy.max_cache_staleness = "P0D"
+
+def create_arrow_component(func):
+    return func_to_container_op(
+        func,
+        extra_code=arrow_io_source(),
+        packages_to_install=['pyarrow', 'numpy']
+    )
+
+def arrow_chain(num_rows: int, num_columns: int, compression: str = ''):
+    # Disable caching for simplicity of simulation
+    dsl.get_pipeline_conf().add_op_transformer(transformer_disable_caching)
+
+    c_make = create_arrow_component(make_wide_table)
+    c_scale = create_arrow_component(scale_table)
+    c_sum = create_arrow_component(sum_table)
+
+    # Sequential chain passing a wide table along, like the sequential part of `complex_timed`
+    table = c_make(num_rows=num_rows, num_columns=num_columns, compression=compression).output
+    for _ in range(3):
+        table = c_scale(table=table, compression=compression).output
+    c_sum(table=table)
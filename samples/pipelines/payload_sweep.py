@@ -0,0 +1,57 @@
+from kfp import dsl
+
+from samples.components.arrow_io import arrow_io_source, make_wide_table, sum_table
+from samples.components.payloads import (
+    make_str_payload,
+    read_str_payload,
+    make_json_payload,
+    read_json_payload,
+    write_file_payload,
+    read_file_payload
+)
+from samples.components.profiling import create_profiled_component_from_func
+
+PAYLOAD_KINDS = ('str', 'json', 'file', 'arrow')
+# Columns of the Arrow tables, rows are sized to the payload
+ARROW_COLUMNS = 8
+
+def transformer_disable_caching(op):
+    op.execution_options.caching_strategy.max_cache_staleness = "P0D"
+
+def make_payload_pipeline(kind: str, size_bytes: int, repeats: int = 3):
+    """
+    `repeats` independent producer -> consumer pairs passing `size_bytes` as `kind` (see `PAYLOAD_KINDS`), both profiled (see `samples/components/profiling.py`).
+    """
+    assert kind in PAYLOAD_KINDS, f"Unknown payload kind '{kind}', expected one of {PAYLOAD_KINDS}."
+
+    def payload_sweep():
+        # Disable caching for simplicity of simulation
+        dsl.get_pipeline_conf().add_op_transformer(transformer_disable_caching)
+
+        if kind == 'arrow':
+            arrow_kwargs = dict(extra_code=arrow_io_source(), packages_to_install=['pyarrow', 'numpy'])
+            c_produce = create_profiled_component_from_func(make_wide_table, **arrow_kwargs)
+            c_consume = create_profiled_component_from_func(sum_table, **arrow_kwargs)
+            produce = lambda: c_produce(num_rows=max(size_bytes // (8 * ARROW_COLUMNS), 1), num_columns=ARROW_COLUMNS)
+        else:
+            producer, consumer = {
+                'str': (make_str_payload, read_str_payload),
+                'json': (make_json_payload, read_json_payload),
+                'file': (write_file_payload, read_file_payload),
+            }[kind]
+            c_produce = create_profiled_component_from_func(producer)
+            c_consume = create_profiled_component_from_func(consumer)
+            produce = lambda: c_produce(size_bytes=size_bytes)
+
+        with dsl.ParallelFor(list(range(repeats))):
+            p = produce()
+            p.set_display_name("Produce")
+
+            # NOTE: The producers have a single output besides the metrics
+            outputs = {k: v for k, v in p.outputs.items() if k != 'mlpipeline-metrics'}
+            c = c_consume(next(iter(outputs.values())))
+            c.set_display_name("Consume")
+
+    payload_sweep.__name__ = payload_sweep.__qualname__ = f"payload_{kind}_{size_bytes}"
+
+    return payload_sweep
@@ -0,0 +1,37 @@
+from kfp import dsl
+
+from samples.components import timed_sleep, no_op
+from samples.components.profiling import create_profiled_component_from_func
+
+def transformer_disable_caching(op):
+    op.execution_options.caching_strategy.max_cache_staleness = "P0D"
+
+def profiled_timed(base_time: int):
+    # Disable caching for simplicity of simulation
+    dsl.get_pipeline_conf().add_op_transformer(transformer_disable_caching)
+
+    c_sleep = create_profiled_component_from_func(timed_sleep)
+    c_no_op = create_profiled_component_from_func(no_op)
+
+    s1 = c_no_op()
+    s1.set_display_name("No op")
+
+    s2 = c_sleep(seconds=base_time)
+    s2.set_display_name("Sleep")
+    s2.after(s1)
+
+if __name__ == '__main__':
+    from kfp import Client
+
+    from utils.run_data import RunData
+
+    client = Client()
+    result = client.create_run_from_pipeline_func(profiled_timed, arguments={"base_time": 3})
+    run_detail = result.wait_for_run_completion(300)
+
+    data = RunData.from_run_detail(run_detail, client=client)
+    for display_name in ("No op", "Sleep"):
+        node = data.get_nodes(display_name)[0]
+        print(display_name)
+        for name, value in node.profile().items():
+            print(f"  {name}: {value}")
@@ -0,0 +1,71 @@
+from kfp import dsl
+from kfp.components import create_component_from_func
+
+from samples.components import timed_sleep, no_op
+
+def transformer_disable_caching(op):
+    op.execution_options.caching_strategy.max_cache_staleness = "P0D"
+
+def synthetic_pod_count(width: int, depth: int = 1, chain: int = 1) -> int:
+    # Head and tail, plus a chain in every innermost iteration
+    return 2 + chain * width**depth
+
+def make_synthetic(
+    width: int = 10,
+    depth: int = 1,
+    chain: int = 1,
+    sleep_seconds: int = 0,
+    parallelism: int = 0
+):
+    """
+    Pipelines of a given shape for scaling sweeps: a head node, `depth` nested `ParallelFor`s of `width` iterations each, a chain of `chain` nodes in every innermost iteration, and a tail node after all of them.
+
+    Args:
+        width (int): Iterations of each `ParallelFor`.
+        depth (int): Nesting depth of the `ParallelFor`s, 0 for a single chain.
+        chain (int): Sequential nodes per innermost iteration.
+        sleep_seconds (int): Every node sleeps this long, 0 for no-op nodes.
+        parallelism (int): Workflow parallelism, 0 for unlimited.
+    """
+    assert width >= 1 and depth >= 0 and chain >= 1 and sleep_seconds >= 0
+
+    def synthetic():
+        # Disable caching for simplicity of simulation
+        dsl.get_pipeline_conf().add_op_transformer(transformer_disable_caching)
+        if parallelism:
+            dsl.get_pipeline_conf().set_parallelism(parallelism)
+
+        if sleep_seconds:
+            c_sleep = create_component_from_func(func=timed_sleep)
+            node = lambda: c_sleep(seconds=sleep_seconds)
+        else:
+            c_no_op = create_component_from_func(func=no_op)
+            node = lambda: c_no_op()
+
+        head = node()
+        head.set_display_name("Head")
+
+        def body(level: int):
+            if level == depth:
+                previous = head
+                for i in range(chain):
+                    op = node()
+                    op.set_display_name(f"Chain {i}")
+                    op.after(previous)
+                    previous = op
+                return previous
+
+            with dsl.ParallelFor(list(range(width))):
+                return body(level + 1)
+
+        last = body(0)
+
+        tail = node()
+        tail.set_display_name("Tail")
+        tail.after(last)
+
+    # NOTE: The compiler names the pipeline after the function, and `PipelineSubmitter` caches packages by it
+    name = f"synthetic_w{width}_d{depth}_c{chain}_s{sleep_seconds}" + (f"_p{parallelism}" if parallelism else '')
+    synthetic.__name__ = synthetic.__qualname__ = name
+
+    return synthetic
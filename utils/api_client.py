@@ -0,0 +1,265 @@
+"""
+Wrapper around the KFP client (and the Kubernetes custom objects API) for processes where many tools poll the same runs.
+
+- Identical requests in flight at the same time are coalesced into a single call (single flight), every caller gets the same response.
+- Each endpoint has its own token bucket rate limit.
+- Responses for runs / workflows which have finished, and artifacts, are cached without expiry since they can no longer change. Responses for runs still in progress are cached for a short TTL. The cache is bounded, least recently used responses are evicted beyond `max_entries` responses or `max_bytes` of artifact data.
+
+The wrapper passes any other attribute through to the wrapped client, so it can be handed to `RunData.from_run_detail(..., client=client)` and friends as is.
+
+```python
+client = ThrottledClient(Client())
+data = RunData.from_run_detail(client.get_run(run_id), client=client)
+```
+"""
+from __future__ import annotations
+
+import time
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+from utils.throttle import RateLimiter
+
+TERMINAL_PHASES = ('Succeeded', 'Failed', 'Error', 'Skipped')
+TERMINAL_STATES = ('SUCCEEDED', 'FAILED', 'SKIPPED', 'CANCELED')
+
+DEFAULT_RATES = {
+    'get_run': 10.0,
+    'read_artifact': 20.0,
+    'get_namespaced_custom_object': 10.0,
+}
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time, concurrent callers with the same key wait for and share its result.
+    """
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        return call.result
+
+def _response_bytes(response) -> int:
+    # NOTE: Only artifact responses carry sizeable payloads, base64 encoded in `data`
+    data = getattr(response, 'data', None)
+    return len(data) if isinstance(data, (str, bytes)) else 0
+
+class ResponseCache:
+    """
+    Thread safe LRU cache of responses, each either kept for a TTL or until evicted.
+
+    Args:
+        max_entries (int): Maximum number of responses kept.
+        max_bytes (int): Maximum artifact data kept, see `_response_bytes`.
+    """
+    def __init__(self, max_entries: int = 4096, max_bytes: int = 256 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.bytes = 0
+
+        # key -> (expires at or None, size in bytes, response), least recently used first
+        self._entries: OrderedDict[Hashable, Tuple[Optional[float], int, object]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, key: Hashable):
+        _, size, _ = self._entries.pop(key)
+        self.bytes -= size
+
+    def get(self, key: Hashable):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, _, response = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                self._remove(key)
+                return None
+
+            self._entries.move_to_end(key)
+            return response
+
+    def set(self, key: Hashable, response, ttl: Optional[float] = None):
+        size = _response_bytes(response)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if size > self.max_bytes:
+                # Larger than the whole cache, not worth evicting everything else for
+                return
+
+            self._entries[key] = (None if ttl is None else time.monotonic() + ttl, size, response)
+            self.bytes += size
+            while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+def _run_detail_finished(run_detail) -> bool:
+    # v1 `ApiRunDetail` and v2 `V2beta1Run`
+    run = getattr(run_detail, 'run', None)
+    if run is not None and getattr(run, 'status', None) in TERMINAL_PHASES:
+        return True
+
+    return getattr(run_detail, 'state', None) in TERMINAL_STATES
+
+def _workflow_finished(workflow: dict) -> bool:
+    return workflow.get('status', {}).get('phase') in TERMINAL_PHASES
+
+class _RunsProxy:
+    def __init__(self, client: ThrottledClient):
+        self._client = client
+
+    def read_artifact(self, run_id: str, node_id: str, artifact_name: str, **kwargs):
+        # NOTE: Artifacts are only readable once the node finished, after which they never change
+        return self._client._call(
+            'read_artifact',
+            (run_id, node_id, artifact_name),
+            lambda: self._client.client.runs.read_artifact(run_id, node_id, artifact_name, **kwargs),
+            lambda response: True
+        )
+
+    def __getattr__(self, name: str):
+        return getattr(self._client.client.runs, name)
+
+class ThrottledClient:
+    """
+    Args:
+        client (Client): KFP client to wrap, v1 or v2.
+        custom_objects_api (Optional[CustomObjectsApi]): Kubernetes API used for `get_namespaced_custom_object` (e.g. by `ArgoRunData.from_workflow_name`).
+        rates (Optional[Dict[str, float]]): Requests per second by endpoint, merged over `DEFAULT_RATES`.
+        ttl (float): Seconds responses for runs in progress are reused for.
+        max_entries (int): Maximum number of cached responses.
+        max_bytes (int): Maximum cached artifact data, in bytes.
+    """
+    def __init__(
+        self,
+        client,
+        custom_objects_api=None,
+        rates: Optional[Dict[str, float]] = None,
+        ttl: float = 1.0,
+        max_entries: int = 4096,
+        max_bytes: int = 256 * 1024 * 1024
+    ):
+        self.client = client
+        self.custom_objects_api = custom_objects_api
+        self.ttl = ttl
+
+        rates = {**DEFAULT_RATES, **(rates or {})}
+        self.limiters = {endpoint: RateLimiter(rate) for endpoint, rate in rates.items()}
+        self.cache = ResponseCache(max_entries=max_entries, max_bytes=max_bytes)
+        self.flight = SingleFlight()
+        self.runs = _RunsProxy(self)
+
+        # Number of calls which actually reached the API, by endpoint
+        self.calls: Dict[str, int] = {endpoint: 0 for endpoint in rates}
+        self._calls_lock = threading.Lock()
+
+    def _call(self, endpoint: str, args: tuple, fn: Callable, finished: Callable[[object], bool]):
+        key = (endpoint,) + args
+        response = self.cache.get(key)
+        if response is not None:
+            return response
+
+        def fetch():
+            # Another caller may have filled the cache while we waited to lead
+            response = self.cache.get(key)
+            if response is not None:
+                return response
+
+            self.limiters[endpoint].acquire()
+            with self._calls_lock:
+                self.calls[endpoint] += 1
+            response = fn()
+
+            self.cache.set(key, response, ttl=None if finished(response) else self.ttl)
+            return response
+
+        return self.flight.do(key, fetch)
+
+    def get_run(self, run_id: str):
+        return self._call(
+            'get_run',
+            (run_id,),
+            lambda: self.client.get_run(run_id),
+            _run_detail_finished
+        )
+
+    def get_namespaced_custom_object(self, group: str, version: str, namespace: str, plural: str, name: str):
+        assert self.custom_objects_api is not None, "Requires a 'custom_objects_api' to be provided while constructing the client."
+
+        return self._call(
+            'get_namespaced_custom_object',
+            (group, version, namespace, plural, name),
+            lambda: self.custom_objects_api.get_namespaced_custom_object(
+                group=group,
+                version=version,
+                namespace=namespace,
+                plural=plural,
+                name=name
+            ),
+            _workflow_finished
+        )
+
+    def __getattr__(self, name: str):
+        return getattr(self.client, name)
+
+if __name__ == '__main__':
+    from concurrent.futures import ThreadPoolExecutor
+
+    from kfp import Client
+
+    from utils.run_data import RunData
+    from samples.pipelines import complex_timed
+
+    client = ThrottledClient(Client())
+    result = client.create_run_from_pipeline_func(complex_timed, arguments={"base_time": 3})
+
+    # Dozens of dashboards polling the same run
+    def poll(_):
+        while True:
+            data = RunData.from_run_detail(client.get_run(result.run_id), client=client)
+            if data.status in ('Succeeded', 'Failed'):
+                return data
+            time.sleep(0.05)
+
+    with ThreadPoolExecutor(max_workers=32) as pool:
+        list(pool.map(poll, range(32)))
+
+    print(f"API calls: {client.calls}")
@@ -0,0 +1,303 @@
+"""
+Read node artifacts straight from the object store instead of through `client.runs.read_artifact`.
+
+The API server proxies `read_artifact` by loading the whole object and returning it base64 encoded inside of JSON, a third larger and fully buffered at each hop. The node's `outputs.artifacts` already carry the bucket and key in the object store, so with credentials for it (e.g. the SeaweedFS S3 service, see `manifests/seaweedfs_host_path`) the object can be fetched directly: large objects as concurrent ranged GETs, decompressed as the parts arrive. This also works for artifacts whose preview is broken in the UI (the `minio://` errors in the `seaweedfs_host_path` README), as long as the object still exists.
+
+When no storage options are given, or the object store can not be reached, reads fall back to the `read_artifact` proxy. Errors decoding an artifact are raised as they would be from the proxy.
+
+```python
+reader = ArtifactReader(STORAGE_OPTIONS, client=client)
+data = RunData.from_run_detail(client.get_run(run_id), client=client, artifact_reader=reader)
+print(data.nodes[name].pull_metrics())
+```
+"""
+from __future__ import annotations
+
+import zlib
+import tarfile
+import threading
+from io import BytesIO
+from base64 import b64decode
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+DEFAULT_BUCKET = 'mlpipeline'
+DEFAULT_PART_SIZE = 8 * 2**20
+
+def artifact_location(node: dict, artifact_name: str, workflow_manifest: Optional[dict] = None, default_bucket: str = DEFAULT_BUCKET) -> Tuple[str, str]:
+    """
+    Bucket and key of one of a node's output artifacts.
+
+    Args:
+        node (dict): Argo node from `status.nodes`.
+        artifact_name (str): e.g. `main-logs`, `mlpipeline-metrics`.
+        workflow_manifest (Optional[dict]): The node's workflow, used for the bucket of the artifact repository when the artifact does not name one.
+        default_bucket (str): Bucket when neither the artifact nor the workflow name one.
+    """
+    artifacts = {a['name']: a for a in node.get('outputs', {}).get('artifacts', [])}
+    assert artifact_name in artifacts, "Artifact '%s' not found in artifact names for component: %s" % (artifact_name, list(artifacts))
+
+    s3 = artifacts[artifact_name].get('s3')
+    assert s3 is not None and 'key' in s3, f"Artifact '{artifact_name}' is not stored in S3 compatible storage: {artifacts[artifact_name]}"
+
+    bucket = s3.get('bucket')
+    if bucket is None and workflow_manifest is not None:
+        repository = workflow_manifest.get('status', {}).get('artifactRepositoryRef', {}).get('artifactRepository', {})
+        bucket = repository.get('s3', {}).get('bucket')
+
+    return bucket or default_bucket, s3['key']
+
+def _connection_errors() -> Tuple[type, ...]:
+    """
+    Errors which mean the object store can not be reached at all. `s3fs` raises most as `OSError`, but connection failures can surface as botocore's own exceptions.
+    """
+    try:
+        from botocore.exceptions import ConnectTimeoutError, EndpointConnectionError
+    except ImportError:
+        return (OSError,)
+
+    return (OSError, EndpointConnectionError, ConnectTimeoutError)
+
+def is_tar_key(key: str) -> bool:
+    return key.endswith(('.tgz', '.tar.gz', '.tar'))
+
+def decode_artifact(data: bytes, is_tarfile: bool) -> Union[str, Dict[str, str]]:
+    """
+    Decode an artifact as returned by the `read_artifact` proxy, the same way as `NodeData._pull_artifact`.
+    """
+    if not is_tarfile:
+        return data.decode()
+
+    with tarfile.open(fileobj=BytesIO(data)) as tar:
+        return {
+            member.name: tar.extractfile(member).read().decode('utf-8')
+            for member in tar.getmembers()
+            if member.isfile()
+        }
+
+class _ChunkStream:
+    """
+    Minimal read only file object over an iterator of byte chunks, for `tarfile`'s stream mode.
+    """
+    def __init__(self, chunks: Iterator[bytes]):
+        self._chunks = chunks
+        self._buffer = bytearray()
+
+    def read(self, size: int = -1) -> bytes:
+        while size < 0 or len(self._buffer) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._buffer += chunk
+
+        if size < 0:
+            size = len(self._buffer)
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+
+        return data
+
+class ArtifactReader:
+    """
+    Args:
+        storage_options (Optional[dict]): `endpoint_url`, `key` and `secret` of the object store (see `STORAGE_OPTIONS` in `manifests/seaweedfs_host_path/scripts`). Without these (or `fs`) every read goes through the proxy.
+        client (Optional[Client]): KFP client for the `read_artifact` fallback, may be wrapped (e.g. `ThrottledClient`).
+        fs (Optional[AbstractFileSystem]): Use an existing fsspec file system instead of creating an `s3fs` one from `storage_options`.
+        bucket (str): Bucket of artifacts which do not name one, `mlpipeline` in a default install.
+        part_size (int): Bytes per ranged GET.
+        max_workers (int): Maximum ranged GETs in flight per object, this also bounds the memory used to `max_workers * part_size`.
+    """
+    def __init__(
+        self,
+        storage_options: Optional[dict] = None,
+        client=None,
+        fs=None,
+        bucket: str = DEFAULT_BUCKET,
+        part_size: int = DEFAULT_PART_SIZE,
+        max_workers: int = 8
+    ):
+        assert part_size > 0 and max_workers > 0
+
+        if fs is None and storage_options is not None:
+            import s3fs
+
+            fs = s3fs.S3FileSystem(
+                key=storage_options['key'],
+                secret=storage_options['secret'],
+                client_kwargs={'endpoint_url': storage_options['endpoint_url']}
+            )
+
+        self.fs = fs
+        self.client = client
+        self.bucket = bucket
+        self.part_size = part_size
+        self.max_workers = max_workers
+
+        # Number of reads by path taken, and why direct reads were last given up on
+        self.direct_reads = 0
+        self.proxy_reads = 0
+        self.error: Optional[BaseException] = None
+        self._lock = threading.Lock()
+
+    @property
+    def direct(self) -> bool:
+        return self.fs is not None
+
+    def iter_chunks(self, bucket: str, key: str) -> Iterator[bytes]:
+        """
+        Contents of an object in order, fetched as concurrent ranged GETs of `part_size` bytes.
+        """
+        # NOTE: `self.fs` is dropped by `read` once the object store is found unreachable, reads in progress keep theirs
+        fs = self.fs
+        path = f"{bucket}/{key}"
+        size = fs.info(path)['size']
+        if size <= self.part_size:
+            yield fs.cat_file(path)
+            return
+
+        ranges = iter([(start, min(start + self.part_size, size)) for start in range(0, size, self.part_size)])
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            # NOTE: Only `max_workers` parts are requested ahead of the consumer
+            pending = deque(
+                pool.submit(fs.cat_file, path, start, end)
+                for start, end in (r for _, r in zip(range(self.max_workers), ranges))
+            )
+            try:
+                while pending:
+                    data = pending.popleft().result()
+                    next_range = next(ranges, None)
+                    if next_range is not None:
+                        pending.append(pool.submit(fs.cat_file, path, *next_range))
+                    yield data
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def iter_decompressed(self, bucket: str, key: str) -> Iterator[bytes]:
+        """
+        Like `iter_chunks`, gzip compressed objects are decompressed as they stream in.
+        """
+        chunks = self.iter_chunks(bucket, key)
+        if not key.endswith('.gz'):
+            yield from chunks
+            return
+
+        decompressor = zlib.decompressobj(wbits=16 + zlib.MAX_WBITS)
+        for chunk in chunks:
+            yield decompressor.decompress(chunk)
+        yield decompressor.flush()
+
+    def read_direct(self, bucket: str, key: str, is_tarfile: Optional[bool] = None) -> Union[str, Dict[str, str]]:
+        if is_tarfile is None:
+            is_tarfile = is_tar_key(key)
+
+        if not is_tarfile:
+            return b''.join(self.iter_decompressed(bucket, key)).decode()
+
+        # NOTE: Stream mode ('r|*') decompresses and unpacks the members as the parts arrive
+        with tarfile.open(fileobj=_ChunkStream(self.iter_chunks(bucket, key)), mode='r|*') as tar:
+            return {
+                member.name: tar.extractfile(member).read().decode('utf-8')
+                for member in tar
+                if member.isfile()
+            }
+
+    def read_proxy(self, run_id: str, node_id: str, artifact_name: str, is_tarfile: bool, client=None):
+        client = client or self.client
+        assert client is not None, "Pulling artifacts without direct object store access requires a KFP client."
+
+        # Reference https://github.com/kubeflow/pipelines/issues/4327#issuecomment-687255001
+        artifact = client.runs.read_artifact(run_id, node_id, artifact_name)
+        with self._lock:
+            self.proxy_reads += 1
+
+        return decode_artifact(b64decode(artifact.data), is_tarfile)
+
+    def read(
+        self,
+        run_id: str,
+        node: dict,
+        artifact_name: str,
+        is_tarfile: Optional[bool] = None,
+        workflow_manifest: Optional[dict] = None,
+        client=None
+    ) -> Union[str, Dict[str, str]]:
+        """
+        Read a node's artifact, directly when possible and otherwise through the proxy.
+
+        Args:
+            run_id (str): KFP run ID, only used by the proxy.
+            node (dict): Argo node from `status.nodes`.
+            artifact_name (str): e.g. `main-logs`, `mlpipeline-metrics`.
+            is_tarfile (Optional[bool]): Whether the artifact is an archive, inferred from its key by default.
+            workflow_manifest (Optional[dict]): The node's workflow, for the bucket of its artifact repository.
+            client (Optional[Client]): KFP client for the proxy, defaults to the reader's.
+
+        Returns:
+            Union[str, Dict[str, str]]: Text of the artifact, or of each file in it when an archive.
+        """
+        bucket, key = artifact_location(node, artifact_name, workflow_manifest, self.bucket)
+        if is_tarfile is None:
+            is_tarfile = is_tar_key(key)
+
+        fs = self.fs
+        if fs is not None:
+            try:
+                data = self.read_direct(bucket, key, is_tarfile)
+                with self._lock:
+                    self.direct_reads += 1
+                return data
+            except (FileNotFoundError, PermissionError) as e:
+                # NOTE: Specific to this object (e.g. written before a storage migration), the proxy may still have it
+                self.error = e
+            except _connection_errors() as e:
+                # e.g. the endpoint is not reachable from here, stop trying. Anything else (e.g. a corrupt archive) is not the object store's fault and is raised
+                self.error = e
+                self.fs = None
+
+            if client is None and self.client is None:
+                raise self.error
+
+        return self.read_proxy(run_id, node['id'], artifact_name, is_tarfile, client)
+
+    def read_many(
+        self,
+        requests: Iterable[Tuple[str, dict, str]],
+        workflow_manifest: Optional[dict] = None,
+        max_workers: int = 8
+    ) -> List[Union[str, Dict[str, str]]]:
+        """
+        Read many `(run_id, node, artifact_name)` concurrently, e.g. the metrics of every node of a `ParallelFor`.
+        """
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            return list(pool.map(
+                lambda request: self.read(*request, workflow_manifest=workflow_manifest),
+                requests
+            ))
+
+if __name__ == '__main__':
+    import os
+    import time
+
+    from kfp import Client
+
+    from utils.run_data import RunData
+    from samples.pipelines import complex_timed
+
+    client = Client()
+    result = client.create_run_from_pipeline_func(complex_timed, arguments={"base_time": 1})
+    result.wait_for_run_completion()
+    run = client.get_run(result.run_id)
+
+    storage_options = {
+        'endpoint_url': 'http://localhost:8333',
+        'key': os.environ['S3_ACCESS_KEY'],
+        'secret': os.environ['S3_SECRET_KEY'],
+    }
+    for name, reader in (('proxy', ArtifactReader(client=client)), ('direct', ArtifactReader(storage_options, client=client))):
+        data = RunData.from_run_detail(run, client=client, artifact_reader=reader)
+        start = time.perf_counter()
+        for node in data.nodes.values():
+            node.pull_logs()
+        print(f">>> {name}: {len(data.nodes)} logs in {time.perf_counter() - start:.2f}s (direct={reader.direct_reads}, proxy={reader.proxy_reads})")
@@ -0,0 +1,224 @@
+"""
+Offline timing analysis over many dumped workflow manifests (`<name>.pipeline_runtime.workflow_manifest.json` as written by `dump_manifests`, or `kfp-scripts export`), spread over a process pool.
+
+Input is a directory (searched recursively) or an archive of dumps (`.tar`, `.tar.gz`, `.tgz`, `.zip`), dumps may be gzipped. Workers parse batches of manifests and send back only columnar timing records, one row per pod, never the manifests or `RunData` objects, so the parent only concatenates lists. This module deliberately imports nothing heavy (no `kfp`), each worker starts in milliseconds.
+
+```python
+columns = analyze_dumps('dumps/2024-q3.tar.gz')
+df = pandas.DataFrame(columns)
+```
+"""
+from __future__ import annotations
+
+import os
+import gzip
+import json
+import time
+import tarfile
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from utils.timestamps import parse_timestamp
+
+DUMP_SUFFIXES = ('pipeline_runtime.workflow_manifest.json', 'pipeline_runtime.workflow_manifest.json.gz')
+DISPLAY_NAME_ANNOTATION = 'pipelines.kubeflow.org/task_display_name'
+
+COLUMNS = (
+    'source',
+    'run_id',
+    'run_name',
+    'workflow_name',
+    'run_status',
+    'run_started_at',
+    'run_finished_at',
+    'node_id',
+    'node_name',
+    'display_name',
+    'template_name',
+    'node_status',
+    'started_at',
+    'finished_at',
+    'seconds',
+)
+
+# (source name, path to read in the worker or None, contents when already read by the parent)
+Item = Tuple[str, Optional[str], Optional[bytes]]
+
+@lru_cache(maxsize=4)
+def _open_zip(path: str) -> zipfile.ZipFile:
+    # NOTE: Kept open for the life of the worker, reading the central directory for every member is quadratic
+    return zipfile.ZipFile(path)
+
+def _is_dump(name: str, suffixes: Tuple[str, ...]) -> bool:
+    return os.path.basename(name).endswith(suffixes)
+
+def parse_manifest(data: bytes, source: str, columns: Dict[str, List]):
+    """
+    Append a row per pod of a workflow manifest to `columns`. Timestamps are POSIX seconds.
+    """
+    if data[:2] == b'\x1f\x8b':
+        data = gzip.decompress(data)
+    workflow = json.loads(data)
+
+    metadata = workflow['metadata']
+    status = workflow.get('status', {})
+    display_names = {
+        t['name']: t.get('metadata', {}).get('annotations', {}).get(DISPLAY_NAME_ANNOTATION)
+        for t in workflow['spec']['templates']
+    }
+
+    run = (
+        source,
+        metadata.get('labels', {}).get('pipeline/runid'),
+        metadata.get('annotations', {}).get('pipelines.kubeflow.org/run_name'),
+        metadata.get('name'),
+        status.get('phase'),
+        parse_timestamp(status.get('startedAt')),
+        parse_timestamp(status.get('finishedAt')),
+    )
+
+    for node in status.get('nodes', {}).values():
+        if node['type'] != 'Pod':
+            continue
+
+        started_at = parse_timestamp(node.get('startedAt'))
+        finished_at = parse_timestamp(node.get('finishedAt'))
+        row = run + (
+            node['id'],
+            node['name'],
+            display_names.get(node.get('templateName')) or node['displayName'],
+            node.get('templateName'),
+            node['phase'],
+            started_at,
+            finished_at,
+            None if started_at is None or finished_at is None else finished_at - started_at,
+        )
+        for column, value in zip(COLUMNS, row):
+            columns[column].append(value)
+
+def _parse_batch(items: List[Item]) -> Tuple[Dict[str, List], List[str]]:
+    columns: Dict[str, List] = {column: [] for column in COLUMNS}
+    errors = []
+    for source, path, data in items:
+        try:
+            if data is None:
+                if path.startswith('zip://'):
+                    archive, _, member = path[len('zip://'):].partition('!')
+                    data = _open_zip(archive).read(member)
+                else:
+                    with open(path, 'rb') as f:
+                        data = f.read()
+
+            parse_manifest(data, source, columns)
+        except Exception as e:
+            errors.append(f"{source}: {e!r}")
+
+    return columns, errors
+
+def iter_dumps(path: str, suffixes: Tuple[str, ...] = DUMP_SUFFIXES) -> Iterator[Item]:
+    """
+    Dumps in a directory or archive. Files (and zip members) are read by the workers, tar members have to be read in order so the parent streams them.
+    """
+    if os.path.isdir(path):
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                if _is_dump(name, suffixes):
+                    full_path = os.path.join(root, name)
+                    yield os.path.relpath(full_path, path), full_path, None
+
+    elif zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as z:
+            for name in z.namelist():
+                if _is_dump(name, suffixes):
+                    yield name, f"zip://{path}!{name}", None
+
+    elif tarfile.is_tarfile(path):
+        # NOTE: Stream mode, compressed tarballs can not be seeked cheaply
+        with tarfile.open(path, mode='r|*') as tar:
+            for member in tar:
+                if member.isfile() and _is_dump(member.name, suffixes):
+                    yield member.name, None, tar.extractfile(member).read()
+
+    else:
+        yield os.path.basename(path), path, None
+
+def _batches(items: Iterator[Item], batch_size: int) -> Iterator[List[Item]]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def analyze_dumps(
+    path: str,
+    max_workers: Optional[int] = None,
+    batch_size: int = 32,
+    suffixes: Tuple[str, ...] = DUMP_SUFFIXES,
+    progress_every: int = 50
+) -> Dict[str, List]:
+    """
+    Timing records of every pod in every dumped manifest under `path`.
+
+    Args:
+        path (str): Directory, archive, or a single dump.
+        max_workers (Optional[int]): Worker processes, defaults to the number of CPUs.
+        batch_size (int): Manifests parsed per task, larger batches amortize the per task overhead.
+        suffixes (Tuple[str, ...]): File name suffixes of dumps to include.
+        progress_every (int): Print progress every this many batches, 0 to disable.
+
+    Returns:
+        Dict[str, List]: Columns of equal length (see `COLUMNS`), can be passed straight to `pandas.DataFrame`.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    columns: Dict[str, List] = {column: [] for column in COLUMNS}
+    errors: List[str] = []
+
+    start = time.perf_counter()
+    batches = _batches(iter_dumps(path, suffixes), batch_size)
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        # NOTE: A bounded number of batches in flight, archives are never read into memory as a whole
+        pending = deque(pool.submit(_parse_batch, b) for _, b in zip(range(2 * max_workers), batches))
+        done = 0
+        while pending:
+            batch_columns, batch_errors = pending.popleft().result()
+            next_batch = next(batches, None)
+            if next_batch is not None:
+                pending.append(pool.submit(_parse_batch, next_batch))
+
+            for column, values in batch_columns.items():
+                columns[column].extend(values)
+            errors.extend(batch_errors)
+
+            done += 1
+            if progress_every and done % progress_every == 0:
+                print(f">>> {done} batches, {len(columns['node_id'])} nodes in {time.perf_counter() - start:.1f}s")
+
+    for error in errors:
+        print(f">>> Skipped {error}")
+
+    return columns
+
+def write_csv(columns: Dict[str, List], path: str):
+    import csv
+
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(columns.keys())
+        writer.writerows(zip(*columns.values()))
+
+if __name__ == '__main__':
+    import sys
+
+    start = time.perf_counter()
+    columns = analyze_dumps(sys.argv[1])
+    print(f">>> {len(set(columns['run_id']))} runs, {len(columns['node_id'])} nodes in {time.perf_counter() - start:.2f}s")
+
+    if len(sys.argv) > 2:
+        write_csv(columns, sys.argv[2])
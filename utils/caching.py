@@ -0,0 +1,403 @@
+"""
+What execution caching does, or would do, for a set of runs.
+
+Cache hits are read from Argo's `memoizationStatus` on workflow nodes, from the outputs of pods reused by the KFP v1 cache webhook (see `_reused_from_cache`), and from the `CACHED` state of KFP v2 tasks. For Argo workflows a surrogate cache key is also computed for every pod: a hash of the template's container spec, the input parameter values, and the keys of the pods which produced the input artifacts (so a changed upstream input invalidates everything downstream, like the real cache). Pods which executed although an earlier pod of the same component had the same key are time which caching would have saved.
+
+A hit's own pod only restores outputs, what it saved is estimated from the execution it reused: the pod its outputs point to (KFP v1), else the earlier execution with the same surrogate key, else the component's mean execution, else `DurationHistory` for components which were cached in every run added.
+
+**NOTE:** The KFP v1 cache webhook only labels the reused pod (`pipelines.kubeflow.org/reused_from_cache`), the workflow status has no cache field. Hits are instead recognized the way the KFP UI does it: a reused pod reports the output artifacts of the pod it was cached from, stored under that pod's name rather than its own.
+"""
+from __future__ import annotations
+
+import json
+import hashlib
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from utils.history import DurationHistory
+from utils.timestamps import parse_datetime
+from utils.workflow_dag import Scheduler, WorkflowDag, loop_counts_from_status
+
+CACHE_ENABLED_LABEL = 'pipelines.kubeflow.org/enable_caching'
+MAX_CACHE_STALENESS_ANNOTATION = 'pipelines.kubeflow.org/max_cache_staleness'
+DISPLAY_NAME_ANNOTATION = 'pipelines.kubeflow.org/task_display_name'
+
+@dataclass
+class CacheObservation:
+    run_id: str
+    component: str
+    node_id: str
+    key: Optional[str]
+    cached: bool
+    # Would have been a hit, an earlier execution had the same key
+    cacheable: bool
+    seconds: float
+    # Hits only, seconds of the execution whose outputs were reused when it is known
+    reused_seconds: Optional[float] = None
+
+@dataclass
+class ComponentCacheStats:
+    component: str
+    caching_enabled: Optional[bool] = None
+    executions: int = 0
+    hits: int = 0
+    cacheable: int = 0
+    keys: set = field(default_factory=set)
+    executed_seconds: float = 0.0
+    cacheable_seconds: float = 0.0
+    # Seconds of the executions reused by hits, for the hits where they are known
+    reused_seconds: float = 0.0
+    unmatched_hits: int = 0
+    # Mean historical duration, for components without executions
+    history_seconds: Optional[float] = None
+
+    @property
+    def total(self) -> int:
+        return self.executions + self.hits
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.total if self.total else 0.0
+
+    @property
+    def potential_hit_rate(self) -> float:
+        return (self.hits + self.cacheable) / self.total if self.total else 0.0
+
+    @property
+    def mean_seconds(self) -> float:
+        return self.executed_seconds / self.executions if self.executions else 0.0
+
+    @property
+    def hit_seconds(self) -> float:
+        """
+        Estimated execution time of a hit whose reused execution is unknown: the mean execution time, or the historical mean if the component never executed.
+        """
+        if self.executions:
+            return self.mean_seconds
+
+        return self.history_seconds or 0.0
+
+    @property
+    def seconds_saved(self) -> float:
+        """
+        Estimated pod-seconds saved by cache hits, the durations of the executions they reused.
+        """
+        return self.reused_seconds + self.unmatched_hits * self.hit_seconds
+
+    @property
+    def seconds_lost(self) -> float:
+        """
+        Pod-seconds spent executing pods which could have been cache hits.
+        """
+        return self.cacheable_seconds
+
+    @property
+    def key_change_rate(self) -> float:
+        """
+        Fraction of executions with a key never seen before, `1.0` means the key changes every time.
+        """
+        if not self.keys or not self.total:
+            return 0.0
+
+        return len(self.keys) / self.total
+
+    def __str__(self) -> str:
+        return f"CacheStats(component={self.component}, total={self.total}, hit_rate={self.hit_rate:.0%}, potential_hit_rate={self.potential_hit_rate:.0%}, saved={self.seconds_saved:.0f}s, lost={self.seconds_lost:.0f}s, keys={len(self.keys)})"
+
+def _seconds(started_at: Optional[datetime], finished_at: Optional[datetime]) -> float:
+    if started_at is None or finished_at is None:
+        return 0.0
+
+    return (finished_at - started_at).total_seconds()
+
+def _hash(*parts) -> str:
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+def _template_fingerprint(template: dict) -> str:
+    return _hash({k: template.get(k) for k in ('container', 'script', 'inputs', 'outputs')})
+
+def _reused_from_cache(node_id: str, node: dict) -> bool:
+    """
+    Whether the KFP v1 cache webhook reused an earlier pod's outputs for this one: artifacts are stored under the producing pod's name (its node ID), a cached pod's point elsewhere.
+    """
+    artifacts = node.get('outputs', {}).get('artifacts', [])
+    return any('s3' in a and node_id not in a['s3'].get('key', '') for a in artifacts)
+
+def _artifact_locations(node: dict) -> List[str]:
+    """
+    Parts of the output artifact keys, one of which is the node ID of the pod which produced them.
+    """
+    artifacts = node.get('outputs', {}).get('artifacts', [])
+    return [part for a in artifacts if 's3' in a for part in a['s3'].get('key', '').split('/')]
+
+def _caching_enabled(template: dict) -> bool:
+    metadata = template.get('metadata', {})
+    if metadata.get('labels', {}).get(CACHE_ENABLED_LABEL, 'true') != 'true':
+        return False
+
+    return metadata.get('annotations', {}).get(MAX_CACHE_STALENESS_ANNOTATION) != 'P0D'
+
+class WorkflowCacheKeys:
+    """
+    Surrogate cache keys of the pods in an Argo workflow, keyed by node ID.
+    """
+    def __init__(self, workflow_manifest: dict):
+        self.templates = {t['name']: t for t in workflow_manifest['spec']['templates']}
+        self.nodes = workflow_manifest['status'].get('nodes', {})
+        self.fingerprints = {name: _template_fingerprint(t) for name, t in self.templates.items()}
+        self.keys: Dict[str, Optional[str]] = {}
+
+    def _upstream(self, artifact: dict) -> str:
+        # Argo stores outputs under the producing pod's name, which is its node ID
+        location = artifact.get('s3', {}).get('key') or artifact.get('path', '')
+        for part in location.split('/'):
+            if part in self.nodes:
+                return self.key(part) or part
+
+        return location
+
+    def key(self, node_id: str) -> Optional[str]:
+        if node_id in self.keys:
+            return self.keys[node_id]
+
+        # Guard against cycles while recursing into producers
+        self.keys[node_id] = None
+        node = self.nodes[node_id]
+        template_name = node.get('templateName')
+        if node['type'] != 'Pod' or template_name not in self.fingerprints:
+            return None
+
+        inputs = node.get('inputs', {})
+        parameters = sorted((p['name'], p.get('value')) for p in inputs.get('parameters', []))
+        artifacts = sorted((a['name'], self._upstream(a)) for a in inputs.get('artifacts', []))
+
+        key = self.keys[node_id] = _hash(self.fingerprints[template_name], parameters, artifacts)
+        return key
+
+class CacheAnalyzer:
+    """
+    Accumulates cache hits and surrogate keys across runs, which should be added in the order they ran.
+
+    Components are identified by display name, which is stable across pipeline versions while template names (`timed-sleep-2`) are not.
+
+    Accepts `utils.run_data.RunData`, and `RunData` / `ArgoRunData` from `v2/utils/run_data.py`.
+
+    Args:
+        history (Optional[DurationHistory]): Durations of previous runs, for estimating hits of components which never executed in the runs added.
+    """
+    def __init__(self, history: Optional[DurationHistory] = None):
+        self.history = history
+        self.components: Dict[str, ComponentCacheStats] = {}
+        self.observations: List[CacheObservation] = []
+        # (actual, with every cacheable pod skipped, with every hit executed) makespan of Argo runs, replayed by the scheduler
+        self.wall_times: Dict[str, Tuple[float, float, float]] = {}
+        self._seen: Dict[str, set] = defaultdict(set)
+        # Seconds of executed pods by node ID, and of the first execution of each (component, key)
+        self._executed: Dict[str, float] = {}
+        self._executed_by_key: Dict[Tuple[str, str], float] = {}
+
+    @classmethod
+    def from_runs(cls, runs: Iterable, history: Optional[DurationHistory] = None) -> CacheAnalyzer:
+        analyzer = cls(history=history)
+        for run in runs:
+            analyzer.add_run(run)
+
+        return analyzer
+
+    def _reused_seconds(self, observation: CacheObservation, reused_from: Iterable[str] = ()) -> Optional[float]:
+        for node_id in reused_from:
+            if node_id in self._executed:
+                return self._executed[node_id]
+
+        if observation.key is not None:
+            return self._executed_by_key.get((observation.component, observation.key))
+
+        return None
+
+    def _record(
+        self,
+        observation: CacheObservation,
+        caching_enabled: Optional[bool] = None,
+        template_name: Optional[str] = None,
+        reused_from: Iterable[str] = ()
+    ):
+        stats = self.components.get(observation.component)
+        if stats is None:
+            stats = self.components[observation.component] = ComponentCacheStats(observation.component)
+            if self.history is not None:
+                samples = self.history.samples(template_name, observation.component)
+                stats.history_seconds = sum(samples) / len(samples) if samples else None
+        if caching_enabled is not None:
+            stats.caching_enabled = caching_enabled
+
+        seen = self._seen[observation.component]
+        if observation.key is not None:
+            observation.cacheable = not observation.cached and observation.key in seen
+            seen.add(observation.key)
+            stats.keys.add(observation.key)
+
+        if observation.cached:
+            stats.hits += 1
+            observation.reused_seconds = self._reused_seconds(observation, reused_from)
+            if observation.reused_seconds is None:
+                stats.unmatched_hits += 1
+            else:
+                stats.reused_seconds += observation.reused_seconds
+        else:
+            stats.executions += 1
+            stats.executed_seconds += observation.seconds
+            self._executed[observation.node_id] = observation.seconds
+            if observation.key is not None:
+                self._executed_by_key.setdefault((observation.component, observation.key), observation.seconds)
+            if observation.cacheable:
+                stats.cacheable += 1
+                stats.cacheable_seconds += observation.seconds
+
+        self.observations.append(observation)
+
+    def add_run(self, run):
+        if hasattr(run, 'workflow_manifest'):
+            self.add_workflow(run.run_id, run.workflow_manifest)
+        elif hasattr(run, 'workflow_data'):
+            self.add_workflow(run.workflow_data['metadata']['name'], run.workflow_data)
+        elif hasattr(run, 'run'):
+            self.add_v2_run(run)
+        else:
+            raise TypeError(f"Unsupported run type: {type(run)}")
+
+    def add_workflow(self, run_id: str, workflow_manifest: dict):
+        keys = WorkflowCacheKeys(workflow_manifest)
+        observations = {}
+        for node_id, node in keys.nodes.items():
+            if node['type'] != 'Pod' or node['phase'] != 'Succeeded':
+                continue
+
+            template = keys.templates.get(node.get('templateName'), {})
+            component = template.get('metadata', {}).get('annotations', {}).get(DISPLAY_NAME_ANNOTATION, node['displayName'])
+            observation = CacheObservation(
+                run_id=run_id,
+                component=component,
+                node_id=node_id,
+                key=keys.key(node_id),
+                cached=bool(node.get('memoizationStatus', {}).get('hit')) or _reused_from_cache(node_id, node),
+                cacheable=False,
+                seconds=_seconds(parse_datetime(node.get('startedAt')), parse_datetime(node.get('finishedAt'))),
+            )
+            self._record(
+                observation,
+                caching_enabled=_caching_enabled(template),
+                template_name=node.get('templateName'),
+                reused_from=_artifact_locations(node)
+            )
+            observations[node['name']] = observation
+
+        self.wall_times[run_id] = self._replay(workflow_manifest, observations)
+
+    def _replay(self, workflow_manifest: dict, observations: Dict[str, CacheObservation]) -> Tuple[float, float, float]:
+        dag = WorkflowDag(workflow_manifest, loop_counts=loop_counts_from_status(workflow_manifest))
+        actual = [0.0] * len(dag.nodes)
+        cached = [0.0] * len(dag.nodes)
+        uncached = [0.0] * len(dag.nodes)
+        for node_name, observation in observations.items():
+            task = dag.find(node_name)
+            if task is None:
+                continue
+            actual[task.index] = observation.seconds
+            if not observation.cacheable:
+                cached[task.index] = observation.seconds
+
+            if not observation.cached:
+                uncached[task.index] = observation.seconds
+            elif observation.reused_seconds is not None:
+                uncached[task.index] = observation.reused_seconds
+            else:
+                uncached[task.index] = self.components[observation.component].hit_seconds
+
+        scheduler = Scheduler(dag)
+        return scheduler.makespan(actual), scheduler.makespan(cached), scheduler.makespan(uncached)
+
+    def add_v2_run(self, run):
+        run_id = run.run.run_id
+        for node in run.nodes:
+            task = node.task
+            # Only leaf tasks run pods, DAG tasks have children
+            if task.child_tasks or node.state not in ('SUCCEEDED', 'CACHED'):
+                continue
+
+            # NOTE: v2 task details do not expose the cache fingerprint
+            self._record(CacheObservation(
+                run_id=run_id,
+                component=node.display_name,
+                node_id=task.task_id,
+                key=None,
+                cached=node.state == 'CACHED',
+                cacheable=False,
+                seconds=_seconds(task.start_time, task.end_time),
+            ))
+
+    @property
+    def hit_rate(self) -> float:
+        total = sum(s.total for s in self.components.values())
+        return sum(s.hits for s in self.components.values()) / total if total else 0.0
+
+    @property
+    def seconds_saved(self) -> float:
+        return sum(s.seconds_saved for s in self.components.values())
+
+    @property
+    def seconds_lost(self) -> float:
+        return sum(s.seconds_lost for s in self.components.values())
+
+    @property
+    def wall_seconds_saved(self) -> float:
+        """
+        Wall time across all Argo runs which the cache hits saved, against the runs with every hit executed.
+        """
+        return sum(uncached - actual for actual, _, uncached in self.wall_times.values())
+
+    @property
+    def wall_seconds_lost(self) -> float:
+        """
+        Wall time across all Argo runs which caching the cacheable pods would have saved.
+        """
+        return sum(actual - cached for actual, cached, _ in self.wall_times.values())
+
+    def unstable_keys(self, n: int = 10) -> List[ComponentCacheStats]:
+        """
+        Components whose cache keys change most often, ignoring components which only ran once.
+        """
+        candidates = [s for s in self.components.values() if s.keys and s.total > 1]
+        return sorted(candidates, key=lambda s: (s.key_change_rate, s.executed_seconds), reverse=True)[:n]
+
+    def opportunities(self, n: int = 10) -> List[ComponentCacheStats]:
+        """
+        Components which would benefit most from caching, by pod-seconds lost to misses.
+        """
+        return sorted(self.components.values(), key=lambda s: s.seconds_lost, reverse=True)[:n]
+
+    def display(self):
+        print(f"Cache(hit_rate={self.hit_rate:.0%}, saved={self.seconds_saved:.0f}s, lost={self.seconds_lost:.0f}s, wall_saved={self.wall_seconds_saved:.0f}s, wall_lost={self.wall_seconds_lost:.0f}s)")
+        print("  Biggest opportunities:")
+        for stats in self.opportunities():
+            enabled = '' if stats.caching_enabled is None else f" (caching {'enabled' if stats.caching_enabled else 'disabled'})"
+            print(f"    {stats}{enabled}")
+        print("  Most unstable keys:")
+        for stats in self.unstable_keys():
+            print(f"    {stats.component}: {len(stats.keys)} keys over {stats.total} executions")
+
+if __name__ == '__main__':
+    from kfp import Client
+
+    from utils.run_data import RunData
+    from samples.pipelines import complex_timed
+
+    client = Client()
+
+    runs = []
+    for base_time in (3, 3, 4):
+        result = client.create_run_from_pipeline_func(complex_timed, arguments={"base_time": base_time})
+        runs.append(RunData.from_run_detail(result.wait_for_run_completion(600)))
+
+    CacheAnalyzer.from_runs(runs).display()
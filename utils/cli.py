@@ -0,0 +1,259 @@
+"""
+Single entry point for the scripts in this repository, see `kfp-scripts --help`.
+
+NOTE: Importing `kfp`, `kfp_server_api`, `kubernetes` or `graphviz` costs more than a second, so these must only ever be imported inside of the subcommand handlers which need them. `.github/resources/check_startup.py` enforces this.
+"""
+import os
+import sys
+import argparse
+from typing import List, Optional
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _get_client(args):
+    from kfp import Client
+
+    return Client(host=args.host)
+
+def _get_run_data(args, client):
+    from utils.run_data import RunData
+
+    return RunData.from_run_detail(client.get_run(args.run_id), client=client)
+
+def watch(args):
+    import time
+
+    client = _get_client(args)
+    if not args.plain:
+        from utils.dashboard import watch as watch_dashboard
+
+        watch_dashboard(lambda: _get_run_data(args, client), poll_interval=args.interval, max_fps=args.fps, expanded=args.expand)
+        return
+
+    while True:
+        data = _get_run_data(args, client)
+
+        data.display()
+        print('\n')
+
+        if data.status in ('Succeeded', 'Failed', 'Error'):
+            break
+
+        time.sleep(args.interval)
+
+def inspect_run(args):
+    client = _get_client(args)
+
+    if args.node is None:
+        _get_run_data(args, client).display()
+        return
+
+    import json
+
+    from utils.manifest import KFPRun
+
+    run_detail = client.get_run(args.run_id)
+    run = KFPRun(
+        runtime_manifest=json.loads(run_detail.pipeline_runtime.workflow_manifest),
+        _client=client
+    )
+    for node in run.get_pod_nodes():
+        if node.display_name != args.node:
+            continue
+
+        print(f"Node(name={node.display_name}, id={node.node_id}, template={node.template_name}, phase={node.node['phase']})")
+        print(f"  startedAt: {node.node['startedAt']}")
+        print(f"  finishedAt: {node.node['finishedAt']}")
+        if args.outputs and node.node['phase'] == 'Succeeded':
+            for name, value in node.get_output_data().items():
+                print(f"  {name}: {value!r}")
+
+def logs(args):
+    client = _get_client(args)
+    data = _get_run_data(args, client)
+
+    nodes = data.get_nodes(args.node)
+    assert len(nodes) > 0, "No nodes with display name '%s' found." % args.node
+
+    for node in nodes:
+        print(f"---- {node} ----")
+        print(node.pull_logs())
+
+def index_logs(args):
+    from utils.log_index import LogIndex
+
+    client = _get_client(args)
+    with LogIndex(args.db) as index:
+        count = index.add_runs(client, args.run_ids, max_workers=args.workers, rate=args.rate, progress=True)
+    print(f">>> Indexed {count} nodes into {args.db}")
+
+def search_logs(args):
+    from datetime import datetime, timezone
+
+    from utils.log_index import LogIndex
+
+    def parse_date(value: Optional[str]):
+        if value is None:
+            return None
+        dt = datetime.fromisoformat(value)
+        return dt if dt.tzinfo is not None else dt.replace(tzinfo=timezone.utc)
+
+    with LogIndex(args.db) as index:
+        matches = index.search(
+            query=' '.join(args.terms) or None,
+            regex=args.regex,
+            display_name=args.node,
+            template_name=args.template,
+            status=args.status,
+            since=parse_date(args.since),
+            until=parse_date(args.until),
+            limit=args.limit
+        )
+
+    for match in matches:
+        print(match)
+        for line in match.lines[:args.lines]:
+            print(f"  {line}")
+
+def export(args):
+    client = _get_client(args)
+
+    if args.trace is not None:
+        from utils.trace import write_chrome_trace
+
+        count = write_chrome_trace(_get_run_data(args, client), args.trace)
+        print(f">>> Wrote {count} trace events to {args.trace}")
+        return
+
+    from utils.dump import dump_manifests
+
+    dump_manifests(args.name or args.run_id, client.get_run(args.run_id))
+
+def compare_runs(args):
+    import json
+
+    from utils.run_data import RunData
+    from utils.compare import compare
+
+    client = _get_client(args)
+    run_a, run_b = (RunData.from_run_detail(client.get_run(run_id)) for run_id in (args.run_a, args.run_b))
+
+    comparison = compare(run_a, run_b)
+    comparison.display(top=args.top)
+
+    if args.json is not None:
+        with open(args.json, 'w') as f:
+            json.dump(comparison.to_dict(), f, indent=2)
+
+def analyze(args):
+    import time
+
+    from utils.batch import analyze_dumps, write_csv
+
+    start = time.perf_counter()
+    columns = analyze_dumps(args.path, max_workers=args.workers, batch_size=args.batch_size)
+    print(f">>> {len(set(columns['run_id']))} runs, {len(columns['node_id'])} nodes in {time.perf_counter() - start:.2f}s")
+
+    if args.csv is not None:
+        write_csv(columns, args.csv)
+
+def render(args):
+    from utils.dump import dump_graphviz
+
+    client = _get_client(args)
+    dump_graphviz(client.get_run(args.run_id).pipeline_runtime, view=args.view)
+
+def bench(args):
+    import runpy
+
+    sys.argv = ['bench.py'] + args.bench_args
+    runpy.run_path(
+        os.path.join(REPO_ROOT, 'manifests', 'seaweedfs_host_path', 'scripts', 'bench.py'),
+        run_name='__main__'
+    )
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='kfp-scripts', description="A collection of kfp scripts for fiddling and poking")
+    parser.add_argument('--host', default=None, help="KFP API host, by default the KFP client's own discovery is used")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    p = subparsers.add_parser('watch', help="Poll a run and display its nodes until it finishes")
+    p.add_argument('run_id')
+    p.add_argument('--interval', type=float, default=0.1)
+    p.add_argument('--fps', type=float, default=4.0, help="Maximum redraws per second")
+    p.add_argument('--expand', action='store_true', help="Start with ParallelFor iterations expanded, 'e' toggles")
+    p.add_argument('--plain', action='store_true', help="Print every node on every poll instead of the live view")
+    p.set_defaults(handler=watch)
+
+    p = subparsers.add_parser('inspect', help="Display a run, or the details of its nodes with a given display name")
+    p.add_argument('run_id')
+    p.add_argument('--node', default=None, help="Display name of nodes to inspect")
+    p.add_argument('--outputs', action='store_true', help="Also pull the outputs of the node(s)")
+    p.set_defaults(handler=inspect_run)
+
+    p = subparsers.add_parser('logs', help="Print the logs of nodes with a given display name")
+    p.add_argument('run_id')
+    p.add_argument('node', help="Display name of nodes to pull logs for")
+    p.set_defaults(handler=logs)
+
+    p = subparsers.add_parser('index-logs', help="Pull and index the logs of finished nodes for search-logs")
+    p.add_argument('run_ids', nargs='+')
+    p.add_argument('--db', default='logs.db', help="SQLite file of the index")
+    p.add_argument('--workers', type=int, default=16)
+    p.add_argument('--rate', type=float, default=20.0, help="Maximum API requests per second")
+    p.set_defaults(handler=index_logs)
+
+    p = subparsers.add_parser('search-logs', help="Search logs indexed with index-logs")
+    p.add_argument('terms', nargs='*', help="Terms which must all appear in the logs")
+    p.add_argument('--db', default='logs.db', help="SQLite file of the index")
+    p.add_argument('--regex', default=None, help="Regular expression matched against each log line")
+    p.add_argument('--node', default=None, help="Display name of nodes")
+    p.add_argument('--template', default=None, help="Template name of nodes")
+    p.add_argument('--status', default=None, help="e.g. Failed")
+    p.add_argument('--since', default=None, help="ISO date, nodes finished at or after")
+    p.add_argument('--until', default=None, help="ISO date, nodes finished before")
+    p.add_argument('--limit', type=int, default=50)
+    p.add_argument('--lines', type=int, default=5, help="Matching lines to print per node")
+    p.set_defaults(handler=search_logs)
+
+    p = subparsers.add_parser('export', help="Dump the workflow manifests of a run to JSON")
+    p.add_argument('run_id')
+    p.add_argument('--name', default=None, help="Prefix of the written files, defaults to the run ID")
+    p.add_argument('--trace', default=None, metavar='PATH', help="Instead write the run's timeline as Chrome trace JSON (for Perfetto) to PATH")
+    p.set_defaults(handler=export)
+
+    p = subparsers.add_parser('compare', help="Explain where the time went differently between two runs of the same pipeline")
+    p.add_argument('run_a')
+    p.add_argument('run_b')
+    p.add_argument('--top', type=int, default=20, help="Rows per table")
+    p.add_argument('--json', default=None, metavar='PATH', help="Also write the full diff as JSON to PATH")
+    p.set_defaults(handler=compare_runs)
+
+    p = subparsers.add_parser('analyze', help="Timing records of every pod across a directory or archive of dumped manifests")
+    p.add_argument('path', help="Directory, .tar(.gz) / .tgz / .zip archive, or a single dump")
+    p.add_argument('--workers', type=int, default=None, help="Worker processes, defaults to the number of CPUs")
+    p.add_argument('--batch-size', type=int, default=32, help="Manifests parsed per task")
+    p.add_argument('--csv', default=None, metavar='PATH', help="Write the records to PATH")
+    p.set_defaults(handler=analyze)
+
+    p = subparsers.add_parser('render', help="Render the runtime DAG of a run with graphviz")
+    p.add_argument('run_id')
+    p.add_argument('--view', action='store_true')
+    p.set_defaults(handler=render)
+
+    p = subparsers.add_parser('bench', help="Object store throughput benchmark, arguments are passed through to bench.py", add_help=False)
+    p.add_argument('bench_args', nargs=argparse.REMAINDER)
+    p.set_defaults(handler=bench)
+
+    return parser
+
+def main(argv: Optional[List[str]] = None):
+    # Allow `from utils... import` / `from samples... import` regardless of the working directory
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+
+    args = build_parser().parse_args(argv)
+    args.handler(args)
+
+if __name__ == '__main__':
+    main()
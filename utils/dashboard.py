@@ -0,0 +1,357 @@
+"""
+Live terminal view of a run, an alternative to printing `display()` on every poll.
+
+- Only rows whose text changed are rewritten (ANSI cursor addressing), an unchanged run costs nothing to draw.
+- Iterations of a `ParallelFor` are grouped into one row with counts by phase. Groups can be expanded (`e` toggles all, failed iterations are always listed).
+- Snapshots are taken in as often as they are polled, but the screen is redrawn at most `max_fps` times per second.
+- Node details (timestamps, display names) are only parsed again when the node's phase changed.
+
+Works with snapshots from `utils.run_data.RunData`, and `RunData` / `ArgoRunData` from `v2/utils/run_data.py`. When output is not a terminal, changed rows are printed as plain lines instead.
+
+```python
+watch(lambda: RunData.from_run_detail(client.get_run(run_id)), poll_interval=0.1, max_fps=4)
+```
+"""
+from __future__ import annotations
+
+import os
+import sys
+import time
+import shutil
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, TextIO
+
+from utils.events import PHASE_MAP, PENDING, RUNNING, SUCCEEDED, FAILED, SKIPPED, TERMINAL_PHASES, snapshot_accessors
+from utils.workflow_dag import LOOP_INDEX_PATTERN, normalize_node_name
+
+PHASE_ORDER = (FAILED, RUNNING, PENDING, SUCCEEDED, SKIPPED)
+PHASE_SYMBOLS = {
+    PENDING: '.',
+    RUNNING: '>',
+    SUCCEEDED: '+',
+    FAILED: 'x',
+    SKIPPED: '-',
+}
+
+CLEAR_LINE = '\x1b[K'
+ALT_SCREEN_ON = '\x1b[?1049h\x1b[?25l'
+ALT_SCREEN_OFF = '\x1b[?25h\x1b[?1049l'
+
+@dataclass
+class NodeState:
+    node_id: str
+    label: str
+    display_name: str
+    group: str
+    raw_phase: str
+    phase: str
+    started_at: Optional[float]
+    finished_at: Optional[float]
+
+def _format_seconds(seconds: float) -> str:
+    seconds = int(max(seconds, 0))
+    return f"{seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+def _elapsed(started_at: Optional[float], finished_at: Optional[float], now: float) -> str:
+    if started_at is None:
+        return ''
+
+    return _format_seconds((finished_at or now) - started_at)
+
+def _timestamp(dt) -> Optional[float]:
+    return None if dt is None else dt.timestamp()
+
+def _workflow_name(snapshot) -> str:
+    if hasattr(snapshot, 'workflow_manifest'):
+        return snapshot.workflow_manifest['metadata'].get('name', '')
+    if hasattr(snapshot, 'workflow_data'):
+        return snapshot.workflow_data['metadata'].get('name', '')
+
+    return ''
+
+def _argo_name(node) -> Optional[str]:
+    # v1 `NodeData` and `ArgoNodeData`, KFP v2 tasks have no Argo node name
+    if hasattr(node, 'node'):
+        return node.node['name']
+    if hasattr(node, 'data'):
+        return node.name
+
+    return None
+
+def _is_pod(node) -> bool:
+    # NOTE: v1 `RunData` only keeps pods already, `ArgoRunData` keeps every node
+    return not hasattr(node, 'data') or node.data.get('type') == 'Pod'
+
+class Dashboard:
+    """
+    Args:
+        out (TextIO): Where to draw, defaults to stdout.
+        max_fps (float): Maximum redraws per second.
+        expanded (bool): Start with every `ParallelFor` group expanded.
+        title (Optional[str]): Shown in the header, defaults to the run's name when known.
+    """
+    def __init__(
+        self,
+        out: Optional[TextIO] = None,
+        max_fps: float = 4.0,
+        expanded: bool = False,
+        title: Optional[str] = None
+    ):
+        assert max_fps > 0
+
+        self.out = out or sys.stdout
+        self.interactive = self.out.isatty()
+        self.min_interval = 1.0 / max_fps
+        self.expanded = expanded
+        self.title = title
+
+        self.nodes: Dict[str, NodeState] = {}
+        # Group key -> node IDs, in the order groups were first seen so rows stay in place
+        self.groups: Dict[str, List[str]] = {}
+        self.run_phase: Optional[str] = None
+        self.run_started_at: Optional[float] = None
+        self.run_finished_at: Optional[float] = None
+
+        self._lines: List[str] = []
+        self._last_draw = 0.0
+
+    def __enter__(self) -> Dashboard:
+        if self.interactive:
+            self.out.write(ALT_SCREEN_ON)
+            self.out.flush()
+        return self
+
+    def __exit__(self, *exc):
+        if self.interactive:
+            self.out.write(ALT_SCREEN_OFF)
+            # NOTE: The alternate screen is gone once we leave, leave the final state in the scrollback
+            self.out.write('\n'.join(self._lines) + '\n')
+            self.out.flush()
+
+    def toggle(self):
+        self.expanded = not self.expanded
+
+    def update(self, snapshot):
+        """
+        Take in a snapshot, only nodes whose phase changed since the previous one are parsed.
+        """
+        nodes_fn, details_fn, run_phase = snapshot_accessors(snapshot)
+        workflow_name = _workflow_name(snapshot)
+
+        self.run_phase = run_phase
+        if self.title is None:
+            self.title = getattr(snapshot, 'run_name', None) or workflow_name or 'run'
+        if self.run_started_at is None:
+            self.run_started_at = _timestamp(getattr(snapshot, 'started_at', None) or getattr(snapshot, 'created_at', None))
+        if self.run_finished_at is None and PHASE_MAP.get(run_phase) in TERMINAL_PHASES:
+            self.run_finished_at = _timestamp(snapshot.finished_at)
+
+        new_nodes = []
+        for node_id, raw_phase, node in nodes_fn(snapshot):
+            state = self.nodes.get(node_id)
+            if state is not None and state.raw_phase == raw_phase:
+                continue
+            if not _is_pod(node):
+                continue
+
+            details = details_fn(node)
+            if state is None:
+                label = display_name = details['display_name']
+                group = display_name
+                argo_name = _argo_name(node)
+                if argo_name is not None:
+                    key = normalize_node_name(argo_name, workflow_name)
+                    indices = LOOP_INDEX_PATTERN.findall(key)
+                    group = LOOP_INDEX_PATTERN.sub('(*)', key)
+                    label = display_name + ''.join(f"[{i}]" for i in indices)
+
+                state = self.nodes[node_id] = NodeState(
+                    node_id=node_id,
+                    label=label,
+                    display_name=display_name,
+                    group=group,
+                    raw_phase=raw_phase,
+                    phase=PENDING,
+                    started_at=None,
+                    finished_at=None,
+                )
+                new_nodes.append(state)
+
+            state.raw_phase = raw_phase
+            state.phase = PHASE_MAP.get(raw_phase, PENDING)
+            state.started_at = _timestamp(details['started_at'])
+            state.finished_at = _timestamp(details['finished_at'])
+
+        # New groups are placed by start time, existing groups never move
+        new_nodes.sort(key=lambda s: (s.started_at is None, s.started_at or 0.0, s.label))
+        for state in new_nodes:
+            self.groups.setdefault(state.group, []).append(state.node_id)
+
+    @property
+    def finished(self) -> bool:
+        return PHASE_MAP.get(self.run_phase) in TERMINAL_PHASES
+
+    def _counts(self, node_ids: List[str]) -> Dict[str, int]:
+        counts = {}
+        for node_id in node_ids:
+            phase = self.nodes[node_id].phase
+            counts[phase] = counts.get(phase, 0) + 1
+
+        return counts
+
+    def _node_line(self, state: NodeState, now: float, indent: str) -> str:
+        # NOTE: Columns line up with group rows whatever the indent
+        width = 50 - len(indent)
+        return f"{indent}{PHASE_SYMBOLS[state.phase]} {state.label:<{width}} {state.raw_phase:<20} {_elapsed(state.started_at, state.finished_at, now):>9}"
+
+    def lines(self, now: Optional[float] = None) -> List[str]:
+        now = now if now is not None else time.time()
+
+        counts = self._counts(list(self.nodes))
+        summary = '  '.join(f"{PHASE_SYMBOLS[p]} {p.lower()} {counts[p]}" for p in PHASE_ORDER if counts.get(p))
+        lines = [
+            f"{self.title}  {self.run_phase or PENDING}  {_elapsed(self.run_started_at, self.run_finished_at, now)}",
+            f"{len(self.nodes)} nodes  {summary}",
+            '',
+        ]
+
+        for group, node_ids in self.groups.items():
+            if len(node_ids) == 1:
+                lines.append(self._node_line(self.nodes[node_ids[0]], now, '  '))
+                continue
+
+            members = [self.nodes[i] for i in node_ids]
+            group_counts = self._counts(node_ids)
+            detail = ' '.join(f"{PHASE_SYMBOLS[p]}{group_counts[p]}" for p in PHASE_ORDER if group_counts.get(p))
+            starts = [s.started_at for s in members if s.started_at is not None]
+            if all(s.phase in TERMINAL_PHASES for s in members):
+                finished_at = max((s.finished_at for s in members if s.finished_at is not None), default=None)
+            else:
+                finished_at = None
+            elapsed = _elapsed(min(starts), finished_at, now) if starts else ''
+
+            marker = 'v' if self.expanded else '>'
+            label = f"{members[0].display_name} x{len(members)}"
+            lines.append(f"  {marker} {label:<48} {detail:<20} {elapsed:>9}")
+
+            for state in members:
+                if self.expanded or state.phase == FAILED:
+                    lines.append(self._node_line(state, now, '      '))
+
+        return lines
+
+    def render(self, force: bool = False) -> bool:
+        """
+        Redraw the rows which changed, unless the last redraw was less than `1 / max_fps` ago.
+
+        Returns:
+            bool: Whether anything was drawn.
+        """
+        now = time.monotonic()
+        if not force and now - self._last_draw < self.min_interval:
+            return False
+        self._last_draw = now
+
+        lines = self.lines()
+        if self.interactive:
+            width, height = shutil.get_terminal_size()
+            if len(lines) > height:
+                hidden = len(lines) - height + 1
+                lines = lines[:height - 1] + [f"... {hidden} more rows"]
+            lines = [line[:width] for line in lines]
+
+        if lines == self._lines:
+            return False
+
+        writes = []
+        for i, line in enumerate(lines):
+            if i < len(self._lines) and self._lines[i] == line:
+                continue
+            if self.interactive:
+                writes.append(f"\x1b[{i + 1};1H{line}{CLEAR_LINE}")
+            else:
+                writes.append(line + '\n')
+        if self.interactive and len(lines) < len(self._lines):
+            # Clear what is left of a longer previous frame
+            writes.extend(f"\x1b[{i + 1};1H{CLEAR_LINE}" for i in range(len(lines), len(self._lines)))
+
+        self.out.write(''.join(writes))
+        self.out.flush()
+        self._lines = lines
+
+        return True
+
+class _Keys:
+    """
+    Non-blocking single key presses from a terminal, nothing when stdin is not one.
+    """
+    def __enter__(self) -> _Keys:
+        self._settings = None
+        if sys.stdin.isatty() and os.name == 'posix':
+            import tty
+            import termios
+
+            self._settings = termios.tcgetattr(sys.stdin)
+            tty.setcbreak(sys.stdin.fileno())
+        return self
+
+    def __exit__(self, *exc):
+        if self._settings is not None:
+            import termios
+
+            termios.tcsetattr(sys.stdin, termios.TCSADRAIN, self._settings)
+
+    def read(self) -> Optional[str]:
+        if self._settings is None:
+            return None
+
+        import select
+
+        if select.select([sys.stdin], [], [], 0)[0]:
+            return sys.stdin.read(1)
+        return None
+
+def watch(
+    fetch: Callable,
+    poll_interval: float = 0.1,
+    max_fps: float = 4.0,
+    expanded: bool = False,
+    out: Optional[TextIO] = None
+) -> Dashboard:
+    """
+    Poll `fetch` for snapshots and draw them until the run finishes (or `q` is pressed).
+
+    Args:
+        fetch (Callable): Returns the latest snapshot of the run.
+        poll_interval (float): Seconds between polls.
+        max_fps (float): Maximum redraws per second, independent of `poll_interval`.
+        expanded (bool): Start with every `ParallelFor` group expanded, `e` toggles.
+    """
+    with Dashboard(out=out, max_fps=max_fps, expanded=expanded) as dashboard, _Keys() as keys:
+        while True:
+            dashboard.update(fetch())
+            if dashboard.finished:
+                dashboard.render(force=True)
+                break
+
+            key = keys.read()
+            if key == 'q':
+                break
+            if key == 'e':
+                dashboard.toggle()
+                dashboard.render(force=True)
+
+            dashboard.render()
+            time.sleep(poll_interval)
+
+    return dashboard
+
+if __name__ == '__main__':
+    from kfp import Client
+
+    from utils.run_data import RunData
+    from samples.pipelines import complex_timed
+
+    client = Client()
+    result = client.create_run_from_pipeline_func(complex_timed, arguments={"base_time": 3})
+    watch(lambda: RunData.from_run_detail(client.get_run(result.run_id)))
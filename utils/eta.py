@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import random
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from utils.history import DurationHistory
+from utils.run_data import RunData, parse_datetime, utc_now
+from utils.stats import percentile
+from utils.workflow_dag import Scheduler, WorkflowDag
+
+RUNNING_PHASES = ('Pending', 'Running')
+FINISHED_PHASES = ('Succeeded', 'Failed', 'Error', 'Skipped', 'Omitted')
+
+@dataclass
+class Estimate:
+    estimated_at: datetime
+    finish_at: datetime
+    finish_low: datetime
+    finish_high: datetime
+
+    @property
+    def remaining(self) -> timedelta:
+        return max(self.finish_at - utc_now(), timedelta(0))
+
+    @property
+    def interval(self) -> tuple:
+        now = utc_now()
+        return (
+            max(self.finish_low - now, timedelta(0)),
+            max(self.finish_high - now, timedelta(0)),
+        )
+
+    def __str__(self) -> str:
+        low, high = self.interval
+        return f"ETA(remaining={self.remaining}, interval=({low}, {high}), finish_at={self.finish_at})"
+
+class ETAEstimator:
+    """
+    Predicts when an in flight run will finish by replaying the rest of its DAG under the workflow's parallelism limits, with pod durations drawn from historical runs (Monte Carlo).
+
+    The DAG is expanded and the scheduler prepared once. Each `update` still walks the snapshot's nodes, but nodes already seen finished are skipped before any lookup and only phase changes update the state. The simulation is only repeated when something changed, otherwise the previous estimate (absolute finish times) still holds, and at most once every `min_interval` seconds, so a large run with pods finishing every second does not rerun the Monte Carlo on every poll.
+
+    Args:
+        workflow_manifest (dict): Workflow manifest of the run, used for the DAG structure.
+        history (DurationHistory): Durations of previous runs.
+        trials (int): Number of Monte Carlo trials per estimate.
+        confidence (float): Width of the reported interval, e.g. `0.9` for the 5th to 95th percentile.
+        default_duration (float): Seconds assumed for pods without any history.
+        parallelism (Optional[int]): Overrides the workflow's global parallelism.
+        min_interval (float): Minimum seconds between two simulations, changes in between are folded into the next one.
+    """
+    def __init__(
+        self,
+        workflow_manifest: dict,
+        history: DurationHistory,
+        trials: int = 200,
+        confidence: float = 0.9,
+        default_duration: float = 60.0,
+        parallelism: Optional[int] = None,
+        min_interval: float = 5.0,
+        seed: Optional[int] = None
+    ):
+        self.history = history
+        self.trials = trials
+        self.confidence = confidence
+        self.default_duration = default_duration
+        self.min_interval = min_interval
+        self.rng = random.Random(seed)
+
+        self.dag = WorkflowDag(workflow_manifest)
+        self.scheduler = Scheduler(self.dag, parallelism=parallelism)
+
+        self._node_index: Dict[str, Optional[int]] = {}
+        # Argo node IDs which reached a finished phase, their phase no longer changes
+        self._finished_ids: set = set()
+        self._phases: Dict[int, str] = {}
+        self._completed: set = set()
+        self._running: Dict[int, datetime] = {}
+        # Durations of pods finished in this run, preferred over history for their siblings
+        self._current = DurationHistory()
+        self._estimate: Optional[Estimate] = None
+        self._dirty = False
+
+    def _index(self, node_name: str) -> Optional[int]:
+        if node_name not in self._node_index:
+            task = self.dag.find(node_name)
+            self._node_index[node_name] = None if task is None else task.index
+
+        return self._node_index[node_name]
+
+    def _observe(self, run: RunData) -> bool:
+        changed = False
+        for node_id, node in run.workflow_manifest['status'].get('nodes', {}).items():
+            if node_id in self._finished_ids:
+                continue
+
+            i = self._index(node['name'])
+            if i is None or self._phases.get(i) == node['phase']:
+                continue
+
+            changed = True
+            phase = self._phases[i] = node['phase']
+            if phase in FINISHED_PHASES:
+                self._finished_ids.add(node_id)
+                self._completed.add(i)
+                self._running.pop(i, None)
+
+                task = self.dag.nodes[i]
+                if task.kind == 'Pod' and phase == 'Succeeded' and node.get('finishedAt'):
+                    seconds = (parse_datetime(node['finishedAt']) - parse_datetime(node['startedAt'])).total_seconds()
+                    self._current.add(task.template_name, None, seconds)
+            elif phase in RUNNING_PHASES and self.dag.nodes[i].kind == 'Pod' and node.get('startedAt'):
+                self._running[i] = parse_datetime(node['startedAt'])
+
+        return changed
+
+    def _sample(self, template_name: str) -> float:
+        samples = self._current.samples(template_name) or self.history.samples(template_name)
+        if not samples:
+            return self.default_duration
+
+        return self.rng.choice(samples)
+
+    def _sample_remaining(self, template_name: str, elapsed: float) -> float:
+        samples = self._current.samples(template_name) or self.history.samples(template_name)
+        # Condition on the pod having already run for `elapsed`
+        longer = [s - elapsed for s in samples if s > elapsed]
+        if longer:
+            return self.rng.choice(longer)
+
+        # NOTE: Already running longer than anything seen before, assume it is about to finish
+        return 0.0 if samples else max(self.default_duration - elapsed, 0.0)
+
+    def _simulate(self, now: datetime) -> Estimate:
+        pods = [n for n in self.dag.nodes if n.kind == 'Pod']
+        elapsed = {
+            i: (now - started_at).total_seconds()
+            for i, started_at in self._running.items()
+        }
+
+        makespans = []
+        durations = [0.0] * len(self.dag.nodes)
+        for _ in range(self.trials):
+            for pod in pods:
+                durations[pod.index] = self._sample(pod.template_name)
+            running = {
+                i: self._sample_remaining(self.dag.nodes[i].template_name, e)
+                for i, e in elapsed.items()
+            }
+            makespans.append(self.scheduler.makespan(
+                durations,
+                completed=self._completed,
+                running=running
+            ))
+
+        tail = (1 - self.confidence) / 2 * 100
+        return Estimate(
+            estimated_at=now,
+            finish_at=now + timedelta(seconds=percentile(makespans, 50)),
+            finish_low=now + timedelta(seconds=percentile(makespans, tail)),
+            finish_high=now + timedelta(seconds=percentile(makespans, 100 - tail)),
+        )
+
+    def update(self, run: RunData) -> Estimate:
+        """
+        Update the estimate from the latest snapshot of the run.
+        """
+        self._dirty = self._observe(run) or self._dirty
+
+        now = utc_now()
+        if self._estimate is None or (
+            self._dirty and (now - self._estimate.estimated_at).total_seconds() >= self.min_interval
+        ):
+            self._estimate = self._simulate(now)
+            self._dirty = False
+
+        return self._estimate
+
+if __name__ == '__main__':
+    import time
+
+    from kfp import Client
+
+    from samples.pipelines import complex_timed
+
+    client = Client()
+
+    print("Creating runs for history...")
+    history = DurationHistory()
+    for _ in range(2):
+        result = client.create_run_from_pipeline_func(complex_timed, arguments={"base_time": 3})
+        history.add_run(RunData.from_run_detail(result.wait_for_run_completion(600)))
+
+    result = client.create_run_from_pipeline_func(complex_timed, arguments={"base_time": 3})
+    estimator = None
+    while True:
+        data = RunData.from_run_detail(client.get_run(result.run_id), client=client)
+        if estimator is None and 'nodes' in data.workflow_manifest['status']:
+            estimator = ETAEstimator(data.workflow_manifest, history)
+
+        if estimator is not None:
+            print(data, estimator.update(data))
+
+        if data.status in ('Succeeded', 'Failed'):
+            break
+
+        time.sleep(1)
@@ -0,0 +1,240 @@
+"""
+Typed node state transition events from successive snapshots of a run.
+
+Works with snapshots from `utils.run_data.RunData`, and `RunData` / `ArgoRunData` from `v2/utils/run_data.py`. Snapshots are compared by node ID, unchanged nodes cost a dictionary lookup and events are only built for nodes whose phase changed.
+"""
+from __future__ import annotations
+
+import asyncio
+import inspect
+from dataclasses import dataclass
+from datetime import datetime
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
+
+from utils.timestamps import parse_datetime, utc_now
+
+NODE_CREATED = 'node-created'
+NODE_STARTED = 'node-started'
+NODE_SUCCEEDED = 'node-succeeded'
+NODE_FAILED = 'node-failed'
+NODE_SKIPPED = 'node-skipped'
+RUN_FINISHED = 'run-finished'
+
+# Normalized phases
+PENDING = 'Pending'
+RUNNING = 'Running'
+SUCCEEDED = 'Succeeded'
+FAILED = 'Failed'
+SKIPPED = 'Skipped'
+
+PHASE_MAP = {
+    # Argo (v1 RunData and ArgoRunData)
+    'Pending': PENDING,
+    'Running': RUNNING,
+    'Succeeded': SUCCEEDED,
+    'Failed': FAILED,
+    'Error': FAILED,
+    'Skipped': SKIPPED,
+    'Omitted': SKIPPED,
+    # KFP v2 runtime states
+    'RUNTIME_STATE_UNSPECIFIED': PENDING,
+    'PENDING': PENDING,
+    'RUNNING': RUNNING,
+    'SUCCEEDED': SUCCEEDED,
+    'CACHED': SUCCEEDED,
+    'FAILED': FAILED,
+    'CANCELING': RUNNING,
+    'CANCELED': FAILED,
+    'SKIPPED': SKIPPED,
+}
+
+TERMINAL_PHASES = (SUCCEEDED, FAILED, SKIPPED)
+
+TERMINAL_EVENTS = {
+    SUCCEEDED: NODE_SUCCEEDED,
+    FAILED: NODE_FAILED,
+    SKIPPED: NODE_SKIPPED,
+}
+
+@dataclass
+class Event:
+    kind: str
+    timestamp: datetime
+    node_id: Optional[str] = None
+    display_name: Optional[str] = None
+    template_name: Optional[str] = None
+    phase: Optional[str] = None
+    previous_phase: Optional[str] = None
+    raw_phase: Optional[str] = None
+
+    def __str__(self) -> str:
+        if self.kind == RUN_FINISHED:
+            return f"Event(kind={self.kind}, phase={self.phase}, timestamp={self.timestamp})"
+
+        return f"Event(kind={self.kind}, name={self.display_name}, node={self.node_id}, timestamp={self.timestamp})"
+
+# Per source accessors, each yields (node ID, raw phase, node) and builds the rest of the event lazily
+
+def _v1_nodes(snapshot) -> Iterator[Tuple[str, str, object]]:
+    for node in snapshot.nodes.values():
+        yield node.node_id, node.node['phase'], node
+
+def _v1_details(node) -> dict:
+    return {
+        'display_name': node.display_name,
+        'template_name': node.template_name,
+        'created_at': parse_datetime(node.node.get('startedAt')),
+        'started_at': parse_datetime(node.node.get('startedAt')),
+        'finished_at': parse_datetime(node.node.get('finishedAt')),
+    }
+
+def _argo_nodes(snapshot) -> Iterator[Tuple[str, str, object]]:
+    for node in snapshot.nodes:
+        yield node.data.get('id', node.name), node.data['phase'], node
+
+def _argo_details(node) -> dict:
+    return {
+        'display_name': node.data['displayName'],
+        'template_name': node.data.get('templateName'),
+        'created_at': parse_datetime(node.data.get('startedAt')),
+        'started_at': parse_datetime(node.data.get('startedAt')),
+        'finished_at': parse_datetime(node.data.get('finishedAt')),
+    }
+
+def _v2_nodes(snapshot) -> Iterator[Tuple[str, str, object]]:
+    for node in snapshot.nodes:
+        yield node.task.task_id, node.state, node
+
+def _v2_details(node) -> dict:
+    return {
+        'display_name': node.display_name,
+        'template_name': None,
+        'created_at': node.create_time,
+        'started_at': node.start_time,
+        'finished_at': node.end_time,
+    }
+
+def snapshot_accessors(snapshot):
+    """
+    Accessors for the nodes of a snapshot: `utils.run_data.RunData`, or `RunData` / `ArgoRunData` from `v2/utils/run_data.py`.
+
+    Returns:
+        tuple: `nodes(snapshot)` yielding (node ID, raw phase, node), `details(node)` returning a dict of `display_name`, `template_name`, `created_at`, `started_at` and `finished_at`, and the run's raw phase.
+    """
+    if hasattr(snapshot, 'workflow_manifest'):
+        return _v1_nodes, _v1_details, snapshot.status
+    if hasattr(snapshot, 'workflow_data'):
+        return _argo_nodes, _argo_details, snapshot.workflow_data['status'].get('phase')
+    if hasattr(snapshot, 'run'):
+        return _v2_nodes, _v2_details, snapshot.state
+
+    raise TypeError(f"Unsupported snapshot type: {type(snapshot)}")
+
+class EventStream:
+    """
+    Turns successive snapshots of a single run into events, delivered to subscribed callbacks and returned from `update`.
+
+    If a node moved through several phases between two snapshots, all of the intermediate events are emitted in order (e.g. a node first seen as succeeded produces created, started and succeeded).
+    """
+    def __init__(self):
+        self._phases: Dict[str, str] = {}
+        self._callbacks: List[Callable[[Event], None]] = []
+        self.finished = False
+
+    def subscribe(self, callback: Callable[[Event], None]):
+        self._callbacks.append(callback)
+
+    def _transitions(self, node_id: str, raw_phase: str, node, details_fn) -> List[Event]:
+        previous = self._phases.get(node_id)
+        phase = PHASE_MAP.get(raw_phase, PENDING)
+        details = details_fn(node)
+        now = utc_now()
+
+        kinds = []
+        if previous is None:
+            kinds.append((NODE_CREATED, details['created_at']))
+        if phase in (RUNNING, SUCCEEDED, FAILED) and previous in (None, PENDING):
+            kinds.append((NODE_STARTED, details['started_at']))
+        if phase in TERMINAL_PHASES and previous not in TERMINAL_PHASES:
+            kinds.append((TERMINAL_EVENTS[phase], details['finished_at']))
+
+        self._phases[node_id] = phase
+        return [
+            Event(
+                kind=kind,
+                timestamp=timestamp or now,
+                node_id=node_id,
+                display_name=details['display_name'],
+                template_name=details['template_name'],
+                phase=phase,
+                previous_phase=previous,
+                raw_phase=raw_phase
+            )
+            for kind, timestamp in kinds
+        ]
+
+    def update(self, snapshot) -> List[Event]:
+        """
+        Compare a snapshot against the previous one and emit the resulting events.
+        """
+        nodes_fn, details_fn, run_phase = snapshot_accessors(snapshot)
+
+        events = []
+        for node_id, raw_phase, node in nodes_fn(snapshot):
+            previous = self._phases.get(node_id)
+            if previous is not None and previous == PHASE_MAP.get(raw_phase, PENDING):
+                continue
+
+            events.extend(self._transitions(node_id, raw_phase, node, details_fn))
+
+        if not self.finished and PHASE_MAP.get(run_phase) in TERMINAL_PHASES:
+            self.finished = True
+            events.append(Event(
+                kind=RUN_FINISHED,
+                timestamp=snapshot.finished_at or utc_now(),
+                phase=PHASE_MAP[run_phase],
+                raw_phase=run_phase
+            ))
+
+        for event in events:
+            for callback in self._callbacks:
+                callback(event)
+
+        return events
+
+    async def stream(self, fetch: Callable, interval: float = 1.0) -> AsyncIterator[Event]:
+        """
+        Poll `fetch` for snapshots and yield events until the run finishes.
+
+        Args:
+            fetch (Callable): Returns the latest snapshot, either a coroutine function or a blocking function (which is run in a thread).
+            interval (float): Seconds to wait between polls.
+        """
+        while not self.finished:
+            if inspect.iscoroutinefunction(fetch):
+                snapshot = await fetch()
+            else:
+                snapshot = await asyncio.to_thread(fetch)
+
+            for event in self.update(snapshot):
+                yield event
+
+            if not self.finished:
+                await asyncio.sleep(interval)
+
+if __name__ == '__main__':
+    from kfp import Client
+
+    from utils.run_data import RunData
+    from samples.pipelines import errors
+
+    client = Client()
+    result = client.create_run_from_pipeline_func(errors, arguments={})
+
+    async def main():
+        events = EventStream()
+        fetch = lambda: RunData.from_run_detail(client.get_run(result.run_id), client=client)
+        async for event in events.stream(fetch, interval=0.5):
+            print(event)
+
+    asyncio.run(main())
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import random
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional
+
+class DurationHistory:
+    """
+    Historical pod durations (in seconds) keyed by template name and by display name.
+
+    Template names (e.g. `timed-sleep-2`) are stable between runs of the same compiled pipeline, display names are used as a fallback for nodes whose template has no history.
+    """
+    def __init__(self):
+        self.by_template: Dict[str, List[float]] = defaultdict(list)
+        self.by_display_name: Dict[str, List[float]] = defaultdict(list)
+
+    @classmethod
+    def from_runs(cls, runs: Iterable['RunData']) -> DurationHistory:
+        history = cls()
+        for run in runs:
+            history.add_run(run)
+
+        return history
+
+    def add(self, template_name: str, display_name: Optional[str], seconds: float):
+        self.by_template[template_name].append(seconds)
+        if display_name is not None:
+            self.by_display_name[display_name].append(seconds)
+
+    def add_run(self, run: 'RunData'):
+        """
+        Add the durations of all succeeded pods of a `utils.run_data.RunData`.
+        """
+        for node in run.nodes.values():
+            if not node.succeeded or node.finished_at is None:
+                continue
+
+            self.add(node.template_name, node.display_name, node.duration.total_seconds())
+
+    def samples(self, template_name: str, display_name: Optional[str] = None) -> List[float]:
+        samples = self.by_template.get(template_name)
+        if not samples and display_name is not None:
+            samples = self.by_display_name.get(display_name)
+
+        return samples or []
+
+    def sample(self, template_name: str, display_name: Optional[str] = None, default: float = 0.0, rng: random.Random = random) -> float:
+        samples = self.samples(template_name, display_name)
+        if not samples:
+            return default
+
+        return rng.choice(samples)
@@ -0,0 +1,494 @@
+"""
+Open loop load generator for the KFP API server and Argo controller.
+
+Runs are submitted on a fixed schedule (a constant arrival rate, or a ramp of increasing rates) whether or not earlier runs finished, with a bound on submissions in flight. A single monitor thread follows every run with paged `list_runs` calls, and fetches each run once more when it finishes for its exact workflow timings. Per stage of the ramp it reports:
+
+- submission latency: from the scheduled arrival until the API returned a run ID (includes waiting for a free submission slot),
+- queue to start: from run creation until the workflow started,
+- completion throughput: runs finished per minute against the offered rate, overall and as percentiles over windows of `throughput_window` seconds.
+
+The knee is the first stage which no longer keeps up, see `find_knee`. `FakeControlPlane` stands in for the API so the analysis can be exercised locally.
+
+```python
+generator = LoadGenerator(client, [(single_no_op, {}, 1.0)])
+generator.run(ramp([(30, 120), (60, 120), (120, 120)]))
+generator.report().display()
+generator.cleanup()
+```
+"""
+from __future__ import annotations
+
+import json
+import heapq
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from utils.stats import percentiles
+from utils.throttle import RateLimiter
+from utils.timestamps import parse_timestamp
+
+TERMINAL_PHASES = ('Succeeded', 'Failed', 'Error', 'Skipped')
+
+# (pipeline function, arguments, weight)
+PipelineMix = Sequence[Tuple[Callable, dict, float]]
+# Arrival offsets in seconds and the stage index of each arrival
+Schedule = List[Tuple[float, int]]
+
+def ramp(stages: Sequence[Tuple[float, float]], poisson: bool = False, seed: Optional[int] = None) -> Tuple[Schedule, List[Tuple[float, float]]]:
+    """
+    Arrival schedule of consecutive stages.
+
+    Args:
+        stages (Sequence[Tuple[float, float]]): `(runs per minute, seconds)` for each stage.
+        poisson (bool): Exponential inter-arrival times instead of evenly spaced arrivals.
+
+    Returns:
+        Tuple[Schedule, List[Tuple[float, float]]]: Arrivals, and the stages.
+    """
+    rng = random.Random(seed)
+    schedule = []
+    start = 0.0
+    for stage, (rate, seconds) in enumerate(stages):
+        interval = 60.0 / rate
+        if poisson:
+            t = start + rng.expovariate(1 / interval)
+            while t < start + seconds:
+                schedule.append((t, stage))
+                t += rng.expovariate(1 / interval)
+        else:
+            schedule.extend((start + i * interval, stage) for i in range(int(seconds / interval)))
+        start += seconds
+
+    return schedule, list(stages)
+
+def constant(rate: float, seconds: float, **kwargs) -> Tuple[Schedule, List[Tuple[float, float]]]:
+    return ramp([(rate, seconds)], **kwargs)
+
+def _timestamp(value) -> Optional[float]:
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return parse_timestamp(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+
+    return value.timestamp()
+
+@dataclass
+class RunRecord:
+    stage: int
+    pipeline: str
+    scheduled_at: float
+    submitted_at: Optional[float] = None
+    run_id: Optional[str] = None
+    error: Optional[str] = None
+    created_at: Optional[float] = None
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    status: Optional[str] = None
+
+    @property
+    def submission_latency(self) -> Optional[float]:
+        if self.submitted_at is None:
+            return None
+
+        return self.submitted_at - self.scheduled_at
+
+    @property
+    def queue_to_start(self) -> Optional[float]:
+        if self.created_at is None or self.started_at is None:
+            return None
+
+        return max(self.started_at - self.created_at, 0.0)
+
+@dataclass
+class StageReport:
+    stage: int
+    offered_rate: float
+    submitted: int
+    failed_submissions: int
+    completed: int
+    # Runs per minute finished while the stage was running, offset by the baseline run latency
+    completion_rate: float
+    submission_latency: Dict[str, float] = field(default_factory=dict)
+    queue_to_start: Dict[str, float] = field(default_factory=dict)
+    # Percentiles of the runs per minute finished in each window of the stage
+    completion_throughput: Dict[str, float] = field(default_factory=dict)
+
+    def __str__(self) -> str:
+        def fmt(stats: Dict[str, float], unit: str = 's') -> str:
+            return ', '.join(f"{k}={v:.2f}{unit}" for k, v in stats.items()) or 'n/a'
+
+        return f"Stage(stage={self.stage}, offered={self.offered_rate:.1f}/min, completed={self.completion_rate:.1f}/min, throughput=[{fmt(self.completion_throughput, '/min')}], submitted={self.submitted}, errors={self.failed_submissions}, submission=[{fmt(self.submission_latency)}], queue_to_start=[{fmt(self.queue_to_start)}])"
+
+def find_knee(stages: Sequence[StageReport], throughput_ratio: float = 0.9, latency_factor: float = 2.0) -> Optional[StageReport]:
+    """
+    First stage where the completion rate falls below `throughput_ratio` of the offered rate, or the p95 queue to start latency exceeds `latency_factor` times that of the first stage.
+    """
+    baseline = stages[0].queue_to_start.get('p95') if stages else None
+    for stage in stages:
+        if stage.completion_rate < throughput_ratio * stage.offered_rate:
+            return stage
+
+        p95 = stage.queue_to_start.get('p95')
+        if baseline is not None and p95 is not None and p95 > latency_factor * max(baseline, 1.0):
+            return stage
+
+    return None
+
+@dataclass
+class LoadReport:
+    stages: List[StageReport]
+
+    @property
+    def knee(self) -> Optional[StageReport]:
+        return find_knee(self.stages)
+
+    def display(self):
+        for stage in self.stages:
+            print(stage)
+
+        knee = self.knee
+        if knee is None:
+            print("No knee, every stage kept up with the offered load")
+        else:
+            print(f"Knee at stage {knee.stage}: {knee.offered_rate:.1f} runs/min offered, {knee.completion_rate:.1f} runs/min completed")
+
+class LoadGenerator:
+    """
+    Args:
+        client (Client): KFP client (or `FakeControlPlane`), used by the monitor and for cleanup.
+        pipelines (PipelineMix): Pipelines to submit, picked at random by weight for each arrival.
+        submit (Optional[Callable[[Callable, dict], str]]): Submits a run and returns its ID. Defaults to a `utils.submit.PipelineSubmitter`, so packages are only compiled and uploaded once.
+        max_in_flight (int): Maximum concurrent submissions, later arrivals wait (which shows up in submission latency).
+        poll_interval (float): Seconds between monitor passes.
+        rate (float): Maximum monitor / cleanup API requests per second.
+        throughput_window (float): Seconds per window for the completion throughput percentiles.
+    """
+    def __init__(
+        self,
+        client,
+        pipelines: PipelineMix,
+        submit: Optional[Callable[[Callable, dict], str]] = None,
+        max_in_flight: int = 16,
+        poll_interval: float = 2.0,
+        rate: float = 20.0,
+        experiment_name: str = 'load-test',
+        seed: Optional[int] = None,
+        throughput_window: float = 10.0
+    ):
+        self.client = client
+        self.pipelines = pipelines
+        self.max_in_flight = max_in_flight
+        self.poll_interval = poll_interval
+        self.throughput_window = throughput_window
+        self.limiter = RateLimiter(rate)
+        self.rng = random.Random(seed)
+
+        if submit is None:
+            from utils.submit import PipelineSubmitter
+
+            submitter = PipelineSubmitter(client, experiment_name=experiment_name)
+            submit = lambda func, arguments: submitter.submit(func, arguments).run_id
+        self.submit = submit
+
+        self.records: List[RunRecord] = []
+        self.offered_rates: List[float] = []
+        self.stage_windows: List[Tuple[float, float]] = []
+        self._by_run_id: Dict[str, RunRecord] = {}
+        self._lock = threading.Lock()
+
+    def _submit(self, record: RunRecord, func: Callable, arguments: dict):
+        try:
+            run_id = self.submit(func, arguments)
+        except Exception as e:
+            record.error = str(e)
+            return
+
+        record.submitted_at = time.time()
+        record.run_id = run_id
+        with self._lock:
+            self._by_run_id[run_id] = record
+
+    def _pending(self) -> Dict[str, RunRecord]:
+        with self._lock:
+            return {run_id: r for run_id, r in self._by_run_id.items() if r.finished_at is None}
+
+    def _poll(self):
+        pending = self._pending()
+        if not pending:
+            return
+
+        # NOTE: Newest first, so paging can stop once past the oldest pending run
+        oldest = min(r.scheduled_at for r in pending.values())
+        page_token = ''
+        while True:
+            with self.limiter:
+                response = self.client.list_runs(page_token=page_token, page_size=100, sort_by='created_at desc')
+
+            done = False
+            for run in response.runs or []:
+                created_at = _timestamp(run.created_at)
+                if created_at is not None and created_at < oldest - 60:
+                    done = True
+                record = pending.get(run.id)
+                if record is None:
+                    continue
+
+                record.created_at = created_at
+                record.status = run.status
+                if run.status and run.status != 'Pending' and record.started_at is None:
+                    # Refined from the workflow below once finished
+                    record.started_at = time.time()
+                if run.status in TERMINAL_PHASES:
+                    self._finish(record)
+
+            page_token = response.next_page_token
+            if done or not page_token:
+                break
+
+    def _finish(self, record: RunRecord):
+        with self.limiter:
+            run_detail = self.client.get_run(record.run_id)
+
+        status = json.loads(run_detail.pipeline_runtime.workflow_manifest)['status']
+        record.started_at = _timestamp(status.get('startedAt')) or record.started_at
+        record.finished_at = _timestamp(status.get('finishedAt')) or time.time()
+
+    def _monitor(self, stop: threading.Event):
+        while True:
+            try:
+                self._poll()
+            except Exception as e:
+                print(f"Monitor pass failed: {e}")
+
+            if stop.is_set() and not self._pending():
+                return
+            stop.wait(self.poll_interval)
+
+    def run(self, schedule: Tuple[Schedule, List[Tuple[float, float]]], drain_timeout: float = 600.0) -> LoadReport:
+        """
+        Submit runs following `schedule` (see `ramp` / `constant`), then wait up to `drain_timeout` seconds for them to finish.
+        """
+        arrivals, stages = schedule
+        funcs = [p[0] for p in self.pipelines]
+        weights = [p[2] for p in self.pipelines]
+        arguments = {p[0]: p[1] for p in self.pipelines}
+
+        stop = threading.Event()
+        monitor = threading.Thread(target=self._monitor, args=(stop,), daemon=True)
+        monitor.start()
+
+        start = time.time()
+        self.offered_rates = [rate for rate, _ in stages]
+        self.stage_windows = []
+        for _, seconds in stages:
+            stage_start = self.stage_windows[-1][1] if self.stage_windows else start
+            self.stage_windows.append((stage_start, stage_start + seconds))
+
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as pool:
+            for offset, stage in arrivals:
+                scheduled_at = start + offset
+                delay = scheduled_at - time.time()
+                if delay > 0:
+                    time.sleep(delay)
+
+                func = self.rng.choices(funcs, weights)[0]
+                record = RunRecord(stage=stage, pipeline=func.__name__, scheduled_at=scheduled_at)
+                self.records.append(record)
+                pool.submit(self._submit, record, func, arguments[func])
+
+        stop.set()
+        monitor.join(drain_timeout)
+
+        return self.report()
+
+    def report(self) -> LoadReport:
+        finished = [r.finished_at for r in self.records if r.finished_at is not None]
+
+        # Completions lag arrivals by the end to end latency of a run, so each stage's window is shifted by the latency seen under the lightest load
+        lag = percentiles([
+            r.finished_at - r.scheduled_at
+            for r in self.records
+            if r.stage == 0 and r.finished_at is not None
+        ]).get('p50', 0.0)
+
+        stages = []
+        for stage, (start, end) in enumerate(self.stage_windows):
+            records = [r for r in self.records if r.stage == stage]
+            completed = [t - start - lag for t in finished if start + lag <= t < end + lag]
+
+            # NOTE: Whole windows only, stages shorter than a window get a single one
+            windows = max(int((end - start) // self.throughput_window), 1)
+            width = (end - start) / windows
+            counts = [0] * windows
+            for offset in completed:
+                counts[min(int(offset / width), windows - 1)] += 1
+            stages.append(StageReport(
+                stage=stage,
+                offered_rate=self.offered_rates[stage],
+                submitted=sum(1 for r in records if r.run_id is not None),
+                failed_submissions=sum(1 for r in records if r.error is not None),
+                completed=len(completed),
+                completion_rate=len(completed) / max(end - start, 1e-9) * 60,
+                completion_throughput=percentiles([c / width * 60 for c in counts]),
+                submission_latency=percentiles([r.submission_latency for r in records if r.submission_latency is not None]),
+                queue_to_start=percentiles([r.queue_to_start for r in records if r.queue_to_start is not None]),
+            ))
+
+        return LoadReport(stages)
+
+    def cleanup(self, max_workers: int = 8):
+        """
+        Delete every run submitted by this generator.
+        """
+        def delete(run_id: str):
+            with self.limiter:
+                self.client.runs.delete_run(run_id)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            list(pool.map(delete, [r.run_id for r in self.records if r.run_id is not None]))
+
+class _FakeRuns:
+    def __init__(self, plane: FakeControlPlane):
+        self._plane = plane
+
+    def delete_run(self, run_id: str):
+        with self._plane._lock:
+            self._plane._runs.pop(run_id, None)
+
+class FakeControlPlane:
+    """
+    Local stand in for the KFP API and Argo controller: submissions take `submit_latency`, the controller starts at most `start_rate` workflows per second with at most `capacity` running, and each run takes `run_seconds`.
+
+    Implements the parts of the client used by `LoadGenerator`: `submit` (pass as `LoadGenerator(submit=...)`), `list_runs`, `get_run` and `runs.delete_run`.
+    """
+    def __init__(
+        self,
+        capacity: int = 20,
+        start_rate: float = 5.0,
+        run_seconds: float = 1.0,
+        submit_latency: float = 0.01
+    ):
+        self.capacity = capacity
+        self.start_rate = start_rate
+        self.run_seconds = run_seconds
+        self.submit_latency = submit_latency
+        self.runs = _FakeRuns(self)
+
+        # run_id -> [created, started, finished]
+        self._runs: Dict[str, List[Optional[float]]] = {}
+        self._queue: deque = deque()
+        self._running: List[float] = []
+        self._next_start = 0.0
+        self._lock = threading.Lock()
+
+    def submit(self, func: Callable, arguments: dict) -> str:
+        time.sleep(self.submit_latency)
+        with self._lock:
+            run_id = f"fake-{len(self._runs)}-{random.getrandbits(32):08x}"
+            self._runs[run_id] = [time.time(), None, None]
+            self._queue.append(run_id)
+
+        return run_id
+
+    def _advance(self, now: float):
+        while self._queue:
+            run_id = self._queue[0]
+            if run_id not in self._runs:
+                self._queue.popleft()
+                continue
+
+            t = max(self._runs[run_id][0], self._next_start)
+            while self._running and self._running[0] <= t:
+                heapq.heappop(self._running)
+            if len(self._running) >= self.capacity:
+                # Waits for the next run to finish
+                t = self._running[0]
+            if t > now:
+                break
+            while self._running and self._running[0] <= t:
+                heapq.heappop(self._running)
+
+            self._queue.popleft()
+            finish = t + self.run_seconds
+            self._runs[run_id][1:] = [t, finish]
+            heapq.heappush(self._running, finish)
+            self._next_start = t + 1 / self.start_rate
+
+    def _status(self, times: List[Optional[float]], now: float) -> str:
+        _, started, finished = times
+        if started is None or started > now:
+            return 'Pending'
+
+        return 'Succeeded' if finished <= now else 'Running'
+
+    @staticmethod
+    def _format(t: Optional[float]) -> Optional[str]:
+        if t is None:
+            return None
+
+        return datetime.fromtimestamp(t, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    def list_runs(self, page_token: str = '', page_size: int = 100, sort_by: str = '', **kwargs):
+        from types import SimpleNamespace
+
+        now = time.time()
+        with self._lock:
+            self._advance(now)
+            items = sorted(self._runs.items(), key=lambda item: item[1][0], reverse=True)
+
+        offset = int(page_token or 0)
+        page = items[offset:offset + page_size]
+        return SimpleNamespace(
+            runs=[
+                SimpleNamespace(
+                    id=run_id,
+                    created_at=datetime.fromtimestamp(times[0], tz=timezone.utc),
+                    status=self._status(times, now)
+                )
+                for run_id, times in page
+            ],
+            next_page_token=str(offset + page_size) if offset + page_size < len(items) else ''
+        )
+
+    def get_run(self, run_id: str):
+        from types import SimpleNamespace
+
+        now = time.time()
+        with self._lock:
+            self._advance(now)
+            times = self._runs[run_id]
+
+        started = times[1] if times[1] is not None and times[1] <= now else None
+        finished = times[2] if started is not None and times[2] <= now else None
+        manifest = {'status': {'phase': self._status(times, now), 'startedAt': self._format(started), 'finishedAt': self._format(finished)}}
+
+        return SimpleNamespace(pipeline_runtime=SimpleNamespace(workflow_manifest=json.dumps(manifest)))
+
+if __name__ == '__main__':
+    import sys
+
+    if '--fake' in sys.argv:
+        plane = FakeControlPlane(capacity=10, start_rate=2.0, run_seconds=3.0)
+        generator = LoadGenerator(plane, [(lambda: None, {}, 1.0)], submit=plane.submit, poll_interval=0.5, throughput_window=2.0)
+        generator.run(ramp([(30, 10), (60, 10), (120, 10), (240, 10)]))
+    else:
+        from kfp import Client
+
+        from samples.pipelines import single_no_op, complex_timed
+
+        generator = LoadGenerator(Client(), [
+            (single_no_op, {}, 0.8),
+            (complex_timed, {"base_time": 1}, 0.2),
+        ])
+        generator.run(ramp([(10, 120), (20, 120), (40, 120), (80, 120)]))
+
+    generator.report().display()
+    generator.cleanup()
@@ -0,0 +1,321 @@
+"""
+Local full text index over the `main-logs` of finished nodes across many runs.
+
+Logs are pulled concurrently (with a shared rate limit), stored zlib compressed in a SQLite database and indexed by term, so queries only decompress the logs of nodes which contain every queried term. Nodes are only pulled once, indexing the same runs again only fetches nodes which finished since.
+
+```python
+index = LogIndex('logs.db')
+index.add_runs(client, run_ids)
+for match in index.search('ValueError', status='Failed'):
+    print(match)
+```
+"""
+from __future__ import annotations
+
+import re
+import zlib
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Iterable, List, Optional, Sequence, Tuple, Union
+
+from utils.throttle import RateLimiter
+
+TERM_PATTERN = re.compile(r'[a-z0-9_]{2,}')
+FINISHED_PHASES = ('Succeeded', 'Failed', 'Error')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS nodes (
+    id INTEGER PRIMARY KEY,
+    run_id TEXT NOT NULL,
+    run_name TEXT,
+    node_id TEXT NOT NULL,
+    display_name TEXT,
+    template_name TEXT,
+    status TEXT,
+    started_at REAL,
+    finished_at REAL,
+    UNIQUE (run_id, node_id)
+);
+CREATE INDEX IF NOT EXISTS nodes_finished_at ON nodes (finished_at);
+CREATE TABLE IF NOT EXISTS logs (
+    node INTEGER PRIMARY KEY REFERENCES nodes (id),
+    data BLOB
+);
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    node INTEGER NOT NULL,
+    PRIMARY KEY (term, node)
+) WITHOUT ROWID;
+"""
+
+def tokenize(text: str) -> set:
+    return set(TERM_PATTERN.findall(text.lower()))
+
+def _timestamp(value: Union[None, datetime, float]) -> Optional[float]:
+    if value is None or isinstance(value, (int, float)):
+        return value
+
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+@dataclass
+class LogMatch:
+    run_id: str
+    run_name: str
+    node_id: str
+    display_name: str
+    template_name: str
+    status: str
+    finished_at: datetime
+    lines: List[str] = field(default_factory=list)
+
+    def __str__(self) -> str:
+        return f"LogMatch(run={self.run_name}, node={self.display_name}, status={self.status}, finished_at={self.finished_at}, lines={len(self.lines)})"
+
+class LogIndex:
+    """
+    Args:
+        path (str): SQLite database file, `:memory:` for a throw away index.
+    """
+    def __init__(self, path: str = 'logs.db'):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self) -> LogIndex:
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def indexed(self, run_id: str) -> set:
+        return {row[0] for row in self.db.execute("SELECT node_id FROM nodes WHERE run_id = ?", (run_id,))}
+
+    def add(self, run_id: str, run_name: str, node, logs: Optional[str]):
+        """
+        Store and index the logs of a `utils.run_data.NodeData`, `logs` is `None` for nodes without a log artifact.
+        """
+        existing = self.db.execute("SELECT id FROM nodes WHERE run_id = ? AND node_id = ?", (run_id, node.node_id)).fetchone()
+        if existing is not None:
+            for table, column in (('postings', 'node'), ('logs', 'node'), ('nodes', 'id')):
+                self.db.execute(f"DELETE FROM {table} WHERE {column} = ?", existing)
+
+        cursor = self.db.execute(
+            "INSERT INTO nodes (run_id, run_name, node_id, display_name, template_name, status, started_at, finished_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                run_id,
+                run_name,
+                node.node_id,
+                node.display_name,
+                node.template_name,
+                node.status,
+                _timestamp(node.started_at),
+                _timestamp(node.finished_at),
+            )
+        )
+        rowid = cursor.lastrowid
+        self.db.execute(
+            "INSERT INTO logs (node, data) VALUES (?, ?)",
+            (rowid, zlib.compress(logs.encode(), 6) if logs is not None else None)
+        )
+        if logs:
+            self.db.executemany(
+                "INSERT OR IGNORE INTO postings (term, node) VALUES (?, ?)",
+                ((term, rowid) for term in tokenize(logs))
+            )
+
+    def add_runs(
+        self,
+        client,
+        run_ids: Iterable[str],
+        max_workers: int = 16,
+        rate: float = 20.0,
+        progress: bool = False
+    ) -> int:
+        """
+        Pull and index the logs of every finished node in `run_ids` which is not indexed yet.
+
+        Args:
+            client (Client): KFP client.
+            run_ids (Iterable[str]): Runs to index.
+            max_workers (int): Maximum number of concurrent requests.
+            rate (float): Maximum number of API requests per second across all workers.
+
+        Returns:
+            int: Number of nodes indexed.
+        """
+        from utils.run_data import RunData
+
+        limiter = RateLimiter(rate)
+
+        def load(run_id: str) -> RunData:
+            with limiter:
+                return RunData.from_run_detail(client.get_run(run_id), client=client)
+
+        def pull(node) -> Optional[str]:
+            # Nodes which failed before their container ran have no log artifact
+            if 'main-logs' not in [a['name'] for a in node.node.get('outputs', {}).get('artifacts', [])]:
+                return None
+
+            with limiter:
+                return node.pull_logs()
+
+        count = 0
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            runs = list(pool.map(load, run_ids))
+
+            futures = {}
+            for run in runs:
+                indexed = self.indexed(run.run_id)
+                for node in run.nodes.values():
+                    if node.status in FINISHED_PHASES and node.node_id not in indexed:
+                        futures[pool.submit(pull, node)] = (run, node)
+
+            # NOTE: SQLite connections can not be shared between threads, only the downloads are concurrent
+            for future in as_completed(futures):
+                run, node = futures[future]
+                try:
+                    logs = future.result()
+                except Exception as e:
+                    print(f"Failed to pull logs of {node.display_name} ({node.node_id}) in {run.run_id}: {e}")
+                    continue
+
+                self.add(run.run_id, run.run_name, node, logs)
+                count += 1
+                if count % 100 == 0:
+                    self.db.commit()
+                    if progress:
+                        print(f">>> Indexed {count} / {len(futures)} nodes")
+
+        self.db.commit()
+        return count
+
+    def _candidates(
+        self,
+        terms: Sequence[str],
+        display_name: Optional[str],
+        template_name: Optional[str],
+        status: Optional[str],
+        run_id: Optional[str],
+        since: Optional[float],
+        until: Optional[float],
+        limit: Optional[int]
+    ) -> List[Tuple]:
+        clauses, params = [], []
+        for term in terms:
+            clauses.append("id IN (SELECT node FROM postings WHERE term = ?)")
+            params.append(term)
+        for column, value in (('display_name', display_name), ('template_name', template_name), ('status', status), ('run_id', run_id)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            clauses.append("finished_at >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("finished_at < ?")
+            params.append(until)
+
+        query = "SELECT id, run_id, run_name, node_id, display_name, template_name, status, finished_at FROM nodes"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY finished_at DESC"
+        if limit is not None:
+            query += f" LIMIT {int(limit)}"
+
+        return self.db.execute(query, params).fetchall()
+
+    def search(
+        self,
+        query: Optional[str] = None,
+        regex: Optional[str] = None,
+        display_name: Optional[str] = None,
+        template_name: Optional[str] = None,
+        status: Optional[str] = None,
+        run_id: Optional[str] = None,
+        since: Union[None, datetime, float] = None,
+        until: Union[None, datetime, float] = None,
+        limit: Optional[int] = None
+    ) -> List[LogMatch]:
+        """
+        Find nodes whose logs contain every term of `query` and / or match `regex`, most recently finished first.
+
+        Terms are looked up in the index, so giving terms alongside a regex (e.g. `query='valueerror', regex=r'ValueError: .* 42'`) means only logs containing the terms are decompressed and scanned.
+
+        Returns:
+            List[LogMatch]: Matching nodes with the matching lines of their logs.
+        """
+        terms = sorted(tokenize(query)) if query else []
+        pattern = re.compile(regex) if regex is not None else None
+        # Without a regex every row is a match, so the limit can be applied by SQLite
+        rows = self._candidates(
+            terms, display_name, template_name, status, run_id,
+            _timestamp(since), _timestamp(until),
+            limit if pattern is None else None
+        )
+
+        matches = []
+        for rowid, *columns, finished_at in rows:
+            lines = []
+            if terms or pattern is not None:
+                data = self.db.execute("SELECT data FROM logs WHERE node = ?", (rowid,)).fetchone()
+                if data is None or data[0] is None:
+                    continue
+
+                for line in zlib.decompress(data[0]).decode().splitlines():
+                    if pattern is not None and not pattern.search(line):
+                        continue
+                    if pattern is None and not tokenize(line) & set(terms):
+                        continue
+                    lines.append(line)
+
+                if pattern is not None and not lines:
+                    continue
+
+            matches.append(LogMatch(
+                *columns,
+                finished_at=datetime.fromtimestamp(finished_at, tz=timezone.utc) if finished_at is not None else None,
+                lines=lines
+            ))
+            if limit is not None and len(matches) >= limit:
+                break
+
+        return matches
+
+    def logs(self, run_id: str, node_id: str) -> Optional[str]:
+        row = self.db.execute(
+            "SELECT logs.data FROM logs JOIN nodes ON nodes.id = logs.node WHERE nodes.run_id = ? AND nodes.node_id = ?",
+            (run_id, node_id)
+        ).fetchone()
+        if row is None or row[0] is None:
+            return None
+
+        return zlib.decompress(row[0]).decode()
+
+if __name__ == '__main__':
+    from kfp import Client
+
+    from samples.pipelines import errors
+
+    client = Client()
+    print("Creating runs...")
+    run_ids = []
+    for _ in range(3):
+        result = client.create_run_from_pipeline_func(errors, arguments={})
+        result.wait_for_run_completion(600)
+        run_ids.append(result.run_id)
+
+    with LogIndex(':memory:') as index:
+        print(f"Indexed {index.add_runs(client, run_ids)} nodes")
+
+        for match in index.search('exception', status='Failed'):
+            print(match)
+            for line in match.lines:
+                print(f"  {line}")
@@ -11,6 +11,10 @@ from functools import cache
 from kfp import Client
 from graphviz import Digraph
 
+from utils.artifacts import ArtifactReader
+from utils.run_data import join_profile
+from utils.timestamps import parse_datetime
+
 KFP_TYPE_MAP = {
     "Integer": int,
     "Float": float,
@@ -57,6 +61,8 @@ def get_artifact(
 class KFPRun:
     runtime_manifest: dict
     _client: Client = None
+    # NOTE: When set, artifacts are read directly from the object store (see `utils/artifacts.py`)
+    _artifact_reader: ArtifactReader = None
 
     def __post_init__(self):
         self._metadata = self.runtime_manifest['metadata']
@@ -141,9 +147,16 @@ class KFPPodNode:
     def template_name(self) -> str:
         return self.node['templateName']
 
+    @property
+    def display_name(self) -> str:
+        return self.node_template["metadata"]["annotations"].get(
+            "pipelines.kubeflow.org/task_display_name",
+            self.node['displayName']
+        )
+
     @property
     def node_template(self) -> dict:
-        for template in self.run.manifest['spec']['templates']:
+        for template in self.run.runtime_manifest['spec']['templates']:
             if template['name'] == self.template_name:
                 return template
 
@@ -172,6 +185,24 @@ class KFPPodNode:
 
         return combined
 
+    def get_output_name(self, short_name: str) -> str:
+        """
+        Resolve an output's short name (as used in the component spec) to the full artifact name.
+        """
+        outputs = self.outputs
+        if short_name in outputs:
+            return short_name
+
+        for full_name, output in outputs.items():
+            if output['short_name'] == short_name:
+                return full_name
+
+        raise KeyError(f"Output '{short_name}' not found in outputs for '{self.template_name}': {list(outputs)}")
+
+    def convert_output(self, artifact_name: str, datum: str):
+        t = KFP_TYPE_MAP[self.outputs[artifact_name]['type']]
+        return t(datum)
+
     def to_record(self) -> dict:
         record = {
             'stage_name': self.node['displayName']
@@ -180,10 +211,43 @@ class KFPPodNode:
 
         return record
 
-    def get_output_data(self, normalize=True):
+    def get_artifact(self, artifact_name: str) -> dict:
+        if self.run._artifact_reader is not None:
+            return self.run._artifact_reader.read(
+                self.run.run_id,
+                self.node,
+                artifact_name,
+                is_tarfile=True,
+                workflow_manifest=self.run.runtime_manifest,
+                client=self.run._client
+            )
+
         assert self.run._client is not None, "Could not find KFP client."
-        client = self.run._client
 
+        return get_artifact(
+            client=self.run._client,
+            run_id=self.run.run_id,
+            node_id=self.node_id,
+            artifact_name=artifact_name
+        )
+
+    def get_metrics(self) -> dict:
+        data = self.get_artifact('mlpipeline-metrics')
+        metrics = json.loads(next(iter(data.values())))['metrics']
+
+        return {m['name']: m['numberValue'] for m in metrics}
+
+    def get_profile(self) -> dict:
+        """
+        Join the metrics emitted by a profiled component with the Argo node timings, see `join_profile` in `run_data.py`.
+        """
+        return join_profile(
+            self.get_metrics(),
+            parse_datetime(self.node.get('startedAt')),
+            parse_datetime(self.node.get('finishedAt'))
+        )
+
+    def get_output_data(self, normalize=True):
         outputs = self.outputs
         data = {}
         for artifact in self.node['outputs']['artifacts']:
@@ -191,16 +255,8 @@ class KFPPodNode:
             if artifact['name'] not in outputs:
                 continue
 
-            datum = get_artifact(
-                client=client,
-                run_id=self.run.run_id,
-                node_id=self.node_id,
-                artifact_name=artifact['name']
-            )
-            datum = datum['data']
-
-            t = KFP_TYPE_MAP[outputs[artifact['name']]['type']]
-            data[artifact['name']] = t(datum)
+            datum = self.get_artifact(artifact['name'])
+            data[artifact['name']] = self.convert_output(artifact['name'], datum['data'])
 
         # Normals names by removing template name
         if normalize:
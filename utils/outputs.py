@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import os
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+from kfp import Client
+
+from utils.manifest import KFPRun, KFPPodNode, get_artifact
+from utils.throttle import RateLimiter
+
+TERMINAL_PHASES = ('Succeeded', 'Failed', 'Error', 'Skipped')
+
+class OutputCache:
+    """
+    Cache for workflow manifests of finished runs and outputs of succeeded nodes, neither of which can change once written.
+
+    Args:
+        directory (Optional[str]): If provided, entries are also persisted as JSON files so later invocations can skip the API entirely.
+    """
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory
+        self._entries: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+        if self.directory is not None:
+            os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key.replace('/', '__') + '.json')
+
+    def get(self, key: str):
+        with self._lock:
+            if key in self._entries:
+                return self._entries[key]
+
+        if self.directory is None or not os.path.exists(self._path(key)):
+            return None
+
+        with open(self._path(key), 'r') as f:
+            value = json.load(f)
+
+        with self._lock:
+            self._entries[key] = value
+        return value
+
+    def set(self, key: str, value):
+        with self._lock:
+            self._entries[key] = value
+
+        if self.directory is not None:
+            with open(self._path(key), 'w') as f:
+                json.dump(value, f)
+
+def _load_run(client: Client, run_id: str, limiter: RateLimiter, cache: OutputCache) -> KFPRun:
+    key = f"manifest/{run_id}"
+    manifest = cache.get(key)
+
+    if manifest is None:
+        with limiter:
+            run_detail = client.get_run(run_id)
+        manifest = json.loads(run_detail.pipeline_runtime.workflow_manifest)
+
+        if manifest['status'].get('phase') in TERMINAL_PHASES:
+            cache.set(key, manifest)
+
+    return KFPRun(runtime_manifest=manifest, _client=client)
+
+def _read_output(node: KFPPodNode, artifact_name: str, limiter: RateLimiter, cache: OutputCache):
+    # Outputs only exist for nodes which succeeded
+    if node.node['phase'] != 'Succeeded':
+        return None
+
+    key = f"output/{node.run.run_id}/{node.node_id}/{artifact_name}"
+    datum = cache.get(key)
+
+    if datum is None:
+        with limiter:
+            datum = get_artifact(
+                client=node.run._client,
+                run_id=node.run.run_id,
+                node_id=node.node_id,
+                artifact_name=artifact_name
+            )['data']
+        cache.set(key, datum)
+
+    return node.convert_output(artifact_name, datum)
+
+def collect_outputs(
+    client: Client,
+    run_ids: Iterable[str],
+    display_name: str,
+    output_name: str,
+    max_workers: int = 16,
+    rate: float = 20.0,
+    cache: Optional[OutputCache] = None
+) -> Dict[str, List]:
+    """
+    Collect an output of the nodes named `display_name` across many runs, e.g. the metrics of each run in a hyperparameter sweep.
+
+    Both the run lookups and artifact reads are issued concurrently, with a single rate limit shared by all of them.
+
+    Args:
+        client (Client): KFP client.
+        run_ids (Iterable[str]): Runs to collect from.
+        display_name (str): Display name of the nodes to read from. Every matching node (e.g. each `ParallelFor` iteration) produces a row.
+        output_name (str): Short output name from the component spec (e.g. `Output`), or the full artifact name.
+        max_workers (int): Maximum number of concurrent requests.
+        rate (float): Maximum number of API requests per second across all workers.
+        cache (Optional[OutputCache]): Cache to reuse between calls, by default a fresh in memory cache.
+
+    Returns:
+        Dict[str, List]: Columns of equal length, can be passed straight to `pandas.DataFrame`. Values of nodes which did not succeed are `None`.
+    """
+    limiter = RateLimiter(rate)
+    cache = cache if cache is not None else OutputCache()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        runs = list(pool.map(
+            lambda run_id: _load_run(client, run_id, limiter, cache),
+            run_ids
+        ))
+
+        matches = []
+        for run in runs:
+            if 'nodes' not in run.runtime_manifest['status']:
+                continue
+
+            for node in run.get_pod_nodes():
+                if node.display_name == display_name:
+                    matches.append((node, node.get_output_name(output_name)))
+
+        values = list(pool.map(
+            lambda match: _read_output(match[0], match[1], limiter, cache),
+            matches
+        ))
+
+    columns = {
+        'run_id': [],
+        'run_name': [],
+        'run_status': [],
+        'node_id': [],
+        'node_status': [],
+        output_name: [],
+    }
+    for (node, _), value in zip(matches, values):
+        columns['run_id'].append(node.run.run_id)
+        columns['run_name'].append(node.run.run_name)
+        columns['run_status'].append(node.run.runtime_manifest['status'].get('phase'))
+        columns['node_id'].append(node.node_id)
+        columns['node_status'].append(node.node['phase'])
+        columns[output_name].append(value)
+
+    return columns
+
+if __name__ == '__main__':
+    import time
+
+    from samples.pipelines import simple_returns
+
+    client = Client()
+    print("Creating runs...")
+    run_ids = [
+        client.create_run_from_pipeline_func(simple_returns, arguments={}).run_id
+        for _ in range(3)
+    ]
+
+    for run_id in run_ids:
+        client.wait_for_run_completion(run_id, 300)
+
+    start = time.time()
+    columns = collect_outputs(client, run_ids, 'return-int', 'Output')
+    print(f"Collected {len(columns['run_id'])} outputs in {time.time() - start:.2f}s")
+    for row in zip(*columns.values()):
+        print(row)
@@ -0,0 +1,283 @@
+"""
+Output payload size sweep over the pipelines from `samples/pipelines/payload_sweep.py`: what passing a payload between two components costs, by size and by way of passing it, and the size from which artifacts are cheaper than parameters.
+
+Each run has `repeats` producer -> consumer pairs, both profiled (see `samples/components/profiling.py`). Per pair:
+
+- `produce_serialization`: the producer's function return until its process exit, writing the output,
+- `produce_teardown`: the producer's process exit until its node finished, mostly uploading the outputs to the object store,
+- `handoff`: the producer finished until the consumer started, the controller noticing and creating the consumer (parameters travel through the workflow here),
+- `consume_launcher`: the consumer's node start until its interpreter started, mostly downloading the input artifacts,
+- `consume_startup` / `consume_execution`: the consumer's interpreter start and the function reading the payload.
+
+Medians over the pairs are kept. Outside the pipeline, `parse_seconds` is how long `RunData` takes to parse the finished run (parameters inflate the workflow manifest, `manifest_bytes`), and `client_read_seconds` how long pulling the producer's payload output back takes: `KFPPodNode.get_artifact` and `convert_output` for parameters, the raw bytes of the stored object for files (they are binary, e.g. Arrow, and have no `KFP_TYPE_MAP` conversion). A failed read is recorded in `client_read_error` rather than ending the sweep.
+
+Argo records timestamps with second resolution, `produce_teardown`, `handoff` and `consume_launcher` are only meaningful above a second, hence the repeats. Parameters are passed to the consumer on its command line, so `str` and `json` payloads above Linux's `MAX_ARG_STRLEN` (128KiB per argument) fail outright, such runs count as infinitely expensive.
+
+```bash
+python -m utils.payload_bench --sizes 1024,65536,1048576 --kinds str,file --repeats 3
+python -m utils.payload_bench --output payloads.json
+```
+"""
+from __future__ import annotations
+
+import json
+import time
+from base64 import b64decode
+from dataclasses import asdict, dataclass
+from statistics import median
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from utils.artifacts import artifact_location
+from utils.manifest import KFPPodNode, KFPRun
+from utils.run_data import RunData
+from utils.workflow_dag import LOOP_INDEX_PATTERN, normalize_node_name
+
+PARAMETER_KINDS = ('str', 'json')
+ARTIFACT_KINDS = ('file', 'arrow')
+# Short name of each producer's payload output, see `samples/pipelines/payload_sweep.py`
+PAYLOAD_OUTPUTS = {'str': 'Output', 'json': 'Output', 'file': 'payload', 'arrow': 'table'}
+DEFAULT_SIZES = (1 << 10, 1 << 13, 1 << 16, 1 << 17, 1 << 18, 1 << 20, 1 << 22, 1 << 24)
+
+@dataclass
+class PayloadPoint:
+    kind: str
+    size_bytes: int
+    status: str
+    repeats: int
+    produce_serialization: float = 0.0
+    produce_teardown: float = 0.0
+    handoff: float = 0.0
+    consume_launcher: float = 0.0
+    consume_startup: float = 0.0
+    consume_execution: float = 0.0
+    manifest_bytes: int = 0
+    parse_seconds: float = 0.0
+    client_read_seconds: float = 0.0
+    client_read_error: Optional[str] = None
+
+    @property
+    def succeeded(self) -> bool:
+        return self.status == 'Succeeded'
+
+    @property
+    def total(self) -> float:
+        """
+        Seconds from the producer's function returning until the consumer's function finished, infinite if the run failed.
+        """
+        if not self.succeeded:
+            return float('inf')
+
+        return (
+            self.produce_serialization + self.produce_teardown + self.handoff
+            + self.consume_launcher + self.consume_startup + self.consume_execution
+        )
+
+    @property
+    def _client_read(self) -> str:
+        if self.client_read_error is not None:
+            return f"error ({self.client_read_error})"
+
+        return f"{self.client_read_seconds:.2f}s"
+
+    def __str__(self) -> str:
+        if not self.succeeded:
+            return f"PayloadPoint(kind={self.kind}, size={self.size_bytes}, status={self.status})"
+
+        return (
+            f"PayloadPoint(kind={self.kind}, size={self.size_bytes}, total={self.total:.2f}s, "
+            f"serialization={self.produce_serialization:.2f}s, teardown={self.produce_teardown:.0f}s, handoff={self.handoff:.0f}s, "
+            f"launcher={self.consume_launcher:.1f}s, read={self.consume_startup + self.consume_execution:.2f}s, "
+            f"manifest={self.manifest_bytes}B, client_read={self._client_read})"
+        )
+
+def _loop_indices(node_name: str, workflow_name: str) -> Tuple[str, ...]:
+    return tuple(LOOP_INDEX_PATTERN.findall(normalize_node_name(node_name, workflow_name)))
+
+def _read_raw(node: KFPPodNode, artifact_name: str) -> bytes:
+    reader = node.run._artifact_reader
+    if reader is not None and reader.direct:
+        bucket, key = artifact_location(node.node, artifact_name, node.run.runtime_manifest, reader.bucket)
+        return b''.join(reader.iter_chunks(bucket, key))
+
+    client = node.run._client if node.run._client is not None else getattr(reader, 'client', None)
+    assert client is not None, "Could not find KFP client."
+
+    return b64decode(client.runs.read_artifact(node.run.run_id, node.node_id, artifact_name).data)
+
+def _read_output(node: KFPPodNode, kind: str):
+    name = node.get_output_name(PAYLOAD_OUTPUTS[kind])
+    if kind in PARAMETER_KINDS:
+        return node.convert_output(name, node.get_artifact(name)['data'])
+
+    # NOTE: File outputs have no `KFP_TYPE_MAP` conversion and need not be text, time the bytes of the stored object
+    return _read_raw(node, name)
+
+def measure_run(
+    workflow_manifest: dict,
+    kind: str,
+    size_bytes: int,
+    client=None,
+    artifact_reader=None
+) -> PayloadPoint:
+    """
+    Payload passing costs of a finished run from its workflow manifest. `client` (or `artifact_reader`) is needed for the profiles and `client_read_seconds`.
+    """
+    manifest_bytes = len(json.dumps(workflow_manifest))
+    status = workflow_manifest['status'].get('phase', 'Unknown')
+    workflow_name = workflow_manifest['metadata'].get('name', '')
+
+    start = time.perf_counter()
+    run = RunData(workflow_manifest, client=client, artifact_reader=artifact_reader)
+    parse_seconds = time.perf_counter() - start
+
+    producers = {_loop_indices(n.node['name'], workflow_name): n for n in run.get_nodes("Produce")}
+    consumers = {_loop_indices(n.node['name'], workflow_name): n for n in run.get_nodes("Consume")}
+    pairs = [(producers[k], consumers[k]) for k in sorted(producers) if k in consumers]
+
+    point = PayloadPoint(
+        kind=kind,
+        size_bytes=size_bytes,
+        status=status,
+        repeats=len(pairs),
+        manifest_bytes=manifest_bytes,
+        parse_seconds=parse_seconds,
+    )
+    pairs = [(p, c) for p, c in pairs if p.succeeded and c.succeeded]
+    if status != 'Succeeded' or not pairs:
+        return point
+
+    samples: Dict[str, List[float]] = {}
+    for producer, consumer in pairs:
+        produce = producer.profile()
+        consume = consumer.profile()
+        sample = {
+            'produce_serialization': produce['serialization-seconds'],
+            'produce_teardown': produce['teardown-seconds'],
+            'handoff': (consumer.started_at - producer.finished_at).total_seconds(),
+            'consume_launcher': consume['launcher-seconds'],
+            'consume_startup': consume['startup-seconds'],
+            'consume_execution': consume['execution-seconds'],
+        }
+        for name, value in sample.items():
+            samples.setdefault(name, []).append(value)
+
+    for name, values in samples.items():
+        setattr(point, name, median(values))
+
+    # Pull one producer's output back the way notebooks do
+    kfp_run = KFPRun(runtime_manifest=workflow_manifest, _client=client, _artifact_reader=artifact_reader)
+    try:
+        start = time.perf_counter()
+        _read_output(KFPPodNode(run=kfp_run, node=pairs[0][0].node), kind)
+        point.client_read_seconds = time.perf_counter() - start
+    except Exception as e:
+        # NOTE: The in pipeline costs are still valid, do not lose the run over the read back
+        point.client_read_error = f"{type(e).__name__}: {e}"
+
+    return point
+
+def find_crossover(points: Sequence[PayloadPoint]) -> Optional[int]:
+    """
+    Smallest payload size from which the cheapest artifact kind is at least as cheap as the cheapest parameter kind at every larger size measured, i.e. where to switch from parameter to artifact passing.
+
+    Returns:
+        Optional[int]: Size in bytes, `None` if parameters stay cheaper up to the largest size (or either family was not measured).
+    """
+    best: Dict[int, Dict[str, float]] = {}
+    for point in points:
+        family = 'parameter' if point.kind in PARAMETER_KINDS else 'artifact'
+        costs = best.setdefault(point.size_bytes, {})
+        costs[family] = min(costs.get(family, float('inf')), point.total)
+
+    sizes = sorted(s for s, costs in best.items() if len(costs) == 2)
+    crossover = None
+    for size in reversed(sizes):
+        costs = best[size]
+        if costs['artifact'] > costs['parameter']:
+            break
+        crossover = size
+
+    return crossover
+
+def display(points: Sequence[PayloadPoint]):
+    columns = ('kind', 'size', 'status', 'total', 'serial', 'teardown', 'handoff', 'launcher', 'read', 'manifest', 'client')
+    print(''.join(f"{c:>11}" for c in columns))
+    for p in sorted(points, key=lambda p: (p.size_bytes, p.kind)):
+        cells = [p.kind, str(p.size_bytes), p.status]
+        if p.succeeded:
+            cells += [
+                f"{p.total:.2f}",
+                f"{p.produce_serialization:.3f}",
+                f"{p.produce_teardown:.0f}",
+                f"{p.handoff:.0f}",
+                f"{p.consume_launcher:.1f}",
+                f"{p.consume_startup + p.consume_execution:.3f}",
+                str(p.manifest_bytes),
+                'error' if p.client_read_error is not None else f"{p.client_read_seconds:.2f}",
+            ]
+        print(''.join(f"{c:>11}" for c in cells))
+
+    crossover = find_crossover(points)
+    print(f">>> Crossover: {'none' if crossover is None else f'{crossover} bytes'}")
+
+def run_payload_sweep(
+    client,
+    sizes: Sequence[int] = DEFAULT_SIZES,
+    kinds: Sequence[str] = PARAMETER_KINDS + ARTIFACT_KINDS,
+    repeats: int = 3,
+    timeout: int = 3600,
+    output: Optional[str] = None,
+    artifact_reader=None
+) -> List[PayloadPoint]:
+    """
+    Run the payload pipeline once per size and kind, one run at a time so runs do not compete for the cluster.
+
+    Args:
+        client (Client): KFP client.
+        sizes (Sequence[int]): Payload sizes in bytes.
+        kinds (Sequence[str]): Ways of passing the payload, see `PAYLOAD_KINDS`.
+        repeats (int): Producer -> consumer pairs per run.
+        timeout (int): Seconds to wait for each run.
+        output (Optional[str]): JSON file the points are written to after every run, so an interrupted sweep keeps what it measured.
+    """
+    from samples.pipelines import make_payload_pipeline
+
+    points = []
+    for size_bytes in sizes:
+        for kind in kinds:
+            pipeline_func = make_payload_pipeline(kind, size_bytes, repeats=repeats)
+            result = client.create_run_from_pipeline_func(pipeline_func, arguments={})
+            run_detail = result.wait_for_run_completion(timeout)
+
+            workflow_manifest = json.loads(run_detail.pipeline_runtime.workflow_manifest)
+            point = measure_run(workflow_manifest, kind, size_bytes, client=client, artifact_reader=artifact_reader)
+            points.append(point)
+            print(f">>> {point}")
+
+            if output is not None:
+                with open(output, 'w') as f:
+                    json.dump([asdict(p) for p in points], f, indent=2)
+
+    display(points)
+
+    return points
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Output payload size sweep, parameter vs artifact passing")
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)), help="Comma separated payload sizes in bytes")
+    parser.add_argument('--kinds', default=','.join(PARAMETER_KINDS + ARTIFACT_KINDS), help="Comma separated payload kinds")
+    parser.add_argument('--repeats', type=int, default=3, help="Producer -> consumer pairs per run")
+    parser.add_argument('--output', default=None, help="JSON file for the sweep points")
+    args = parser.parse_args()
+
+    from kfp import Client
+
+    run_payload_sweep(
+        Client(),
+        sizes=[int(s) for s in args.sizes.split(',')],
+        kinds=args.kinds.split(','),
+        repeats=args.repeats,
+        output=args.output
+    )
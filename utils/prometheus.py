@@ -0,0 +1,274 @@
+"""
+Small embedded Prometheus exporter for run and node performance.
+
+Metrics are updated from the node transition events of `utils.events.EventStream`, so each transition costs O(1) and nothing is recomputed from full node lists. Labels are bounded: template / display names only (never run IDs), and each metric accepts at most `max_label_values` distinct label sets after which new ones are folded into `other`.
+
+```python
+metrics = RunMetrics()
+serve(metrics.registry, port=9090)
+
+while True:
+    metrics.update(run_id, RunData.from_run_detail(client.get_run(run_id)))
+```
+"""
+from __future__ import annotations
+
+import bisect
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from utils.events import (
+    Event,
+    EventStream,
+    NODE_CREATED,
+    NODE_STARTED,
+    NODE_SUCCEEDED,
+    NODE_FAILED,
+    NODE_SKIPPED,
+    RUN_FINISHED,
+)
+from utils.timestamps import utc_now
+
+DURATION_BUCKETS = (1, 2, 5, 10, 30, 60, 120, 300, 600, 1800, 3600, 7200, 21600)
+OVERFLOW_LABEL = 'other'
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+class Metric:
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = (), max_label_values: int = 200):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.max_label_values = max_label_values
+        self._values: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Sequence[str]) -> Tuple[str, ...]:
+        assert len(labels) == len(self.label_names), "Expected labels %s, got: %s" % (self.label_names, labels)
+
+        key = tuple(str(v) for v in labels)
+        if key not in self._values and len(self._values) >= self.max_label_values:
+            return (OVERFLOW_LABEL,) * len(self.label_names)
+
+        return key
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_value(key, value))
+
+        return lines
+
+    def _render_value(self, key, value) -> List[str]:
+        return [f"{self.name}{_format_labels(self.label_names, key)} {value}"]
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        with self._lock:
+            key = self._key(labels)
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        with self._lock:
+            key = self._key(labels)
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, *labels: str, amount: float = 1.0):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels: str, value: float):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, *args, buckets: Sequence[float] = DURATION_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, *labels: str, value: float):
+        with self._lock:
+            key = self._key(labels)
+            if key not in self._values:
+                # Per bucket (non cumulative) counts, plus +Inf, sum and count
+                self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            counts, _, _ = state = self._values[key]
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            state[1] += value
+            state[2] += 1
+
+    def _render_value(self, key, value) -> List[str]:
+        counts, total, count = value
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+            cumulative += bucket_count
+            le = '+Inf' if bound == float('inf') else repr(float(bound))
+            labels = _format_labels(self.label_names, key, 'le="%s"' % le)
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        lines.append(f"{self.name}_sum{_format_labels(self.label_names, key)} {total}")
+        lines.append(f"{self.name}_count{_format_labels(self.label_names, key)} {count}")
+
+        return lines
+
+class Registry:
+    def __init__(self):
+        self.metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+
+        return '\n'.join(lines) + '\n'
+
+def serve(registry: Registry, port: int = 9090, host: str = '0.0.0.0') -> ThreadingHTTPServer:
+    """
+    Serve `/metrics` from a daemon thread.
+    """
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+
+            body = registry.render().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    return server
+
+class RunMetrics:
+    """
+    Run and node performance metrics, fed by snapshots from the polling loops.
+    """
+    def __init__(self, registry: Optional[Registry] = None, max_label_values: int = 200):
+        self.registry = registry if registry is not None else Registry()
+        r = self.registry.register
+        kwargs = {'max_label_values': max_label_values}
+
+        self.run_duration = r(Histogram('kfp_run_duration_seconds', "Duration of finished runs.", ('status',), **kwargs))
+        self.runs_finished = r(Counter('kfp_runs_finished_total', "Number of finished runs.", ('status',), **kwargs))
+        self.runs_active = r(Gauge('kfp_runs_active', "Number of runs being watched which have not finished.", **kwargs))
+        self.node_duration = r(Histogram('kfp_node_duration_seconds', "Duration of finished nodes.", ('template', 'status'), **kwargs))
+        self.node_pending = r(Histogram('kfp_node_pending_seconds', "Time nodes were observed pending before starting.", ('template',), **kwargs))
+        self.nodes_running = r(Gauge('kfp_nodes_running', "Number of nodes currently running.", ('template',), **kwargs))
+        self.node_failures = r(Counter('kfp_node_failures_total', "Number of failed nodes.", ('template',), **kwargs))
+
+        self._streams: Dict[str, EventStream] = {}
+        # Only the IDs of finished runs are kept, so late snapshots are ignored without holding their streams
+        self._finished: set = set()
+        self._created_at: Dict[Tuple[str, str], object] = {}
+        # (started at, template) of running nodes
+        self._started_at: Dict[Tuple[str, str], Tuple[object, str]] = {}
+
+    def update(self, run_id: str, snapshot):
+        """
+        Process the latest snapshot of a run (any snapshot type supported by `utils.events`).
+        """
+        if run_id in self._finished:
+            return
+
+        stream = self._streams.get(run_id)
+        if stream is None:
+            stream = self._streams[run_id] = EventStream()
+            self.runs_active.inc()
+
+        for event in stream.update(snapshot):
+            self.handle(run_id, event, snapshot)
+
+    def handle(self, run_id: str, event: Event, snapshot=None):
+        template = event.template_name or event.display_name or 'unknown'
+        key = (run_id, event.node_id)
+
+        if event.kind == NODE_CREATED:
+            self._created_at[key] = utc_now()
+        elif event.kind == NODE_STARTED:
+            created_at = self._created_at.pop(key, None)
+            if created_at is not None and event.previous_phase is not None:
+                self.node_pending.observe(template, value=(utc_now() - created_at).total_seconds())
+            self._started_at[key] = (event.timestamp, template)
+            self.nodes_running.inc(template)
+        elif event.kind in (NODE_SUCCEEDED, NODE_FAILED, NODE_SKIPPED):
+            self._created_at.pop(key, None)
+            started_at, _ = self._started_at.pop(key, (None, None))
+            if started_at is not None:
+                self.nodes_running.dec(template)
+                self.node_duration.observe(template, event.phase, value=(event.timestamp - started_at).total_seconds())
+            if event.kind == NODE_FAILED:
+                self.node_failures.inc(template)
+        elif event.kind == RUN_FINISHED:
+            self.runs_active.dec()
+            self.runs_finished.inc(event.phase)
+            started_at = getattr(snapshot, 'started_at', None) or getattr(snapshot, 'created_at', None)
+            if started_at is not None:
+                self.run_duration.observe(event.phase, value=(event.timestamp - started_at).total_seconds())
+
+            # Nothing else will arrive for this run, nodes left running (e.g. the run was terminated) stop counting
+            for k, (_, node_template) in [(k, v) for k, v in self._started_at.items() if k[0] == run_id]:
+                del self._started_at[k]
+                self.nodes_running.dec(node_template)
+            self._created_at = {k: v for k, v in self._created_at.items() if k[0] != run_id}
+            self._streams.pop(run_id, None)
+            self._finished.add(run_id)
+
+if __name__ == '__main__':
+    import time
+
+    from kfp import Client
+
+    from utils.run_data import RunData
+    from samples.pipelines import complex_timed
+
+    client = Client()
+    result = client.create_run_from_pipeline_func(complex_timed, arguments={"base_time": 3})
+
+    metrics = RunMetrics()
+    serve(metrics.registry, port=9090)
+    print("Serving metrics on http://localhost:9090/metrics")
+
+    while True:
+        data = RunData.from_run_detail(client.get_run(result.run_id), client=client)
+        metrics.update(result.run_id, data)
+
+        if data.status in ('Succeeded', 'Failed'):
+            break
+
+        time.sleep(1)
+
+    print(metrics.registry.render())
@@ -0,0 +1,370 @@
+"""
+Resource efficiency of runs: what each pod reserved from the cluster (container requests multiplied by the node duration) against what it used, when a metrics source is available.
+
+Reserved capacity is reported in core-seconds and GB-seconds (GiB, `2**30` bytes). When a container only sets limits, Kubernetes uses the limits as requests, and so does this report.
+
+```python
+report = ResourceReport(metrics=ProfileMetrics())
+for run in runs:
+    report.add_run(run)
+report.display()
+```
+"""
+from __future__ import annotations
+
+import json
+import re
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional
+
+from utils.run_data import NodeData, RunData
+
+GIB = 2 ** 30
+
+MEMORY_SUFFIXES = {
+    'Ki': 2 ** 10, 'Mi': 2 ** 20, 'Gi': 2 ** 30, 'Ti': 2 ** 40, 'Pi': 2 ** 50, 'Ei': 2 ** 60,
+    'k': 10 ** 3, 'K': 10 ** 3, 'M': 10 ** 6, 'G': 10 ** 9, 'T': 10 ** 12, 'P': 10 ** 15, 'E': 10 ** 18,
+    'm': 10 ** -3,
+}
+QUANTITY_PATTERN = re.compile(r'^([0-9.eE+-]+?)([A-Za-z]*)$')
+
+def parse_cpu(quantity) -> float:
+    """
+    Parse a Kubernetes CPU quantity (`"500m"`, `"2"`, `1.5`) into cores.
+    """
+    quantity = str(quantity).strip()
+    if quantity.endswith('m'):
+        return float(quantity[:-1]) / 1000
+
+    return float(quantity)
+
+def parse_memory(quantity) -> float:
+    """
+    Parse a Kubernetes memory quantity (`"512Mi"`, `"1G"`, `"1e9"`) into bytes.
+    """
+    match = QUANTITY_PATTERN.match(str(quantity).strip())
+    assert match is not None, "Could not parse memory quantity: %s" % quantity
+
+    number, suffix = match.groups()
+    assert suffix in MEMORY_SUFFIXES or suffix == '', "Unknown memory suffix '%s' in: %s" % (suffix, quantity)
+
+    return float(number) * MEMORY_SUFFIXES.get(suffix, 1)
+
+@dataclass
+class Resources:
+    cpu_request: Optional[float] = None
+    cpu_limit: Optional[float] = None
+    memory_request: Optional[float] = None
+    memory_limit: Optional[float] = None
+
+    @classmethod
+    def from_template(cls, template: dict) -> Resources:
+        resources = template.get('container', template.get('script', {})).get('resources', {})
+        requests = resources.get('requests', {})
+        limits = resources.get('limits', {})
+
+        return cls(
+            cpu_request=parse_cpu(requests['cpu']) if 'cpu' in requests else None,
+            cpu_limit=parse_cpu(limits['cpu']) if 'cpu' in limits else None,
+            memory_request=parse_memory(requests['memory']) if 'memory' in requests else None,
+            memory_limit=parse_memory(limits['memory']) if 'memory' in limits else None,
+        )
+
+    @property
+    def cpu(self) -> Optional[float]:
+        return self.cpu_request if self.cpu_request is not None else self.cpu_limit
+
+    @property
+    def memory(self) -> Optional[float]:
+        return self.memory_request if self.memory_request is not None else self.memory_limit
+
+@dataclass
+class Usage:
+    # Average cores used over the pod's lifetime
+    cpu: Optional[float] = None
+    # Peak bytes used
+    memory: Optional[float] = None
+
+# Returns the usage of a pod, or `None` if unknown
+MetricsSource = Callable[[NodeData], Optional[Usage]]
+
+class StaticMetrics:
+    """
+    Usage by component display name, e.g. from a load test or a local run of the component.
+    """
+    def __init__(self, usage: Dict[str, Usage]):
+        self.usage = usage
+
+    def __call__(self, node: NodeData) -> Optional[Usage]:
+        return self.usage.get(node.display_name)
+
+class ProfileMetrics:
+    """
+    Peak memory of components built with `samples/components/profiling.py`, read from their metrics artifact (requires the run's client).
+    """
+    def __call__(self, node: NodeData) -> Optional[Usage]:
+        try:
+            profile = node.profile()
+        except (AssertionError, KeyError, StopIteration):
+            return None
+
+        return Usage(memory=profile.get('peak-rss-bytes'))
+
+class PrometheusMetrics:
+    """
+    Usage from the cAdvisor metrics in a Prometheus server, queried at the time each pod finished.
+
+    Args:
+        url (str): Base URL of the Prometheus server, e.g. `http://localhost:9090`.
+        container (str): Container to query, KFP v1 runs components in `main`.
+    """
+    def __init__(self, url: str, container: str = 'main', timeout: float = 10.0):
+        self.url = url.rstrip('/')
+        self.container = container
+        self.timeout = timeout
+
+    def _query(self, query: str, at: float) -> Optional[float]:
+        params = urllib.parse.urlencode({'query': query, 'time': at})
+        with urllib.request.urlopen(f"{self.url}/api/v1/query?{params}", timeout=self.timeout) as response:
+            result = json.load(response)['data']['result']
+
+        if not result:
+            return None
+
+        return float(result[0]['value'][1])
+
+    def __call__(self, node: NodeData) -> Optional[Usage]:
+        if node.finished_at is None:
+            return None
+
+        seconds = max(int(node.duration.total_seconds()), 1)
+        # NOTE: Argo names KFP v1 pods after their node ID
+        selector = f'pod="{node.node_id}",container="{self.container}"'
+        at = node.finished_at.timestamp()
+
+        cpu_seconds = self._query(f"increase(container_cpu_usage_seconds_total{{{selector}}}[{seconds}s])", at)
+        memory = self._query(f"max_over_time(container_memory_working_set_bytes{{{selector}}}[{seconds}s])", at)
+
+        return Usage(
+            cpu=cpu_seconds / seconds if cpu_seconds is not None else None,
+            memory=memory,
+        )
+
+@dataclass
+class NodeEfficiency:
+    run_id: str
+    component: str
+    node_id: str
+    seconds: float
+    resources: Resources
+    usage: Optional[Usage] = None
+
+    @property
+    def reserved_core_seconds(self) -> float:
+        return (self.resources.cpu or 0.0) * self.seconds
+
+    @property
+    def reserved_gb_seconds(self) -> float:
+        return (self.resources.memory or 0.0) / GIB * self.seconds
+
+    @property
+    def used_core_seconds(self) -> Optional[float]:
+        if self.usage is None or self.usage.cpu is None:
+            return None
+
+        return self.usage.cpu * self.seconds
+
+    @property
+    def used_gb_seconds(self) -> Optional[float]:
+        if self.usage is None or self.usage.memory is None:
+            return None
+
+        # NOTE: Peak memory held for the whole duration, so an upper bound on what was used
+        return self.usage.memory / GIB * self.seconds
+
+@dataclass
+class ComponentEfficiency:
+    component: str
+    pods: int = 0
+    seconds: float = 0.0
+    reserved_core_seconds: float = 0.0
+    reserved_gb_seconds: float = 0.0
+    # Only over pods with usage, so that efficiency compares like with like
+    measured_reserved_core_seconds: float = 0.0
+    measured_reserved_gb_seconds: float = 0.0
+    used_core_seconds: float = 0.0
+    used_gb_seconds: float = 0.0
+
+    def add(self, node: NodeEfficiency):
+        self.pods += 1
+        self.seconds += node.seconds
+        self.reserved_core_seconds += node.reserved_core_seconds
+        self.reserved_gb_seconds += node.reserved_gb_seconds
+
+        if node.used_core_seconds is not None:
+            self.measured_reserved_core_seconds += node.reserved_core_seconds
+            self.used_core_seconds += node.used_core_seconds
+        if node.used_gb_seconds is not None:
+            self.measured_reserved_gb_seconds += node.reserved_gb_seconds
+            self.used_gb_seconds += node.used_gb_seconds
+
+    @property
+    def cpu_efficiency(self) -> Optional[float]:
+        if not self.measured_reserved_core_seconds:
+            return None
+
+        return self.used_core_seconds / self.measured_reserved_core_seconds
+
+    @property
+    def memory_efficiency(self) -> Optional[float]:
+        if not self.measured_reserved_gb_seconds:
+            return None
+
+        return self.used_gb_seconds / self.measured_reserved_gb_seconds
+
+    @property
+    def idle_core_seconds(self) -> float:
+        return max(self.measured_reserved_core_seconds - self.used_core_seconds, 0.0)
+
+    @property
+    def idle_gb_seconds(self) -> float:
+        return max(self.measured_reserved_gb_seconds - self.used_gb_seconds, 0.0)
+
+    def __str__(self) -> str:
+        def percent(value: Optional[float]) -> str:
+            return 'n/a' if value is None else f"{value:.0%}"
+
+        return f"Efficiency(component={self.component}, pods={self.pods}, core_seconds={self.reserved_core_seconds:.0f}, gb_seconds={self.reserved_gb_seconds:.0f}, cpu={percent(self.cpu_efficiency)}, memory={percent(self.memory_efficiency)})"
+
+class ResourceReport:
+    """
+    Reserved (and used) capacity per pod, aggregated per component and per run.
+
+    Args:
+        metrics (Optional[MetricsSource]): Usage of each pod, e.g. `StaticMetrics`, `ProfileMetrics` or `PrometheusMetrics`.
+    """
+    def __init__(self, metrics: Optional[MetricsSource] = None):
+        self.metrics = metrics
+        self.nodes: List[NodeEfficiency] = []
+        self.components: Dict[str, ComponentEfficiency] = {}
+        self.runs: Dict[str, ComponentEfficiency] = {}
+
+    @classmethod
+    def from_runs(cls, runs: Iterable[RunData], metrics: Optional[MetricsSource] = None) -> ResourceReport:
+        report = cls(metrics=metrics)
+        for run in runs:
+            report.add_run(run)
+
+        return report
+
+    def add_run(self, run: RunData):
+        templates = {t['name']: t for t in run.workflow_manifest['spec']['templates']}
+        resources = {}
+        run_totals = self.runs.setdefault(run.run_id, ComponentEfficiency(run.run_name))
+
+        for node in run.nodes.values():
+            if node.started_at is None or node.finished_at is None:
+                continue
+
+            if node.template_name not in resources:
+                resources[node.template_name] = Resources.from_template(templates[node.template_name])
+
+            efficiency = NodeEfficiency(
+                run_id=run.run_id,
+                component=node.display_name,
+                node_id=node.node_id,
+                seconds=node.duration.total_seconds(),
+                resources=resources[node.template_name],
+                usage=self.metrics(node) if self.metrics is not None else None,
+            )
+            self.nodes.append(efficiency)
+            self.components.setdefault(efficiency.component, ComponentEfficiency(efficiency.component)).add(efficiency)
+            run_totals.add(efficiency)
+
+    def over_provisioned(self, n: int = 10, resource: Optional[str] = None) -> List[ComponentEfficiency]:
+        """
+        Components ranked by reserved but unused capacity, falling back to reserved capacity for components without usage.
+
+        Core-seconds and GB-seconds can not be added up, by default each is taken as a share of the capacity reserved by all components, so a component idling 10% of all reserved CPU ranks with one idling 10% of all reserved memory.
+
+        Args:
+            n (int): Number of components.
+            resource (Optional[str]): `'cpu'` or `'memory'` to rank by that resource alone, in its own unit.
+        """
+        assert resource in (None, 'cpu', 'memory'), f"Unknown resource '{resource}', expected 'cpu' or 'memory'."
+
+        components = self.components.values()
+        total_core_seconds = sum(c.reserved_core_seconds for c in components)
+        total_gb_seconds = sum(c.reserved_gb_seconds for c in components)
+
+        def share(core_seconds: float, gb_seconds: float) -> float:
+            if resource == 'cpu':
+                return core_seconds
+            if resource == 'memory':
+                return gb_seconds
+
+            return (
+                (core_seconds / total_core_seconds if total_core_seconds else 0.0)
+                + (gb_seconds / total_gb_seconds if total_gb_seconds else 0.0)
+            )
+
+        def idle(c: ComponentEfficiency) -> tuple:
+            if c.cpu_efficiency is None and c.memory_efficiency is None:
+                return (0, share(c.reserved_core_seconds, c.reserved_gb_seconds))
+
+            return (1, share(c.idle_core_seconds, c.idle_gb_seconds))
+
+        return sorted(components, key=idle, reverse=True)[:n]
+
+    def unreserved(self) -> List[str]:
+        """
+        Components without CPU or memory requests (or limits), which the report can not account for.
+        """
+        return sorted({
+            n.component for n in self.nodes
+            if n.resources.cpu is None or n.resources.memory is None
+        })
+
+    def to_records(self) -> Dict[str, List]:
+        columns = defaultdict(list)
+        for node in self.nodes:
+            columns['run_id'].append(node.run_id)
+            columns['component'].append(node.component)
+            columns['node_id'].append(node.node_id)
+            columns['seconds'].append(node.seconds)
+            columns['cpu_request'].append(node.resources.cpu)
+            columns['memory_request'].append(node.resources.memory)
+            columns['reserved_core_seconds'].append(node.reserved_core_seconds)
+            columns['reserved_gb_seconds'].append(node.reserved_gb_seconds)
+            columns['used_core_seconds'].append(node.used_core_seconds)
+            columns['used_gb_seconds'].append(node.used_gb_seconds)
+
+        return dict(columns)
+
+    def display(self):
+        print("Runs:")
+        for run_id, totals in self.runs.items():
+            print(f"  {run_id}: {totals}")
+        print("Most over-provisioned components:")
+        for component in self.over_provisioned():
+            print(f"  {component}")
+
+        unreserved = self.unreserved()
+        if unreserved:
+            print(f"Without requests or limits: {', '.join(unreserved)}")
+
+if __name__ == '__main__':
+    from kfp import Client
+
+    from samples.pipelines import profiled_timed
+
+    client = Client()
+    result = client.create_run_from_pipeline_func(profiled_timed, arguments={"base_time": 3})
+    run_detail = result.wait_for_run_completion(600)
+
+    report = ResourceReport(metrics=ProfileMetrics())
+    report.add_run(RunData.from_run_detail(run_detail, client=client))
+    report.display()
@@ -0,0 +1,345 @@
+"""
+Retention policy for finished runs: deletes the KFP run, its Argo workflow object, and its artifacts in the object store.
+
+Runs are selected when they are older than `max_age`, or beyond the newest `keep_last` runs of their pipeline. Runs which have not finished are never selected. Argo workflows which finished before `max_age` and have no KFP run left (e.g. the run was deleted but the workflow was not) are also selected.
+
+```python
+plan = plan_retention(client, RetentionPolicy(max_age=timedelta(days=7), keep_last=20), custom_objects_api=api, namespace='kubeflow')
+print(plan)
+apply_retention(plan, client, custom_objects_api=api, storage_options=STORAGE_OPTIONS, dry_run=False)
+```
+"""
+from __future__ import annotations
+
+import json
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Iterator, List, Optional
+
+from utils.throttle import RateLimiter
+from utils.timestamps import parse_datetime, utc_now
+
+TERMINAL_PHASES = ('Succeeded', 'Failed', 'Error', 'Skipped')
+
+WORKFLOW_GROUP = 'argoproj.io'
+WORKFLOW_VERSION = 'v1alpha1'
+WORKFLOW_PLURAL = 'workflows'
+RUN_ID_LABEL = 'pipeline/runid'
+
+def _aware(dt: Optional[datetime]) -> Optional[datetime]:
+    if dt is None or dt.tzinfo is not None:
+        return dt
+
+    return dt.replace(tzinfo=timezone.utc)
+
+def pipeline_name(run) -> str:
+    """
+    Default grouping for `keep_last`: the pipeline (or pipeline version) a run was created from.
+    """
+    spec = getattr(run, 'pipeline_spec', None)
+    if spec is not None and getattr(spec, 'pipeline_name', None):
+        return spec.pipeline_name
+
+    for reference in getattr(run, 'resource_references', None) or []:
+        if reference.key.type in ('PIPELINE', 'PIPELINE_VERSION') and reference.name:
+            return reference.name
+
+    # NOTE: Runs from `create_run_from_pipeline_func` have no pipeline, the run name starts with the function name
+    return run.name.split(' ')[0]
+
+@dataclass
+class RetentionPolicy:
+    max_age: Optional[timedelta] = None
+    keep_last: Optional[int] = None
+    group_by: Callable = pipeline_name
+
+@dataclass
+class RunTarget:
+    run_id: str
+    name: str
+    pipeline: str
+    created_at: datetime
+    reason: str
+    workflow_name: Optional[str] = None
+
+@dataclass
+class RetentionPlan:
+    runs: List[RunTarget] = field(default_factory=list)
+    # Workflows without a KFP run
+    workflows: List[str] = field(default_factory=list)
+    namespace: Optional[str] = None
+
+    def __str__(self) -> str:
+        pipelines = defaultdict(int)
+        for run in self.runs:
+            pipelines[run.pipeline] += 1
+        detail = ', '.join(f"{name}={count}" for name, count in sorted(pipelines.items()))
+
+        return f"RetentionPlan(runs={len(self.runs)}, orphan_workflows={len(self.workflows)}, by_pipeline=[{detail}])"
+
+def workflow_name_of_run(client, run_id: str) -> Optional[str]:
+    """
+    Name of the Argo workflow of a run from the manifest KFP keeps for it, available even when the workflow object itself was garbage collected.
+    """
+    runtime = client.get_run(run_id).pipeline_runtime
+    manifest = getattr(runtime, 'workflow_manifest', None)
+    if not manifest:
+        return None
+
+    return json.loads(manifest).get('metadata', {}).get('name')
+
+def list_runs(client, page_size: int = 100, **kwargs) -> Iterator:
+    """
+    Every KFP run, oldest first, following page tokens.
+    """
+    page_token = ''
+    while True:
+        response = client.list_runs(page_token=page_token, page_size=page_size, sort_by='created_at', **kwargs)
+        yield from response.runs or []
+
+        page_token = response.next_page_token
+        if not page_token:
+            return
+
+def list_workflows(custom_objects_api, namespace: str, page_size: int = 100) -> Iterator[dict]:
+    """
+    Every Argo workflow in `namespace`, following continue tokens.
+    """
+    token = None
+    while True:
+        kwargs = {'limit': page_size}
+        if token:
+            kwargs['_continue'] = token
+        response = custom_objects_api.list_namespaced_custom_object(
+            WORKFLOW_GROUP, WORKFLOW_VERSION, namespace, WORKFLOW_PLURAL, **kwargs
+        )
+        yield from response.get('items', [])
+
+        token = response.get('metadata', {}).get('continue')
+        if not token:
+            return
+
+def plan_retention(
+    client,
+    policy: RetentionPolicy,
+    custom_objects_api=None,
+    namespace: Optional[str] = None,
+    now: Optional[datetime] = None
+) -> RetentionPlan:
+    """
+    Select the runs (and orphaned workflows, when a Kubernetes API is given) to delete under `policy`.
+    """
+    assert policy.max_age is not None or policy.keep_last is not None, "Policy needs a 'max_age' and / or 'keep_last'."
+
+    now = now or utc_now()
+    cutoff = now - policy.max_age if policy.max_age is not None else None
+
+    workflows = {}
+    if custom_objects_api is not None:
+        assert namespace is not None, "Listing workflows requires a 'namespace'."
+        workflows = {
+            wf['metadata']['name']: wf
+            for wf in list_workflows(custom_objects_api, namespace)
+        }
+    workflow_of_run = {
+        wf['metadata'].get('labels', {}).get(RUN_ID_LABEL): name
+        for name, wf in workflows.items()
+    }
+
+    groups = defaultdict(list)
+    run_ids = set()
+    for run in list_runs(client):
+        run_ids.add(run.id)
+        if run.status in TERMINAL_PHASES:
+            groups[policy.group_by(run)].append(run)
+
+    plan = RetentionPlan(namespace=namespace)
+    for group, runs in groups.items():
+        # Newest first, so the first `keep_last` are kept
+        runs.sort(key=lambda r: _aware(r.created_at), reverse=True)
+        for i, run in enumerate(runs):
+            created_at = _aware(run.created_at)
+            if cutoff is not None and created_at < cutoff:
+                reason = 'max_age'
+            elif policy.keep_last is not None and i >= policy.keep_last:
+                reason = 'keep_last'
+            else:
+                continue
+
+            plan.runs.append(RunTarget(
+                run_id=run.id,
+                name=run.name,
+                pipeline=group,
+                created_at=created_at,
+                reason=reason,
+                workflow_name=workflow_of_run.get(run.id)
+            ))
+
+    if cutoff is not None:
+        for name, wf in workflows.items():
+            run_id = wf['metadata'].get('labels', {}).get(RUN_ID_LABEL)
+            status = wf.get('status', {})
+            finished_at = parse_datetime(status.get('finishedAt'))
+            if run_id in run_ids or status.get('phase') not in TERMINAL_PHASES:
+                continue
+            if finished_at is not None and finished_at < cutoff:
+                plan.workflows.append(name)
+
+    return plan
+
+@dataclass
+class RetentionResult:
+    deleted_runs: int = 0
+    deleted_workflows: int = 0
+    deleted_objects: int = 0
+    # Runs kept because their workflow, and so their artifacts, could not be resolved
+    skipped_runs: List[str] = field(default_factory=list)
+    errors: List[str] = field(default_factory=list)
+
+    def __str__(self) -> str:
+        return f"RetentionResult(runs={self.deleted_runs}, workflows={self.deleted_workflows}, objects={self.deleted_objects}, skipped={len(self.skipped_runs)}, errors={len(self.errors)})"
+
+def apply_retention(
+    plan: RetentionPlan,
+    client,
+    custom_objects_api=None,
+    storage_options: Optional[dict] = None,
+    bucket: str = 'mlpipeline',
+    artifact_prefix: str = 'artifacts',
+    dry_run: bool = True,
+    max_workers: int = 8,
+    rate: float = 20.0,
+    progress_every: int = 50
+) -> RetentionResult:
+    """
+    Delete everything in `plan`. For each run its artifacts are deleted first, then the KFP run, then its workflow object.
+
+    Runs whose workflow was not listed while planning have its name resolved from the run first (see `workflow_name_of_run`). When that fails while artifacts are to be deleted, the run is kept and reported in `skipped_runs`: deleting it would orphan its artifacts for good.
+
+    Args:
+        plan (RetentionPlan): From `plan_retention`.
+        client (Client): KFP client.
+        custom_objects_api (Optional[CustomObjectsApi]): Required to delete workflow objects.
+        storage_options (Optional[dict]): `endpoint_url`, `key` and `secret` of the artifact store (see `STORAGE_OPTIONS` in `manifests/seaweedfs_host_path/scripts`), artifacts are kept when not provided.
+        bucket (str): Artifact bucket, `mlpipeline` in a default install.
+        artifact_prefix (str): Argo writes artifacts of a workflow under `<artifact_prefix>/<workflow name>/`.
+        dry_run (bool): Only print what would be deleted.
+        max_workers (int): Maximum concurrent deletions.
+        rate (float): Maximum API requests per second across workers.
+    """
+    result = RetentionResult()
+    if dry_run:
+        for run in plan.runs:
+            print(f"Would delete run {run.name} ({run.run_id}, {run.reason}), workflow {run.workflow_name or 'resolved from the run'}")
+        for name in plan.workflows:
+            print(f"Would delete orphaned workflow {name}")
+        return result
+
+    fs = None
+    if storage_options is not None:
+        import s3fs
+
+        fs = s3fs.S3FileSystem(
+            key=storage_options['key'],
+            secret=storage_options['secret'],
+            client_kwargs={'endpoint_url': storage_options['endpoint_url']}
+        )
+
+    limiter = RateLimiter(rate)
+    lock = threading.Lock()
+
+    def delete_artifacts(workflow_name: str) -> int:
+        path = f"{bucket}/{artifact_prefix}/{workflow_name}"
+        with limiter:
+            objects = fs.find(path)
+        if objects:
+            with limiter:
+                fs.rm(objects)
+
+        return len(objects)
+
+    def delete_workflow(name: str):
+        with limiter:
+            try:
+                custom_objects_api.delete_namespaced_custom_object(
+                    WORKFLOW_GROUP, WORKFLOW_VERSION, plan.namespace, WORKFLOW_PLURAL, name
+                )
+            except Exception as e:
+                # NOTE: Deleting the KFP run may already have removed the workflow
+                if getattr(e, 'status', None) != 404:
+                    raise
+                return
+        with lock:
+            result.deleted_workflows += 1
+
+    def delete_run(run: RunTarget):
+        if run.workflow_name is None and (fs is not None or custom_objects_api is not None):
+            with limiter:
+                run.workflow_name = workflow_name_of_run(client, run.run_id)
+        if run.workflow_name is None and fs is not None:
+            with lock:
+                result.skipped_runs.append(run.run_id)
+            print(f"Keeping run {run.name} ({run.run_id}), its workflow name and so its artifacts are unknown")
+            return
+
+        if fs is not None:
+            objects = delete_artifacts(run.workflow_name)
+            with lock:
+                result.deleted_objects += objects
+
+        with limiter:
+            client.runs.delete_run(run.run_id)
+        with lock:
+            result.deleted_runs += 1
+
+        if run.workflow_name is not None and custom_objects_api is not None:
+            delete_workflow(run.workflow_name)
+
+    def delete_orphan(name: str):
+        if fs is not None:
+            objects = delete_artifacts(name)
+            with lock:
+                result.deleted_objects += objects
+        delete_workflow(name)
+
+    total = len(plan.runs) + (len(plan.workflows) if custom_objects_api is not None else 0)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(delete_run, run): run.run_id for run in plan.runs}
+        if custom_objects_api is not None:
+            futures.update({pool.submit(delete_orphan, name): name for name in plan.workflows})
+
+        for done, future in enumerate(as_completed(futures), start=1):
+            try:
+                future.result()
+            except Exception as e:
+                result.errors.append(f"{futures[future]}: {e}")
+
+            if done % progress_every == 0 or done == total:
+                print(f">>> {done} / {total}: {result}")
+
+    return result
+
+if __name__ == '__main__':
+    import os
+    import sys
+
+    from kfp import Client
+    from kubernetes import config as k8s_config, client as k8s_client
+
+    client = Client()
+    k8s_config.load_kube_config()
+    api = k8s_client.CustomObjectsApi()
+    namespace = client.get_user_namespace() or 'kubeflow'
+
+    plan = plan_retention(client, RetentionPolicy(max_age=timedelta(days=7), keep_last=20), custom_objects_api=api, namespace=namespace)
+    print(plan)
+
+    storage_options = {
+        'endpoint_url': 'http://localhost:8333',
+        'key': os.environ['S3_ACCESS_KEY'],
+        'secret': os.environ['S3_SECRET_KEY'],
+    }
+    print(apply_retention(plan, client, custom_objects_api=api, storage_options=storage_options, dry_run='--delete' not in sys.argv))
@@ -2,8 +2,8 @@ from __future__ import annotations
 
 import json
 import tarfile
-from datetime import datetime, timedelta, timezone
-from typing import Optional, Dict, List
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Optional, Dict, List
 from io import BytesIO
 from base64 import b64decode
 
@@ -13,14 +13,28 @@ from kfp import Client
 from kfp_server_api.models import ApiRunDetail
 from kfp_server_api.models import ApiPipelineRuntime
 
-def utc_now() -> timezone:
-    return datetime.now(tz=timezone.utc)
+from utils.timestamps import parse_datetime, utc_now
 
-def parse_datetime(dt_str: str) -> datetime:
-    dt = datetime.strptime(dt_str, "%Y-%m-%dT%H:%M:%SZ")
-    assert dt_str.endswith("Z"), "Does not appear to be Zulu (UTC) timestamp"
+if TYPE_CHECKING:
+    from utils.artifacts import ArtifactReader
 
-    return dt.replace(tzinfo=timezone.utc)
+def join_profile(metrics: Dict[str, float], started_at: Optional[datetime], finished_at: Optional[datetime]) -> Dict[str, float]:
+    """
+    Join the metrics emitted by a profiled component (see `samples/components/profiling.py`) with the Argo node timings, which have second resolution.
+
+    Returns:
+        Dict[str, float]: The profiling metrics plus, once the node started, `launcher-seconds` (node start until the interpreter started, e.g. scheduling, image pulls, package installs) and, once it finished, `node-seconds` (Argo duration) and `teardown-seconds` (interpreter exit until the node finished).
+    """
+    profile = dict(metrics)
+    if started_at is None:
+        return profile
+
+    profile['launcher-seconds'] = profile['process-start'] - started_at.timestamp()
+    if finished_at is not None:
+        profile['node-seconds'] = (finished_at - started_at).total_seconds()
+        profile['teardown-seconds'] = finished_at.timestamp() - profile['process-end']
+
+    return profile
 
 class StatusMixin:
     @property
@@ -74,6 +88,10 @@ class NodeData(StatusMixin):
 
         return parse_datetime(finished_at)
 
+    @property
+    def template_name(self) -> str:
+        return self.node['templateName']
+
     @property
     def status(self) -> str:
         return self.node['phase']
@@ -105,10 +123,33 @@ class NodeData(StatusMixin):
     def pull_logs(self) -> str:
         return self._pull_artifact('main-logs', is_tarfile=False)
 
+    def pull_metrics(self) -> Dict[str, float]:
+        data = self._pull_artifact('mlpipeline-metrics')
+        # NOTE: Single file in the tarfile, named after the output path in the container
+        metrics = json.loads(next(iter(data.values())))['metrics']
+
+        return {m['name']: m['numberValue'] for m in metrics}
+
+    def profile(self) -> Dict[str, float]:
+        """
+        Join the metrics emitted by a profiled component (see `samples/components/profiling.py`) with the Argo node timings, see `join_profile`.
+        """
+        return join_profile(self.pull_metrics(), self.started_at, self.finished_at)
+
     def _pull_artifact(self, artifact_name: str, is_tarfile: bool = True):
         valid_names = [a['name'] for a in self.node['outputs']['artifacts']]
         assert artifact_name in valid_names, "Artifact '%s' not found in artifact names for component: %s" % (artifact_name, valid_names)
 
+        if self.run.artifact_reader is not None:
+            return self.run.artifact_reader.read(
+                self.run.run_id,
+                self.node,
+                artifact_name,
+                is_tarfile=is_tarfile,
+                workflow_manifest=self.run.workflow_manifest,
+                client=self.client
+            )
+
         assert self.client is not None, "Pulling artifacts requires access to a KFP client, please provide one while constructing associated 'RunData' object."
 
         # Reference https://github.com/kubeflow/pipelines/issues/4327#issuecomment-687255001
@@ -143,32 +184,44 @@ class RunData:
     def from_run_detail(
         cls,
         run_detail: ApiRunDetail,
-        client: Optional[Client] = None
+        client: Optional[Client] = None,
+        artifact_reader: Optional[ArtifactReader] = None
     ):
         return cls.from_pipeline_runtime(
             pipeline_runtime=run_detail.pipeline_runtime,
-            client=client
+            client=client,
+            artifact_reader=artifact_reader
         )
 
     @classmethod
     def from_pipeline_runtime(
         cls,
         pipeline_runtime: ApiPipelineRuntime,
-        client: Optional[Client] = None
+        client: Optional[Client] = None,
+        artifact_reader: Optional[ArtifactReader] = None
     ):
         workflow_manifest = json.loads(pipeline_runtime.workflow_manifest)
         return cls(
             workflow_manifest=workflow_manifest,
-            client=client
+            client=client,
+            artifact_reader=artifact_reader
         )
 
     def __init__(
         self,
         workflow_manifest: dict,
-        client: Optional[Client] = None
+        client: Optional[Client] = None,
+        artifact_reader: Optional[ArtifactReader] = None
     ):
+        """
+        Args:
+            workflow_manifest (dict): Argo workflow of the run.
+            client (Optional[Client]): KFP client, required to pull artifacts through the API server.
+            artifact_reader (Optional[ArtifactReader]): Pull artifacts directly from the object store instead, see `utils/artifacts.py`.
+        """
         self.workflow_manifest = workflow_manifest
         self.client = client
+        self.artifact_reader = artifact_reader
 
         self._parse_nodes()
 
@@ -269,7 +322,7 @@ if __name__ == '__main__':
 
     from kfp import Client
 
-    from dump import dump_manifests
+    from utils.dump import dump_manifests
     from samples.pipelines import simple_timed, errors
 
     client = Client()
@@ -0,0 +1,228 @@
+"""
+Controller scaling sweeps over the synthetic pipelines from `samples/pipelines/synthetic.py`: how per-node overhead and controller latency grow with fan-out width.
+
+For each finished run, every pod is compared against the Argo DAG:
+
+- lag: from the moment the pod's dependencies were all done (or the run started) until the pod started, the time the controller took to notice and create it,
+- overhead: the pod's duration beyond the requested sleep, i.e. container startup and teardown,
+- start rate: pods started per second across the run,
+- overhead share: the part of the makespan not explained by the sleeps on the critical path (replayed with `Scheduler` under the run's parallelism).
+
+Argo records timestamps with second resolution, lags and overheads below a second are noise. `check_offline` compiles each configuration and checks its expansion without a cluster.
+
+```bash
+python -m utils.scaling --widths 10,100,1000 --check
+python -m utils.scaling --widths 10,30,100,300,1000,3000,10000 --output sweep.json
+```
+"""
+from __future__ import annotations
+
+import json
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Sequence
+
+from utils.stats import percentile
+from utils.timestamps import parse_timestamp
+from utils.workflow_dag import Scheduler, WorkflowDag, loop_counts_from_status
+
+@dataclass
+class SweepPoint:
+    width: int
+    depth: int
+    chain: int
+    sleep_seconds: int
+    pods: int
+    makespan: float
+    ideal_makespan: float
+    lag_p50: float
+    lag_p90: float
+    lag_max: float
+    overhead_p50: float
+    overhead_p90: float
+    start_rate: float
+
+    @property
+    def overhead_share(self) -> float:
+        if self.makespan <= 0:
+            return 0.0
+
+        return 1.0 - self.ideal_makespan / self.makespan
+
+    def __str__(self) -> str:
+        return (
+            f"SweepPoint(width={self.width}, pods={self.pods}, makespan={self.makespan:.0f}s, ideal={self.ideal_makespan:.0f}s, "
+            f"lag p50/p90/max={self.lag_p50:.0f}/{self.lag_p90:.0f}/{self.lag_max:.0f}s, overhead p50={self.overhead_p50:.1f}s, "
+            f"start_rate={self.start_rate:.1f}/s)"
+        )
+
+def measure(workflow_manifest: dict, sleep_seconds: float = 0.0, width: int = 0, depth: int = 0, chain: int = 0) -> SweepPoint:
+    """
+    Overheads and lags of a finished run from its workflow manifest. `width`, `depth` and `chain` are only recorded.
+    """
+    dag = WorkflowDag(workflow_manifest, loop_counts=loop_counts_from_status(workflow_manifest))
+    status = workflow_manifest['status']
+    run_started_at = parse_timestamp(status.get('startedAt'))
+    run_finished_at = parse_timestamp(status.get('finishedAt'))
+
+    started: Dict[int, float] = {}
+    finished: Dict[int, float] = {}
+    for node in status.get('nodes', {}).values():
+        task = dag.find(node['name'])
+        if task is None or task.kind != 'Pod':
+            continue
+        if node.get('startedAt'):
+            started[task.index] = parse_timestamp(node['startedAt'])
+        if node.get('finishedAt'):
+            finished[task.index] = parse_timestamp(node['finishedAt'])
+
+    # Finish of every node, DAGs finish with the last pod beneath them
+    done_at: List[Optional[float]] = [finished.get(n.index) for n in dag.nodes]
+    for node in reversed(dag.nodes):
+        if node.kind == 'DAG':
+            children = [done_at[c] for c in node.children if done_at[c] is not None]
+            done_at[node.index] = max(children, default=None)
+
+    # When each node's dependencies were satisfied, nodes without any inherit their parent's
+    ready_at: List[Optional[float]] = [None] * len(dag.nodes)
+    for node in dag.nodes:
+        if node.dependencies:
+            dependencies = [done_at[d] for d in node.dependencies]
+            ready_at[node.index] = None if None in dependencies else max(dependencies)
+        elif node.parent >= 0:
+            ready_at[node.index] = ready_at[node.parent]
+        else:
+            ready_at[node.index] = run_started_at
+
+    lags = [
+        started[i] - ready_at[i]
+        for i in started
+        if ready_at[i] is not None
+    ]
+    overheads = [
+        finished[i] - started[i] - sleep_seconds
+        for i in finished
+        if i in started
+    ]
+
+    starts = sorted(started.values())
+    start_span = starts[-1] - starts[0] if starts else 0.0
+
+    durations = [sleep_seconds if node.kind == 'Pod' else 0.0 for node in dag.nodes]
+    makespan = run_finished_at - run_started_at if run_started_at is not None and run_finished_at is not None else 0.0
+
+    return SweepPoint(
+        width=width,
+        depth=depth,
+        chain=chain,
+        sleep_seconds=sleep_seconds,
+        pods=len(dag.pods),
+        makespan=makespan,
+        ideal_makespan=Scheduler(dag).makespan(durations),
+        lag_p50=percentile(lags, 50) if lags else 0.0,
+        lag_p90=percentile(lags, 90) if lags else 0.0,
+        lag_max=max(lags, default=0.0),
+        overhead_p50=percentile(overheads, 50) if overheads else 0.0,
+        overhead_p90=percentile(overheads, 90) if overheads else 0.0,
+        # NOTE: A single pod (or all at once within a second) has no meaningful rate
+        start_rate=(len(starts) - 1) / start_span if start_span > 0 else 0.0,
+    )
+
+def find_knee(points: Sequence[SweepPoint], factor: float = 2.0) -> Optional[SweepPoint]:
+    """
+    First point whose p90 controller lag is more than `factor` times that of the narrowest run, the fan-out at which per-node overhead starts to dominate.
+    """
+    if not points:
+        return None
+
+    points = sorted(points, key=lambda p: p.width)
+    # NOTE: Floor at the timestamp resolution, otherwise any lag at all is infinitely worse than none
+    baseline = max(points[0].lag_p90, 1.0)
+    for point in points[1:]:
+        if point.lag_p90 > factor * baseline:
+            return point
+
+    return None
+
+def check_offline(widths: Sequence[int], depth: int = 1, chain: int = 1, sleep_seconds: int = 0) -> Dict[int, float]:
+    """
+    Compile the synthetic pipeline for every width and check that it expands to the expected number of pods, no cluster needed.
+
+    Returns:
+        Dict[int, float]: Compile seconds by width.
+    """
+    from utils.simulator import compile_workflow
+    from samples.pipelines import make_synthetic, synthetic_pod_count
+
+    compile_seconds = {}
+    for width in widths:
+        start = time.perf_counter()
+        workflow = compile_workflow(make_synthetic(width=width, depth=depth, chain=chain, sleep_seconds=sleep_seconds))
+        compile_seconds[width] = time.perf_counter() - start
+
+        pods = len(WorkflowDag(workflow).pods)
+        expected = synthetic_pod_count(width, depth, chain)
+        assert pods == expected, f"Width {width} expanded to {pods} pods, expected {expected}."
+        print(f">>> width={width}: {pods} pods, compiled in {compile_seconds[width]:.2f}s")
+
+    return compile_seconds
+
+def run_sweep(
+    client,
+    widths: Sequence[int],
+    depth: int = 1,
+    chain: int = 1,
+    sleep_seconds: int = 0,
+    timeout: int = 3600,
+    output: Optional[str] = None
+) -> List[SweepPoint]:
+    """
+    Run the synthetic pipeline once per width, one run at a time so runs do not compete for the controller.
+
+    Args:
+        client (Client): KFP client.
+        widths (Sequence[int]): Fan-out widths, e.g. 10 to 10,000.
+        timeout (int): Seconds to wait for each run.
+        output (Optional[str]): JSON file the points are written to after every run, so an interrupted sweep keeps what it measured.
+    """
+    from samples.pipelines import make_synthetic
+
+    points = []
+    for width in widths:
+        pipeline_func = make_synthetic(width=width, depth=depth, chain=chain, sleep_seconds=sleep_seconds)
+        result = client.create_run_from_pipeline_func(pipeline_func, arguments={})
+        run_detail = result.wait_for_run_completion(timeout)
+
+        workflow_manifest = json.loads(run_detail.pipeline_runtime.workflow_manifest)
+        point = measure(workflow_manifest, sleep_seconds, width=width, depth=depth, chain=chain)
+        points.append(point)
+        print(f">>> {point}")
+
+        if output is not None:
+            with open(output, 'w') as f:
+                json.dump([asdict(p) for p in points], f, indent=2)
+
+    knee = find_knee(points)
+    print(f">>> Knee: {'none' if knee is None else f'width {knee.width}'}")
+
+    return points
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Controller scaling sweep over synthetic pipelines")
+    parser.add_argument('--widths', default='10,30,100,300,1000,3000,10000', help="Comma separated fan-out widths")
+    parser.add_argument('--depth', type=int, default=1)
+    parser.add_argument('--chain', type=int, default=1)
+    parser.add_argument('--sleep', type=int, default=0, help="Seconds each node sleeps, 0 for no-op nodes")
+    parser.add_argument('--check', action='store_true', help="Only compile and check each configuration offline")
+    parser.add_argument('--output', default=None, help="JSON file for the sweep points")
+    args = parser.parse_args()
+
+    widths = [int(w) for w in args.widths.split(',')]
+    if args.check:
+        check_offline(widths, depth=args.depth, chain=args.chain, sleep_seconds=args.sleep)
+    else:
+        from kfp import Client
+
+        run_sweep(Client(), widths, depth=args.depth, chain=args.chain, sleep_seconds=args.sleep, output=args.output)
@@ -0,0 +1,191 @@
+"""
+Offline makespan simulation of a pipeline under different parallelism settings, without running it on the cluster.
+
+Pod durations are drawn from a `DurationHistory` of previous runs, and each pod additionally pays a startup latency (scheduling, image pull, launcher) during which it already holds its parallelism slot, the same as on Argo. The DAG is expanded and the scheduler prepared once per parallelism setting, so a trial is a single `Scheduler.run`.
+
+```python
+simulator = MakespanSimulator(compile_workflow(complex_timed), history, startup_latency=4.0)
+for parallelism, result in simulator.sweep([1, 2, 3, 5, 0]).items():
+    print(parallelism, result)
+```
+"""
+from __future__ import annotations
+
+import os
+import random
+import tempfile
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from utils.stats import percentile
+from utils.history import DurationHistory
+from utils.workflow_dag import Scheduler, WorkflowDag
+
+def compile_workflow(pipeline_func: Callable, **kwargs) -> dict:
+    """
+    Compile a KFP v1 pipeline function into the Argo workflow manifest used by `MakespanSimulator`.
+    """
+    # NOTE: Imported lazily, kfp takes a while to import and is not needed for manifests of existing runs
+    import yaml
+    from kfp import compiler
+
+    fd, path = tempfile.mkstemp(suffix='.yaml')
+    os.close(fd)
+    try:
+        compiler.Compiler().compile(pipeline_func, path, **kwargs)
+        with open(path, 'r') as f:
+            return yaml.safe_load(f)
+    finally:
+        os.remove(path)
+
+@dataclass(repr=False)
+class SimulationResult:
+    makespans: List[float]
+
+    def percentile(self, q: float) -> float:
+        return percentile(self.makespans, q)
+
+    @property
+    def mean(self) -> float:
+        return sum(self.makespans) / len(self.makespans)
+
+    @property
+    def p50(self) -> float:
+        return self.percentile(50)
+
+    @property
+    def p90(self) -> float:
+        return self.percentile(90)
+
+    @property
+    def p99(self) -> float:
+        return self.percentile(99)
+
+    def __repr__(self) -> str:
+        return f"SimulationResult(trials={len(self.makespans)}, mean={self.mean:.1f}s, p50={self.p50:.1f}s, p90={self.p90:.1f}s, p99={self.p99:.1f}s)"
+
+class MakespanSimulator:
+    """
+    Monte Carlo makespan of a workflow replayed by `utils.workflow_dag.Scheduler`.
+
+    Args:
+        workflow_manifest (dict): Compiled workflow (see `compile_workflow`) or `RunData.workflow_manifest`.
+        history (DurationHistory): Durations of previous runs, sampled per template.
+        startup_latency (Union[float, Sequence[float]]): Seconds between a pod taking its slot and the component starting, either constant or samples to draw from.
+        default_duration (float): Seconds assumed for pods without any history.
+        durations (Optional[Dict[str, Sequence[float]]]): Duration samples by template name which take precedence over `history`, e.g. to try a different chunking of a fan-out.
+        loop_counts (Optional[Dict[str, int]]): Iterations of `withParam` loops, see `WorkflowDag`.
+    """
+    def __init__(
+        self,
+        workflow_manifest: dict,
+        history: DurationHistory,
+        startup_latency: Union[float, Sequence[float]] = 0.0,
+        default_duration: float = 60.0,
+        durations: Optional[Dict[str, Sequence[float]]] = None,
+        loop_counts: Optional[Dict[str, int]] = None,
+        seed: Optional[int] = None
+    ):
+        self.dag = WorkflowDag(workflow_manifest, loop_counts=loop_counts)
+        self.rng = random.Random(seed)
+
+        if isinstance(startup_latency, (int, float)):
+            self.startup_latency: Tuple[float, ...] = (float(startup_latency),)
+        else:
+            self.startup_latency = tuple(startup_latency)
+        assert len(self.startup_latency) > 0, "Expected at least one startup latency sample"
+
+        # Resolve the samples of every pod once, trials only index into them
+        durations = durations or {}
+        self._pods: List[Tuple[int, Tuple[float, ...]]] = []
+        for pod in self.dag.pods:
+            samples = durations.get(pod.template_name) or history.samples(pod.template_name)
+            self._pods.append((pod.index, tuple(samples) or (default_duration,)))
+
+        self._schedulers: Dict[tuple, Scheduler] = {}
+
+    def scheduler(
+        self,
+        parallelism: Optional[int] = None,
+        template_parallelism: Optional[Dict[str, int]] = None
+    ) -> Scheduler:
+        key = (parallelism, tuple(sorted((template_parallelism or {}).items())))
+        if key not in self._schedulers:
+            self._schedulers[key] = Scheduler(self.dag, parallelism=parallelism, template_parallelism=template_parallelism)
+
+        return self._schedulers[key]
+
+    def simulate(
+        self,
+        trials: int = 1000,
+        parallelism: Optional[int] = None,
+        template_parallelism: Optional[Dict[str, int]] = None
+    ) -> SimulationResult:
+        """
+        Simulate `trials` runs of the workflow.
+
+        Args:
+            trials (int): Number of Monte Carlo trials.
+            parallelism (Optional[int]): Overrides the workflow's global parallelism, `0` for unlimited.
+            template_parallelism (Optional[Dict[str, int]]): Overrides the parallelism of DAG templates (e.g. `graph-graph-2` for a `SubGraph`), `0` for unlimited.
+
+        Returns:
+            SimulationResult: Makespan of each trial in seconds.
+        """
+        scheduler = self.scheduler(parallelism, template_parallelism)
+        choice = self.rng.choice
+        startup_latency = self.startup_latency
+        pods = self._pods
+
+        makespans = []
+        durations = [0.0] * len(self.dag.nodes)
+        for _ in range(trials):
+            for i, samples in pods:
+                durations[i] = choice(startup_latency) + choice(samples)
+            makespans.append(scheduler.makespan(durations))
+
+        return SimulationResult(makespans)
+
+    def sweep(
+        self,
+        parallelisms: Sequence[int],
+        trials: int = 1000,
+        template_name: Optional[str] = None
+    ) -> Dict[int, SimulationResult]:
+        """
+        Simulate each parallelism setting, either the global parallelism or that of the DAG template `template_name`.
+        """
+        results = {}
+        for parallelism in parallelisms:
+            if template_name is None:
+                results[parallelism] = self.simulate(trials, parallelism=parallelism)
+            else:
+                results[parallelism] = self.simulate(trials, template_parallelism={template_name: parallelism})
+
+        return results
+
+if __name__ == '__main__':
+    import time
+
+    from kfp import Client
+
+    from utils.run_data import RunData
+    from samples.pipelines import complex_timed
+
+    client = Client()
+
+    print("Creating runs for history...")
+    history = DurationHistory()
+    for _ in range(2):
+        result = client.create_run_from_pipeline_func(complex_timed, arguments={"base_time": 3})
+        history.add_run(RunData.from_run_detail(result.wait_for_run_completion(600)))
+
+    simulator = MakespanSimulator(compile_workflow(complex_timed), history, startup_latency=4.0)
+
+    start = time.perf_counter()
+    results = simulator.sweep([1, 2, 3, 5, 8, 0])
+    elapsed = time.perf_counter() - start
+
+    for parallelism, result in results.items():
+        print(f"parallelism={parallelism or 'unlimited'}: {result}")
+    print(f">>> {sum(len(r.makespans) for r in results.values()) / elapsed:.0f} trials per second")
@@ -0,0 +1,27 @@
+"""
+Summary statistics shared by the estimators, simulators and reports. Standard library only, so analysis of saved manifests or fake control planes does not need the KFP client packages.
+"""
+from __future__ import annotations
+
+from typing import Dict, Sequence
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """
+    Linearly interpolated percentile of a non-empty sequence, `q` between 0 and 100.
+    """
+    values = sorted(values)
+    position = (len(values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+def percentiles(values: Sequence[float], qs: Sequence[float] = (50, 95, 99)) -> Dict[str, float]:
+    """
+    Returns:
+        Dict[str, float]: e.g. `{'p50': ..., 'p95': ..., 'p99': ...}`, empty when there are no values.
+    """
+    if not values:
+        return {}
+
+    return {f"p{q}": percentile(values, q) for q in qs}
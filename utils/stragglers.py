@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+from utils.history import DurationHistory
+from utils.run_data import NodeData, RunData
+from utils.workflow_dag import LOOP_ITEM_PATTERN
+
+class RunningStats:
+    """
+    Streaming count / mean / variance (Welford).
+    """
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def add(self, value: float):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+
+    @property
+    def variance(self) -> float:
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+class QuantileSketch:
+    """
+    Log bucketed quantile sketch, quantiles are accurate to within `relative_accuracy` of the true value using memory logarithmic in the range of values.
+    """
+    def __init__(self, relative_accuracy: float = 0.02):
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets: Dict[int, int] = {}
+        self.zeros = 0
+        self.count = 0
+
+    def add(self, value: float):
+        self.count += 1
+        if value <= 0:
+            self.zeros += 1
+            return
+
+        bucket = math.ceil(math.log(value) / self._log_gamma)
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        if self.count == 0:
+            return None
+
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if rank < seen:
+                return 2 * self.gamma ** bucket / (self.gamma + 1)
+
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+class SiblingStats:
+    def __init__(self):
+        self.stats = RunningStats()
+        self.sketch = QuantileSketch()
+
+    def add(self, seconds: float):
+        self.stats.add(seconds)
+        self.sketch.add(seconds)
+
+@dataclass
+class StragglerEvent:
+    node: NodeData
+    group: str
+    elapsed: float
+    threshold: float
+    reason: str
+
+    def __str__(self) -> str:
+        return f"Straggler(name={self.node.display_name}, node={self.node.node_id}, elapsed={self.elapsed:.1f}s, threshold={self.threshold:.1f}s, reason={self.reason})"
+
+def sibling_group(node: NodeData) -> str:
+    """
+    Iterations of the same `ParallelFor` body share a group: the Argo node name with loop indices and items removed.
+    """
+    return LOOP_ITEM_PATTERN.sub('()', node.node['name'])
+
+class StragglerDetector:
+    """
+    Flags running pods whose elapsed time is an outlier compared to siblings which already finished (e.g. other iterations of the same `ParallelFor`), and optionally to historical durations of the same template.
+
+    A node is flagged once, when its elapsed time first exceeds the threshold:
+
+    - siblings: `max(mean + k_sigma * std, quantile(q) * factor)` of the finished siblings, once `min_siblings` have finished.
+    - history: `quantile(q) * factor` of the template's historical durations.
+
+    Each node is only added to its group's statistics once, so calling `observe` on every poll is O(new transitions) in statistics updates.
+
+    Args:
+        on_straggler (Optional[Callable[[StragglerEvent], None]]): Called for each straggler, e.g. to kill and retry it.
+        history (Optional[DurationHistory]): Historical durations to use as a baseline.
+    """
+    def __init__(
+        self,
+        on_straggler: Optional[Callable[[StragglerEvent], None]] = None,
+        history: Optional[DurationHistory] = None,
+        k_sigma: float = 3.0,
+        quantile: float = 0.95,
+        factor: float = 1.5,
+        min_siblings: int = 3,
+        min_elapsed: float = 10.0
+    ):
+        self.on_straggler = on_straggler
+        self.k_sigma = k_sigma
+        self.quantile = quantile
+        self.factor = factor
+        self.min_siblings = min_siblings
+        self.min_elapsed = min_elapsed
+
+        self.groups: Dict[str, SiblingStats] = {}
+        self.baselines: Dict[str, QuantileSketch] = {}
+        if history is not None:
+            for template_name, samples in history.by_template.items():
+                sketch = self.baselines[template_name] = QuantileSketch()
+                for seconds in samples:
+                    sketch.add(seconds)
+
+        self._finished: set = set()
+        self._flagged: set = set()
+
+    def sibling_threshold(self, group: str) -> Optional[float]:
+        siblings = self.groups.get(group)
+        if siblings is None or siblings.stats.count < self.min_siblings:
+            return None
+
+        return max(
+            siblings.stats.mean + self.k_sigma * siblings.stats.std,
+            siblings.sketch.quantile(self.quantile) * self.factor
+        )
+
+    def history_threshold(self, template_name: str) -> Optional[float]:
+        baseline = self.baselines.get(template_name)
+        if baseline is None or baseline.count < self.min_siblings:
+            return None
+
+        return baseline.quantile(self.quantile) * self.factor
+
+    def observe(self, run: RunData) -> List[StragglerEvent]:
+        """
+        Update statistics from the latest snapshot of a run and report new stragglers.
+        """
+        running = []
+        for node in run.nodes.values():
+            if node.node_id in self._finished:
+                continue
+
+            if node.succeeded and node.finished_at is not None:
+                self._finished.add(node.node_id)
+                self.groups.setdefault(sibling_group(node), SiblingStats()).add(node.duration.total_seconds())
+            elif node.running and node.node_id not in self._flagged:
+                running.append(node)
+
+        events = []
+        for node in running:
+            elapsed = node.duration.total_seconds()
+            if elapsed < self.min_elapsed:
+                continue
+
+            group = sibling_group(node)
+            for reason, threshold in (
+                ('siblings', self.sibling_threshold(group)),
+                ('history', self.history_threshold(node.template_name)),
+            ):
+                if threshold is not None and elapsed > threshold:
+                    events.append(StragglerEvent(
+                        node=node,
+                        group=group,
+                        elapsed=elapsed,
+                        threshold=threshold,
+                        reason=reason
+                    ))
+                    self._flagged.add(node.node_id)
+                    break
+
+        if self.on_straggler is not None:
+            for event in events:
+                self.on_straggler(event)
+
+        return events
+
+if __name__ == '__main__':
+    import time
+
+    from kfp import Client
+
+    from samples.pipelines import complex_timed
+
+    client = Client()
+    result = client.create_run_from_pipeline_func(complex_timed, arguments={"base_time": 3})
+
+    detector = StragglerDetector(on_straggler=print, min_siblings=2, min_elapsed=1.0)
+    while True:
+        data = RunData.from_run_detail(client.get_run(result.run_id), client=client)
+        detector.observe(data)
+
+        if data.status in ('Succeeded', 'Failed'):
+            break
+
+        time.sleep(0.5)
@@ -0,0 +1,247 @@
+"""
+Submit runs against a registered pipeline version instead of compiling and uploading a fresh package for every run, as `client.create_run_from_pipeline_func` does.
+
+Packages are keyed by a hash of the pipeline function's source, the source of every function it references (components, op transformers, recursively), and the `kfp` version. A package is compiled once into the cache directory and uploaded once as a pipeline version named after its hash. Later submissions, including from other processes sharing the cache directory, only call `run_pipeline`.
+
+```python
+submitter = PipelineSubmitter(client)
+for base_time in range(100):
+    submitter.submit(simple_timed, {"base_time": base_time})
+```
+"""
+from __future__ import annotations
+
+import os
+import json
+import types
+import inspect
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from utils.throttle import RateLimiter
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'kfp-scripts', 'packages')
+
+def _referenced_names(code: types.CodeType) -> Iterable[str]:
+    yield from code.co_names
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            yield from _referenced_names(const)
+
+def collect_sources(func: Callable) -> Dict[str, str]:
+    """
+    Source of `func` and of every function it references through its globals, recursively. Functions from `kfp` itself are covered by its version.
+    """
+    sources = {}
+    stack = [func]
+    while stack:
+        f = stack.pop()
+        name = f"{f.__module__}.{f.__qualname__}"
+        if name in sources or f.__module__.split('.')[0] == 'kfp':
+            continue
+
+        try:
+            sources[name] = inspect.getsource(f)
+        except (OSError, TypeError):
+            # e.g. defined in a REPL
+            sources[name] = f.__code__.co_code.hex()
+
+        for referenced in _referenced_names(f.__code__):
+            value = f.__globals__.get(referenced)
+            if inspect.isfunction(value):
+                stack.append(value)
+
+    return sources
+
+def package_hash(func: Callable, extra: str = '') -> str:
+    """
+    Args:
+        func (Callable): Pipeline function.
+        extra (str): Anything else the compiled package depends on, e.g. the source returned by a helper passed as `extra_code`.
+    """
+    import kfp
+
+    digest = hashlib.sha256()
+    digest.update(f"kfp=={kfp.__version__}\n".encode())
+    for name, source in sorted(collect_sources(func).items()):
+        digest.update(f"{name}\n{source}\n".encode())
+    digest.update(extra.encode())
+
+    return digest.hexdigest()[:16]
+
+class PipelineSubmitter:
+    """
+    Args:
+        client (Client): KFP (v1) client.
+        cache_dir (Optional[str]): Where compiled packages and the hash to pipeline version index are kept. The index is only valid for one KFP deployment, use a directory per deployment.
+        experiment_name (str): Experiment to create runs in.
+    """
+    def __init__(
+        self,
+        client,
+        cache_dir: Optional[str] = None,
+        experiment_name: str = 'Default'
+    ):
+        self.client = client
+        self.cache_dir = cache_dir or DEFAULT_CACHE_DIR
+        self.experiment_name = experiment_name
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        self._index_path = os.path.join(self.cache_dir, 'versions.json')
+        self._hashes: Dict[Tuple[Callable, str], str] = {}
+        self._versions: Dict[str, str] = {}
+        self._experiment_id: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def _load_index(self) -> Dict[str, str]:
+        if not os.path.exists(self._index_path):
+            return {}
+
+        with open(self._index_path, 'r') as f:
+            return json.load(f)
+
+    def _save_index(self, index: Dict[str, str]):
+        tmp_path = self._index_path + f".{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(index, f, indent=2)
+        os.replace(tmp_path, self._index_path)
+
+    def package(self, pipeline_func: Callable, extra: str = '') -> Tuple[str, str]:
+        """
+        Compile `pipeline_func` unless an identical package is cached.
+
+        Returns:
+            Tuple[str, str]: Package hash and path to the compiled package.
+        """
+        key = (pipeline_func, extra)
+        if key not in self._hashes:
+            self._hashes[key] = package_hash(pipeline_func, extra)
+        digest = self._hashes[key]
+
+        path = os.path.join(self.cache_dir, f"{pipeline_func.__name__}-{digest}.yaml")
+        if not os.path.exists(path):
+            from kfp import compiler
+
+            tmp_path = path + f".{os.getpid()}.tmp.yaml"
+            compiler.Compiler().compile(pipeline_func, tmp_path)
+            os.replace(tmp_path, path)
+
+        return digest, path
+
+    def version_id(self, pipeline_func: Callable, pipeline_name: Optional[str] = None, extra: str = '') -> str:
+        """
+        ID of the pipeline version for the current source of `pipeline_func`, compiling and uploading it if needed.
+        """
+        pipeline_name = pipeline_name or pipeline_func.__name__
+
+        with self._lock:
+            digest, path = self.package(pipeline_func, extra)
+            index_key = f"{pipeline_name}/{digest}"
+            if index_key in self._versions:
+                return self._versions[index_key]
+
+            index = self._load_index()
+            if index_key in index:
+                self._versions[index_key] = index[index_key]
+                return index[index_key]
+
+            pipeline_id = self.client.get_pipeline_id(pipeline_name)
+            if pipeline_id is None:
+                # NOTE: The first upload becomes the default version named after the pipeline, which can not be renamed. A version named after the digest is uploaded next to it, so other machines (or an empty cache directory) find it by name.
+                pipeline_id = self.client.upload_pipeline(path, pipeline_name=pipeline_name).id
+                version_id = None
+            else:
+                version_id = self._find_version(pipeline_id, digest)
+
+            if version_id is None:
+                version_id = self.client.upload_pipeline_version(
+                    path,
+                    pipeline_version_name=digest,
+                    pipeline_id=pipeline_id
+                ).id
+
+            index[index_key] = self._versions[index_key] = version_id
+            self._save_index(index)
+
+            return version_id
+
+    def _find_version(self, pipeline_id: str, digest: str) -> Optional[str]:
+        page_token = ''
+        while True:
+            response = self.client.list_pipeline_versions(pipeline_id, page_size=100, page_token=page_token)
+            for version in response.versions or []:
+                if version.name == digest:
+                    return version.id
+
+            page_token = response.next_page_token
+            if not page_token:
+                return None
+
+    def experiment_id(self) -> str:
+        if self._experiment_id is None:
+            # NOTE: Returns the existing experiment when there is one
+            self._experiment_id = self.client.create_experiment(self.experiment_name).id
+
+        return self._experiment_id
+
+    def submit(
+        self,
+        pipeline_func: Callable,
+        arguments: Optional[dict] = None,
+        run_name: Optional[str] = None,
+        pipeline_name: Optional[str] = None
+    ):
+        """
+        Drop in for `client.create_run_from_pipeline_func(pipeline_func, arguments)`.
+
+        Returns:
+            RunPipelineResult: Same as `create_run_from_pipeline_func`, e.g. for `.run_id` and `.wait_for_run_completion()`.
+        """
+        from kfp._client import RunPipelineResult
+
+        version_id = self.version_id(pipeline_func, pipeline_name)
+        run = self.client.run_pipeline(
+            experiment_id=self.experiment_id(),
+            job_name=run_name or f"{pipeline_func.__name__} {os.urandom(4).hex()}",
+            params=arguments or {},
+            version_id=version_id
+        )
+
+        return RunPipelineResult(self.client, run)
+
+    def submit_many(
+        self,
+        pipeline_func: Callable,
+        arguments: Iterable[dict],
+        max_workers: int = 8,
+        rate: float = 10.0
+    ) -> List:
+        """
+        Submit one run per entry of `arguments` concurrently, the package is compiled and uploaded at most once.
+        """
+        limiter = RateLimiter(rate)
+        self.version_id(pipeline_func)
+        self.experiment_id()
+
+        def submit(args: dict):
+            with limiter:
+                return self.submit(pipeline_func, args)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            return list(pool.map(submit, arguments))
+
+if __name__ == '__main__':
+    import time
+
+    from kfp import Client
+
+    from samples.pipelines import simple_timed
+
+    client = Client()
+    submitter = PipelineSubmitter(client)
+
+    start = time.perf_counter()
+    results = submitter.submit_many(simple_timed, [{"base_time": t} for t in range(1, 11)])
+    print(f">>> Submitted {len(results)} runs in {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import time
+import threading
+from typing import Optional
+
+class RateLimiter:
+    """
+    Thread safe token bucket. Each call to `acquire` takes a token, blocking until one is available.
+
+    Args:
+        rate (float): Tokens added per second.
+        burst (Optional[int]): Maximum number of tokens which can accumulate, defaults to one second worth.
+    """
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        assert rate > 0, "Rate must be positive, got: %s" % rate
+
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1, int(rate))
+
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens: float = 1.0):
+        while True:
+            with self._lock:
+                self._refill(time.monotonic())
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+
+            time.sleep(wait)
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        return False
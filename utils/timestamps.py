@@ -0,0 +1,36 @@
+"""
+Argo / KFP timestamp helpers. Standard library only, so modules working on saved manifests can be imported without the KFP client packages.
+
+Argo records timestamps as Zulu (UTC) strings with second resolution, e.g. `2024-01-01T00:00:00Z`.
+"""
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Optional
+
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+def utc_now() -> datetime:
+    return datetime.now(tz=timezone.utc)
+
+def parse_datetime(dt_str: Optional[str]) -> Optional[datetime]:
+    """
+    Returns:
+        Optional[datetime]: Timezone aware datetime, `None` for a missing (not yet started / finished) timestamp.
+    """
+    if not dt_str:
+        return None
+
+    assert dt_str.endswith("Z"), "Does not appear to be Zulu (UTC) timestamp"
+    return datetime.strptime(dt_str, TIMESTAMP_FORMAT).replace(tzinfo=timezone.utc)
+
+@lru_cache(maxsize=65536)
+def parse_timestamp(dt_str: Optional[str]) -> Optional[float]:
+    """
+    Returns:
+        Optional[float]: Epoch seconds, `None` for a missing timestamp.
+    """
+    # NOTE: Cached, large runs repeat the same second resolution values a lot
+    dt = parse_datetime(dt_str)
+    return None if dt is None else dt.timestamp()
@@ -0,0 +1,249 @@
+"""
+Export run timelines as Chrome trace event JSON, which can be loaded in Perfetto (https://ui.perfetto.dev) or `chrome://tracing`.
+
+The trace has three processes:
+
+- `Pods`: One track per concurrency slot, so the number of tracks in use at any time is the number of running pods.
+- `Graph`: DAG / TaskGroup nodes as nested spans, with sibling sub-graphs on separate tracks.
+- `Scheduling`: Gaps between a pod becoming ready (its predecessors finished) and it starting.
+
+Spans have to be sorted by start time to assign tracks, so one tuple per node is held in memory (next to the run's manifest, which is already there). The trace events themselves are encoded and written to the file one at a time, rather than collected into a list of dicts first.
+"""
+from __future__ import annotations
+
+import json
+import heapq
+from typing import IO, Iterable, List, Optional, Tuple, Union
+
+from utils.timestamps import parse_timestamp, utc_now
+
+PODS_PID = 1
+GRAPH_PID = 2
+SCHEDULING_PID = 3
+
+_ENCODER = json.JSONEncoder(separators=(',', ':'))
+
+# (id, name, kind, start, end, ready, args) with times in epoch seconds
+Span = Tuple[str, str, str, float, float, Optional[float], dict]
+
+def _timestamp(dt_str: Optional[str], default: float) -> float:
+    if dt_str is None:
+        return default
+
+    return parse_timestamp(dt_str)
+
+def argo_spans(workflow: dict) -> List[Span]:
+    """
+    Spans from an Argo workflow, e.g. `RunData.workflow_manifest` or `ArgoRunData.workflow_data`.
+    """
+    now = utc_now().timestamp()
+    nodes = workflow['status'].get('nodes', {})
+
+    times = {}
+    for node_id, node in nodes.items():
+        start = _timestamp(node.get('startedAt'), now)
+        times[node_id] = (start, _timestamp(node.get('finishedAt'), now))
+
+    # Pods become ready when the last of their predecessors finished, the enclosing DAG counts from when it started
+    ready = {}
+    for node_id, node in nodes.items():
+        for child in node.get('children', []):
+            if child not in times:
+                continue
+            start, end = times[node_id]
+            at = end if end <= times[child][0] else start
+            ready[child] = max(ready.get(child, at), at)
+
+    spans = []
+    for node_id, node in nodes.items():
+        start, end = times[node_id]
+        spans.append((
+            node_id,
+            node['displayName'],
+            node['type'],
+            start,
+            end,
+            ready.get(node_id),
+            {
+                'phase': node['phase'],
+                'template': node.get('templateName'),
+                'name': node['name'],
+            }
+        ))
+
+    return spans
+
+def v2_spans(run_data) -> List[Span]:
+    """
+    Spans from the task details of a v2 `RunData` (see `v2/utils/run_data.py`).
+    """
+    now = utc_now().timestamp()
+
+    spans = []
+    for node in run_data.nodes:
+        task = node.task
+        created = task.create_time.timestamp() if task.create_time else now
+        start = task.start_time.timestamp() if task.start_time else created
+        end = task.end_time.timestamp() if task.end_time else now
+        spans.append((
+            task.task_id,
+            node.display_name,
+            'DAG' if task.child_tasks else 'Pod',
+            start,
+            end,
+            created,
+            {'state': node.state},
+        ))
+
+    return spans
+
+def spans_from(source) -> List[Span]:
+    if hasattr(source, 'workflow_manifest'):
+        return argo_spans(source.workflow_manifest)
+    if hasattr(source, 'workflow_data'):
+        return argo_spans(source.workflow_data)
+    if hasattr(source, 'run'):
+        return v2_spans(source)
+
+    raise TypeError(f"Unsupported source type: {type(source)}")
+
+class TraceWriter:
+    """
+    Writes trace events into a JSON object with a `traceEvents` array as they are passed in.
+    """
+    def __init__(self, f: IO[str]):
+        self.f = f
+        self.count = 0
+
+    def __enter__(self) -> TraceWriter:
+        self.f.write('{"displayTimeUnit": "ms", "traceEvents": [\n')
+        return self
+
+    def write(self, event: dict):
+        if self.count:
+            self.f.write(',\n')
+        self.f.write(_ENCODER.encode(event))
+        self.count += 1
+
+    def __exit__(self, *exc):
+        self.f.write('\n]}\n')
+        return False
+
+    def name(self, pid: int, name: str, tid: Optional[int] = None):
+        self.write({
+            'name': 'process_name' if tid is None else 'thread_name',
+            'ph': 'M',
+            'pid': pid,
+            'tid': tid or 0,
+            'args': {'name': name},
+        })
+
+    def span(self, pid: int, tid: int, name: str, category: str, start_us: int, end_us: int, args: dict):
+        self.write({
+            'name': name,
+            'cat': category,
+            'ph': 'X',
+            'pid': pid,
+            'tid': tid,
+            'ts': start_us,
+            'dur': max(end_us - start_us, 0),
+            'args': args,
+        })
+
+def _slot_lanes(intervals: Iterable[Tuple[float, float]]) -> Iterable[int]:
+    """
+    Interval partitioning, assign each interval (sorted by start) the lowest free lane.
+    """
+    free: List[int] = []
+    busy: List[Tuple[float, int]] = []
+    lanes = 0
+    for start, end in intervals:
+        while busy and busy[0][0] <= start:
+            heapq.heappush(free, heapq.heappop(busy)[1])
+        if free:
+            lane = heapq.heappop(free)
+        else:
+            lane = lanes
+            lanes += 1
+        heapq.heappush(busy, (end, lane))
+        yield lane
+
+def _nested_lanes(intervals: Iterable[Tuple[float, float]]) -> Iterable[int]:
+    """
+    Assign intervals (sorted by start, then longest first) to lanes such that spans on a lane are either disjoint or fully nested.
+    """
+    stacks: List[List[float]] = []
+    for start, end in intervals:
+        for lane, stack in enumerate(stacks):
+            while stack and stack[-1] <= start:
+                stack.pop()
+            if not stack or end <= stack[-1]:
+                stack.append(end)
+                yield lane
+                break
+        else:
+            stacks.append([end])
+            yield len(stacks) - 1
+
+def write_chrome_trace(source, f: Union[str, IO[str]]) -> int:
+    """
+    Write the timeline of a run as Chrome trace event JSON.
+
+    Args:
+        source: A `utils.run_data.RunData`, or `RunData` / `ArgoRunData` from `v2/utils/run_data.py`.
+        f (Union[str, IO[str]]): Path or text file object to write to.
+
+    Returns:
+        int: Number of trace events written.
+    """
+    if isinstance(f, str):
+        with open(f, 'w') as fp:
+            return write_chrome_trace(source, fp)
+
+    spans = spans_from(source)
+    origin = min((s[3] for s in spans), default=0.0)
+
+    def us(t: float) -> int:
+        return int((t - origin) * 1_000_000)
+
+    with TraceWriter(f) as writer:
+        writer.name(PODS_PID, 'Pods')
+        writer.name(GRAPH_PID, 'Graph')
+        writer.name(SCHEDULING_PID, 'Scheduling')
+
+        pods = sorted((s for s in spans if s[2] == 'Pod'), key=lambda s: s[3])
+        lanes = set()
+        for span, lane in zip(pods, _slot_lanes((s[3], s[4]) for s in pods)):
+            if lane not in lanes:
+                lanes.add(lane)
+                writer.name(PODS_PID, f"slot {lane}", tid=lane)
+            writer.span(PODS_PID, lane, span[1], 'pod', us(span[3]), us(span[4]), {'id': span[0], **span[6]})
+
+        gaps = sorted(
+            ((s[5], s[3], s) for s in pods if s[5] is not None and s[3] > s[5]),
+            key=lambda g: g[0]
+        )
+        for (ready, start, span), lane in zip(gaps, _slot_lanes((g[0], g[1]) for g in gaps)):
+            writer.span(SCHEDULING_PID, lane, f"waiting: {span[1]}", 'gap', us(ready), us(start), {'id': span[0]})
+
+        graph = sorted((s for s in spans if s[2] != 'Pod'), key=lambda s: (s[3], -s[4]))
+        lanes = set()
+        for span, lane in zip(graph, _nested_lanes((s[3], s[4]) for s in graph)):
+            if lane not in lanes:
+                lanes.add(lane)
+                writer.name(GRAPH_PID, f"graph {lane}", tid=lane)
+            writer.span(GRAPH_PID, lane, span[1], span[2].lower(), us(span[3]), us(span[4]), {'id': span[0], **span[6]})
+
+        return writer.count
+
+if __name__ == '__main__':
+    import sys
+
+    from utils.run_data import RunData
+
+    # e.g. a file written by `dump_manifests`
+    with open(sys.argv[1], 'r') as f:
+        data = RunData(json.load(f))
+
+    count = write_chrome_trace(data, sys.argv[2])
+    print(f">>> Wrote {count} trace events to {sys.argv[2]}")
@@ -0,0 +1,323 @@
+"""
+Static expansion of an Argo workflow spec (as compiled by KFP) into its task instances, and a list scheduler which replays them under Argo's parallelism limits.
+
+Nodes are keyed the same way Argo names them in `status.nodes`, minus the workflow name prefix: `for-loop-1(0:1).timed-sleep-4`. Loop items are dropped from the key (`for-loop-1(0).timed-sleep-4`) so keys can be computed without knowing how Argo formats each item.
+"""
+from __future__ import annotations
+
+import re
+import heapq
+from collections import deque
+from functools import lru_cache
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+LOOP_ITEM_PATTERN = re.compile(r'\((\d+):[^()]*\)')
+LOOP_INDEX_PATTERN = re.compile(r'\((\d+)\)')
+DEPENDS_TASK_PATTERN = re.compile(r'[A-Za-z0-9][A-Za-z0-9_-]*(?:\(\d+\))?')
+DEPENDS_KEYWORDS = {
+    'Succeeded', 'Failed', 'Errored', 'Skipped', 'Omitted', 'Daemoned',
+    'AnySucceeded', 'AllFailed',
+}
+
+# NOTE: Called for every node by each consumer of a run, cached since node names repeat across them
+@lru_cache(maxsize=1 << 16)
+def normalize_node_name(node_name: str, workflow_name: str) -> str:
+    """
+    Convert an Argo node name from `status.nodes` into the key used by `WorkflowDag`.
+    """
+    if node_name == workflow_name:
+        return ''
+
+    if node_name.startswith(workflow_name + '.'):
+        node_name = node_name[len(workflow_name) + 1:]
+
+    return LOOP_ITEM_PATTERN.sub(r'(\1)', node_name)
+
+def loop_counts_from_status(workflow_manifest: dict) -> Dict[str, int]:
+    """
+    Number of iterations of each loop in a run, from the node names in `status.nodes`, to pass as `loop_counts` to `WorkflowDag`.
+    """
+    workflow_name = workflow_manifest['metadata'].get('name', '')
+    counts: Dict[str, int] = {}
+    for node in workflow_manifest['status'].get('nodes', {}).values():
+        key = normalize_node_name(node['name'], workflow_name)
+        for match in LOOP_INDEX_PATTERN.finditer(key):
+            loop_key = key[:match.start()]
+            counts[loop_key] = max(counts.get(loop_key, 0), int(match.group(1)) + 1)
+
+    return counts
+
+def _task_dependencies(task: dict) -> List[str]:
+    if 'dependencies' in task:
+        return list(task['dependencies'])
+
+    if 'depends' in task:
+        # e.g. "(task-a.Succeeded || task-a.Skipped) && task-b"
+        names = DEPENDS_TASK_PATTERN.findall(task['depends'])
+        return list(dict.fromkeys(n for n in names if n not in DEPENDS_KEYWORDS))
+
+    return []
+
+@dataclass
+class TaskNode:
+    index: int
+    key: str
+    kind: str  # 'Pod' or 'DAG'
+    template_name: str
+    parent: int  # -1 for the root DAG
+    dependencies: List[int] = field(default_factory=list)
+    children: List[int] = field(default_factory=list)
+    parallelism: Optional[int] = None
+
+class WorkflowDag:
+    """
+    Task instances of a workflow, parents are always listed before their children.
+
+    Args:
+        workflow_manifest (dict): An Argo workflow, either compiled (spec only) or from a run (`RunData.workflow_manifest`).
+        loop_counts (Optional[Dict[str, int]]): Number of iterations for `withParam` loops keyed by the loop task's key, these can not be known from the spec alone. Defaults to one iteration.
+    """
+    def __init__(
+        self,
+        workflow_manifest: dict,
+        loop_counts: Optional[Dict[str, int]] = None
+    ):
+        self.workflow_manifest = workflow_manifest
+        self.workflow_name = workflow_manifest['metadata'].get('name', '')
+        self.loop_counts = loop_counts or {}
+
+        spec = workflow_manifest['spec']
+        self.templates = {t['name']: t for t in spec['templates']}
+        self.parallelism: Optional[int] = spec.get('parallelism')
+
+        self.nodes: List[TaskNode] = []
+        self.index: Dict[str, int] = {}
+        self._expand(spec['entrypoint'], key='', parent=-1)
+
+    @property
+    def pods(self) -> List[TaskNode]:
+        return [n for n in self.nodes if n.kind == 'Pod']
+
+    def _add(self, key: str, template_name: str, parent: int) -> TaskNode:
+        template = self.templates[template_name]
+        node = TaskNode(
+            index=len(self.nodes),
+            key=key,
+            kind='DAG' if 'dag' in template else 'Pod',
+            template_name=template_name,
+            parent=parent,
+            parallelism=template.get('parallelism'),
+        )
+        self.nodes.append(node)
+        self.index[key] = node.index
+        if parent >= 0:
+            self.nodes[parent].children.append(node.index)
+
+        return node
+
+    def _expand(self, template_name: str, key: str, parent: int) -> TaskNode:
+        node = self._add(key, template_name, parent)
+        template = self.templates[template_name]
+        if 'dag' not in template:
+            return node
+
+        prefix = f"{key}." if key else ''
+        instances: Dict[str, List[int]] = {}
+        for task in template['dag']['tasks']:
+            task_key = prefix + task['name']
+            if 'withItems' in task:
+                count = len(task['withItems'])
+            elif 'withParam' in task or 'withSequence' in task:
+                count = self.loop_counts.get(task_key, 1)
+            else:
+                count = None
+
+            if count is None:
+                instances[task['name']] = [self._expand(task['template'], task_key, node.index).index]
+            else:
+                instances[task['name']] = [
+                    self._expand(task['template'], f"{task_key}({i})", node.index).index
+                    for i in range(count)
+                ]
+
+        for task in template['dag']['tasks']:
+            dependencies = [
+                i
+                for name in _task_dependencies(task)
+                for i in instances.get(name.split('(')[0], [])
+            ]
+            for i in instances[task['name']]:
+                self.nodes[i].dependencies = dependencies
+
+        return node
+
+    def find(self, node_name: str) -> Optional[TaskNode]:
+        """
+        Find the task instance for an Argo node name from `status.nodes`.
+        """
+        index = self.index.get(normalize_node_name(node_name, self.workflow_name))
+        return None if index is None else self.nodes[index]
+
+class Scheduler:
+    """
+    List scheduler replaying a `WorkflowDag` under the workflow's global `parallelism` and the `parallelism` of each DAG template, which limits the pods running beneath each instance of that template.
+
+    Precomputes everything which does not depend on durations so that `run` can be called many times (e.g. Monte Carlo trials) cheaply.
+
+    Args:
+        dag (WorkflowDag): Workflow to schedule.
+        parallelism (Optional[int]): Overrides the workflow's global parallelism, `0` for unlimited.
+        template_parallelism (Optional[Dict[str, int]]): Overrides the parallelism of DAG templates by template name, `0` for unlimited.
+    """
+    def __init__(
+        self,
+        dag: WorkflowDag,
+        parallelism: Optional[int] = None,
+        template_parallelism: Optional[Dict[str, int]] = None
+    ):
+        self.dag = dag
+        template_parallelism = template_parallelism or {}
+        parallelism = dag.parallelism if parallelism is None else parallelism
+
+        n = len(dag.nodes)
+        self.is_pod = [node.kind == 'Pod' for node in dag.nodes]
+        self.parent = [node.parent for node in dag.nodes]
+        self.children = [node.children for node in dag.nodes]
+        self.dependency_counts = [len(node.dependencies) for node in dag.nodes]
+        self.dependents: List[List[int]] = [[] for _ in range(n)]
+        for node in dag.nodes:
+            for d in node.dependencies:
+                self.dependents[d].append(node.index)
+
+        # Every pod takes a slot from the global limit and from each ancestor DAG instance with a limit
+        self.cap_limits: List[int] = []
+        cap_of_node: Dict[int, int] = {}
+        if parallelism:
+            self.cap_limits.append(parallelism)
+        for node in dag.nodes:
+            limit = template_parallelism.get(node.template_name, node.parallelism)
+            if node.kind == 'DAG' and limit:
+                cap_of_node[node.index] = len(self.cap_limits)
+                self.cap_limits.append(limit)
+
+        self.caps: List[List[int]] = [[] for _ in range(n)]
+        for node in dag.nodes:
+            if node.kind != 'Pod':
+                continue
+
+            caps = [0] if parallelism else []
+            ancestor = node.parent
+            while ancestor >= 0:
+                if ancestor in cap_of_node:
+                    caps.append(cap_of_node[ancestor])
+                ancestor = self.parent[ancestor]
+            self.caps[node.index] = caps
+
+    def run(
+        self,
+        durations: Sequence[float],
+        completed: Sequence[int] = (),
+        running: Optional[Dict[int, float]] = None
+    ) -> List[float]:
+        """
+        Simulate the remaining execution.
+
+        Args:
+            durations (Sequence[float]): Duration of every pod by node index (entries for DAG nodes are ignored).
+            completed (Sequence[int]): Indices of nodes which already finished (at time zero).
+            running (Optional[Dict[int, float]]): Pods already running, mapped to their remaining duration.
+
+        Returns:
+            List[float]: Finish time of each node, relative to time zero. Nodes completed up front finish at zero.
+        """
+        running = running or {}
+        n = len(self.is_pod)
+        pending_dependencies = list(self.dependency_counts)
+        pending_children = [len(c) for c in self.children]
+        cap_usage = [0] * len(self.cap_limits)
+        finished_at = [0.0] * n
+        done = [False] * n
+        started = [False] * n
+        events: List[tuple] = []
+        waiting: deque = deque()
+
+        def mark_done(i: int):
+            done[i] = True
+            for d in self.dependents[i]:
+                pending_dependencies[d] -= 1
+            if self.parent[i] >= 0:
+                pending_children[self.parent[i]] -= 1
+
+        for i in completed:
+            mark_done(i)
+        for i, remaining in running.items():
+            started[i] = True
+            for c in self.caps[i]:
+                cap_usage[c] += 1
+            heapq.heappush(events, (remaining, i))
+
+        def ready(i: int, t: float):
+            if self.is_pod[i]:
+                waiting.append(i)
+                return
+
+            started[i] = True
+            if pending_children[i] == 0:
+                complete(i, t)
+                return
+            for c in self.children[i]:
+                if not done[c] and not started[c] and pending_dependencies[c] == 0:
+                    ready(c, t)
+
+        def complete(i: int, t: float):
+            finished_at[i] = t
+            mark_done(i)
+            for d in self.dependents[i]:
+                if pending_dependencies[d] == 0 and started[self.parent[d]] and not started[d]:
+                    ready(d, t)
+
+            p = self.parent[i]
+            if p >= 0 and pending_children[p] == 0:
+                complete(p, t)
+
+        # Nodes are ordered parents first, so one pass settles which DAGs are already underway
+        for i in range(n):
+            if done[i] or started[i] or pending_dependencies[i] != 0:
+                continue
+            p = self.parent[i]
+            if p == -1 or (started[p] and not done[p]):
+                if self.is_pod[i]:
+                    waiting.append(i)
+                else:
+                    started[i] = True
+        for i in range(n - 1, -1, -1):
+            if started[i] and not done[i] and not self.is_pod[i] and pending_children[i] == 0:
+                complete(i, 0.0)
+
+        t = 0.0
+        while True:
+            # Start whatever fits, in the order nodes became ready
+            for _ in range(len(waiting)):
+                i = waiting.popleft()
+                caps = self.caps[i]
+                if all(cap_usage[c] < self.cap_limits[c] for c in caps):
+                    for c in caps:
+                        cap_usage[c] += 1
+                    started[i] = True
+                    heapq.heappush(events, (t + durations[i], i))
+                else:
+                    waiting.append(i)
+
+            if not events:
+                break
+
+            t, i = heapq.heappop(events)
+            for c in self.caps[i]:
+                cap_usage[c] -= 1
+            complete(i, t)
+
+        return finished_at
+
+    def makespan(self, durations: Sequence[float], **kwargs) -> float:
+        return max(self.run(durations, **kwargs), default=0.0)
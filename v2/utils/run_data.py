@@ -190,13 +190,18 @@ class ArgoNodeData(ArgoPhasedMixin):
 
 class ArgoRunData(ArgoPhasedMixin):
     @classmethod
-    def from_workflow_name(cls, client: Client, workflow_name: str):
+    def from_workflow_name(cls, client: Client, workflow_name: str, api=None):
+        """
+        Args:
+            api: Anything with `get_namespaced_custom_object`, e.g. a `ThrottledClient` from `utils/api_client.py`. Defaults to a `CustomObjectsApi` from the local kube config.
+        """
         namespace = client.get_user_namespace()
         if namespace == '':
             namespace = "kubeflow"
 
-        k8s_config.load_kube_config()
-        api = k8s_client.CustomObjectsApi()
+        if api is None:
+            k8s_config.load_kube_config()
+            api = k8s_client.CustomObjectsApi()
         workflow_data = api.get_namespaced_custom_object(
             group="argoproj.io",
             version="v1alpha1",